@@ -3,6 +3,10 @@ from discord.ext import commands
 import os
 import logging
 from dotenv import load_dotenv
+from utils import close_http_session
+from db_async import close_db_executor, run_db
+from db import close_db_pool, mark_stale_tip_intents_unknown, start_settings_cache, stop_settings_cache
+from migrate import apply_migrations
 
 # Load environment variables
 load_dotenv()
@@ -77,6 +81,19 @@ async def load_cogs():
 if __name__ == "__main__":
     import asyncio
     async def main():
+        # Schema changes are applied once here; request paths only run their own DML
+        await run_db(apply_migrations)
+        # Tips cut off by the last shutdown are retried with their original nonce when their job runs again
+        stale_intents = await run_db(mark_stale_tip_intents_unknown, 0)
+        if stale_intents:
+            logger.warning(f"[Tipping] {stale_intents} tip(s) from the last run have an unknown outcome")
+        start_settings_cache()
         await load_cogs()
-        await bot.start(os.getenv("DISCORD_TOKEN"))
+        try:
+            await bot.start(os.getenv("DISCORD_TOKEN"))
+        finally:
+            await close_http_session()
+            stop_settings_cache()
+            close_db_executor()
+            close_db_pool()
     asyncio.run(main())
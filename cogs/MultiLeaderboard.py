@@ -1,13 +1,15 @@
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
-from utils import get_current_week_range, fetch_weighted_wager, send_tip
-from db import get_leaderboard_message_id, save_leaderboard_message_id, save_tip_log, get_db_connection, release_db_connection, get_setting_value, save_setting_value
+from utils import get_current_week_range, fetch_weighted_wager_async
+from payout_dispatcher import payout_dispatcher, LANE_PRIZE
+from db import get_setting_value, save_setting_value
+import db_async
+from snapshot_events import snapshot_bus, SNAPSHOT_WAIT_SECONDS
 import os
 import logging
 from datetime import datetime
 import datetime as dt
-import asyncio
 import json
 
 logger = logging.getLogger(__name__)
@@ -27,6 +29,7 @@ class MultiLeaderboard(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.last_payout_week = None  # Track last week we processed payouts for
+        self.snapshots = snapshot_bus.subscribe("MultiLeaderboard")
         self.update_multi_leaderboard.start()
         self.weekly_payout_check.start()  # New task for weekly payouts
 
@@ -262,10 +265,11 @@ class MultiLeaderboard(commands.Cog):
         embed.set_footer(text="AutoTip Engine Live • Payouts Sent Successfully")
         return embed
 
-    @tasks.loop(minutes=10)
+    @tasks.loop(seconds=0)  # Paced by DataManager snapshots
     async def update_multi_leaderboard(self):
-        logger.info("[MultiLeaderboard] Starting weekly multiplier leaderboard update cycle, waiting 2 minutes...")
-        await asyncio.sleep(120)  # 2 minute offset (DataManager runs at 0:00, we run at 0:02)
+        # Weekly data is fetched here, so a missing snapshot only delays the update
+        await self.snapshots.wait(timeout=SNAPSHOT_WAIT_SECONDS)
+        logger.info("[MultiLeaderboard] Starting weekly multiplier leaderboard update cycle")
         channel = self.bot.get_channel(MULTI_LEADERBOARD_CHANNEL_ID)
         if not channel:
             logger.error("MultiLeaderboard channel not found.")
@@ -287,7 +291,7 @@ class MultiLeaderboard(commands.Cog):
         
         try:
             # Fetch weekly weighted wager data directly
-            weekly_weighted_data = await asyncio.to_thread(fetch_weighted_wager, start_date, end_date)
+            weekly_weighted_data = await fetch_weighted_wager_async(start_date, end_date)
         except Exception as e:
             logger.error(f"[MultiLeaderboard] Error fetching weekly data: {e}")
             return
@@ -413,7 +417,7 @@ class MultiLeaderboard(commands.Cog):
         
         # Post or update the leaderboard message
         # Use a unique key for the multi leaderboard message
-        message_id = get_leaderboard_message_id(key="multi_leaderboard_message_id")
+        message_id = await db_async.get_leaderboard_message_id(key="multi_leaderboard_message_id")
         if message_id:
             try:
                 message = await channel.fetch_message(message_id)
@@ -423,7 +427,7 @@ class MultiLeaderboard(commands.Cog):
                 logger.warning(f"MultiLeaderboard message ID {message_id} not found, sending new message.")
                 try:
                     message = await channel.send(embed=embed)
-                    save_leaderboard_message_id(message.id, key="multi_leaderboard_message_id")
+                    await db_async.save_leaderboard_message_id(message.id, key="multi_leaderboard_message_id")
                     logger.info("[MultiLeaderboard] New leaderboard message sent.")
                 except discord.errors.Forbidden:
                     logger.error("Bot lacks permission to send messages in MultiLeaderboard channel.")
@@ -433,7 +437,7 @@ class MultiLeaderboard(commands.Cog):
             logger.info("[MultiLeaderboard] No leaderboard message ID found, sending new message.")
             try:
                 message = await channel.send(embed=embed)
-                save_leaderboard_message_id(message.id, key="multi_leaderboard_message_id")
+                await db_async.save_leaderboard_message_id(message.id, key="multi_leaderboard_message_id")
                 logger.info("[MultiLeaderboard] New leaderboard message sent.")
             except discord.errors.Forbidden:
                 logger.error("Bot lacks permission to send messages in MultiLeaderboard channel.")
@@ -532,54 +536,9 @@ class MultiLeaderboard(commands.Cog):
             logger.info(f"[MultiLeaderboard] 📅 Payout week range: {start_date} to {end_date}")
             week_key = f"{start_date[:10]}"  # Use start date as week identifier (YYYY-MM-DD)
             
-            # First, ensure the table exists and has correct schema
-            conn = get_db_connection()
-            try:
-                with conn.cursor() as cur:
-                    # Create table if it doesn't exist
-                    cur.execute("""
-                        CREATE TABLE IF NOT EXISTS weekly_multiplier_payouts (
-                            id SERIAL PRIMARY KEY,
-                            week_start DATE NOT NULL,
-                            rank INTEGER NOT NULL,
-                            user_id VARCHAR(255) NOT NULL,
-                            username VARCHAR(255) NOT NULL,
-                            prize_amount DECIMAL(10,2) NOT NULL,
-                            multiplier DECIMAL(10,2) NOT NULL,
-                            game_name VARCHAR(255),
-                            wagered DECIMAL(10,2) DEFAULT 0,
-                            payout DECIMAL(10,2) DEFAULT 0,
-                            paid_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                            UNIQUE(week_start, rank)
-                        );
-                    """)
-                    
-                    # Try to alter user_id column to VARCHAR if it exists as BIGINT
-                    try:
-                        cur.execute("ALTER TABLE weekly_multiplier_payouts ALTER COLUMN user_id TYPE VARCHAR(255);")
-                        logger.info("[MultiLeaderboard] ✅ Altered user_id column to VARCHAR(255)")
-                    except Exception as alter_error:
-                        # Column might already be VARCHAR, that's fine
-                        logger.debug(f"[MultiLeaderboard] user_id column alter (may already be correct): {alter_error}")
-
-                    # Ensure wager/payout columns exist for accurate summary embeds.
-                    try:
-                        cur.execute("ALTER TABLE weekly_multiplier_payouts ADD COLUMN IF NOT EXISTS wagered DECIMAL(10,2) DEFAULT 0;")
-                        cur.execute("ALTER TABLE weekly_multiplier_payouts ADD COLUMN IF NOT EXISTS payout DECIMAL(10,2) DEFAULT 0;")
-                    except Exception as column_error:
-                        logger.debug(f"[MultiLeaderboard] wager/payout column ensure (may already be correct): {column_error}")
-                    
-                    conn.commit()
-                    logger.info("[MultiLeaderboard] ✅ Ensured weekly_multiplier_payouts table exists with correct schema")
-            except Exception as e:
-                logger.warning(f"[MultiLeaderboard] ⚠️ Could not create/alter table: {e}")
-                conn.rollback()
-            finally:
-                release_db_connection(conn)
-            
             # Fetch weekly data and get top 3
             logger.info(f"[MultiLeaderboard] 📊 Fetching weekly data for payouts: {start_date} to {end_date}")
-            weekly_weighted_data = await asyncio.to_thread(fetch_weighted_wager, start_date, end_date)
+            weekly_weighted_data = await fetch_weighted_wager_async(start_date, end_date, force_refresh=True)
             logger.info(f"[MultiLeaderboard] 📊 Received {len(weekly_weighted_data)} entries from API")
 
             # Filter and sort by highest multiplier
@@ -593,33 +552,7 @@ class MultiLeaderboard(commands.Cog):
                 return True
 
             # Load already-paid ranks for this week so we can retry only missing ranks.
-            conn = get_db_connection()
-            paid_rows_by_rank = {}
-            try:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT rank, username, multiplier, game_name, prize_amount, wagered, payout
-                        FROM weekly_multiplier_payouts
-                        WHERE week_start = %s AND rank > 0
-                        ORDER BY rank ASC;
-                        """,
-                        (week_key,)
-                    )
-                    for rank, username, multiplier, game_name, prize_amount, wagered, payout in cur.fetchall():
-                        paid_rows_by_rank[int(rank)] = {
-                            "rank": int(rank),
-                            "username": username,
-                            "multiplier": float(multiplier),
-                            "game_name": game_name,
-                            "wagered": float(wagered or 0),
-                            "payout": float(payout or 0),
-                            "prize": float(prize_amount),
-                        }
-            except Exception as e:
-                logger.error(f"[MultiLeaderboard] Error checking database: {e}")
-            finally:
-                release_db_connection(conn)
+            paid_rows_by_rank = await db_async.get_weekly_multiplier_paid_rows(week_key)
 
             if len(paid_rows_by_rank) >= expected_winner_count:
                 logger.info(
@@ -651,82 +584,53 @@ class MultiLeaderboard(commands.Cog):
                 
                 # Send the tip
                 logger.info(f"[MultiLeaderboard] 💸 Sending weekly prize: ${prize_amount} to {username} (Rank #{i+1}, x{multiplier:.2f})")
-                tip_response = await send_tip(
-                    user_id=os.getenv("ROOBET_USER_ID"),
+                tip_response = await payout_dispatcher.send(
+                    LANE_PRIZE,
                     to_username=username,
                     to_user_id=user_id,
-                    amount=prize_amount
+                    amount=prize_amount,
+                    source="weekly_multiplier",
+                    idempotency_key=f"weekly_multiplier:{week_key}:{rank}",
                 )
                 
                 logger.info(f"[MultiLeaderboard] Tip response: {tip_response}")
                 
                 if tip_response.get("success"):
                     logger.info(f"[MultiLeaderboard] ✅ Tip SUCCESSFUL for {username}")
-                    # Record the payout in database
-                    conn = get_db_connection()
-                    try:
-                        with conn.cursor() as cur:
-                            cur.execute("""
-                                INSERT INTO weekly_multiplier_payouts 
-                                (week_start, rank, user_id, username, prize_amount, multiplier, game_name, wagered, payout)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                ON CONFLICT (week_start, rank) DO NOTHING
-                            """, (week_key, rank, user_id, username, prize_amount, multiplier, game_name, wagered, payout))
-                            conn.commit()
-                            logger.info(f"[MultiLeaderboard] 💾 Recorded payout in database for {username}")
-                    except Exception as db_error:
-                        logger.error(f"[MultiLeaderboard] ❌ Failed to record payout in database: {db_error}")
-                    finally:
-                        release_db_connection(conn)
-                    
-                    # Also log to manualtips for tipstats inclusion
-                    save_tip_log(
+                    # Record the payout and its manualtips entry (for tipstats) together
+                    recorded = await db_async.record_tip_payout(
                         user_id,
                         username,
                         prize_amount,
                         "weekly_multiplier",
                         month=datetime.now(dt.UTC).month,
-                        year=datetime.now(dt.UTC).year
+                        year=datetime.now(dt.UTC).year,
+                        weekly_payout={
+                            "week_start": week_key,
+                            "rank": rank,
+                            "user_id": user_id,
+                            "username": username,
+                            "prize_amount": prize_amount,
+                            "multiplier": multiplier,
+                            "game_name": game_name,
+                            "wagered": wagered,
+                            "payout": payout,
+                        },
                     )
+                    if recorded is None:
+                        logger.error(f"[MultiLeaderboard] ❌ Failed to record payout in database for {username}")
+                    else:
+                        logger.info(f"[MultiLeaderboard] 💾 Recorded payout in database for {username}")
                     
                     winners_processed += 1
                     logger.info(f"[MultiLeaderboard] 🏆 Successfully paid ${prize_amount} to {username} for Rank #{rank}")
                     
                 else:
                     logger.error(f"[MultiLeaderboard] ❌ FAILED to tip {username}: Response={tip_response}")
-                
-                # INCREASED: 30 second delay between tips to ensure processing
-                logger.info(f"[MultiLeaderboard] ⏳ Waiting 30 seconds before next tip...")
-                await asyncio.sleep(30)
+
             
             # Reload paid rows to determine completion and build summary from actual recorded winners.
-            paid_rows_by_rank = {}
-            conn = get_db_connection()
-            try:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT rank, username, multiplier, game_name, prize_amount, wagered, payout
-                        FROM weekly_multiplier_payouts
-                        WHERE week_start = %s AND rank > 0
-                        ORDER BY rank ASC;
-                        """,
-                        (week_key,)
-                    )
-                    for rank, username, multiplier, game_name, prize_amount, wagered, payout in cur.fetchall():
-                        paid_rows_by_rank[int(rank)] = {
-                            "rank": int(rank),
-                            "username": username,
-                            "multiplier": float(multiplier),
-                            "game_name": game_name,
-                            "wagered": float(wagered or 0),
-                            "payout": float(payout or 0),
-                            "prize": float(prize_amount),
-                        }
-            except Exception as e:
-                logger.error(f"[MultiLeaderboard] Error reloading paid rows: {e}")
-            finally:
-                release_db_connection(conn)
+            paid_rows_by_rank = await db_async.get_weekly_multiplier_paid_rows(week_key)
 
             payout_complete = len(paid_rows_by_rank) >= expected_winner_count
 
@@ -774,19 +678,8 @@ class MultiLeaderboard(commands.Cog):
                 logger.warning(f"[MultiLeaderboard] ⚠️ No winners processed, skipping summary post to logs channel")
                         
             # Clean up the processing lock record
-            conn = get_db_connection()
-            try:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "DELETE FROM weekly_multiplier_payouts WHERE week_start = %s AND rank = 0 AND username = 'PROCESSING_LOCK'",
-                        (week_key,)
-                    )
-                    conn.commit()
-                    logger.info(f"[MultiLeaderboard] 🧹 Cleaned up processing lock for week {week_key}")
-            except Exception as cleanup_error:
-                logger.warning(f"[MultiLeaderboard] Failed to clean up lock record: {cleanup_error}")
-            finally:
-                release_db_connection(conn)
+            if await db_async.release_weekly_multiplier_lock(week_key):
+                logger.info(f"[MultiLeaderboard] 🧹 Cleaned up processing lock for week {week_key}")
                         
             logger.info(f"[MultiLeaderboard] ✅✅✅ WEEKLY PAYOUT PROCESS COMPLETED. {winners_processed} winners processed. ✅✅✅")
             if not payout_complete:
@@ -6,9 +6,10 @@ from db import (
     release_db_connection,
     get_setting_value,
     save_setting_value,
-    edit_checkin_balance,
-    resolve_checkin_withdrawal_hold,
+    get_db_pool_stats,
 )
+import db_async
+from payout_dispatcher import payout_dispatcher
 import logging
 import os
 from datetime import datetime
@@ -133,7 +134,7 @@ class Admin(commands.Cog):
     async def _post_role_assignment_panel(self, channel: discord.TextChannel):
         embed = await self._build_role_assignment_embed()
         message = await channel.send(embed=embed, view=self.role_assignment_view)
-        save_setting_value(ROLE_ASSIGNMENT_MESSAGE_KEY, str(message.id))
+        await db_async.save_setting_value(ROLE_ASSIGNMENT_MESSAGE_KEY, str(message.id))
         logger.info(f"Posted role assignment panel in channel {channel.id} as message {message.id}")
 
     async def _channel_has_any_messages(self, channel: discord.TextChannel) -> bool:
@@ -154,7 +155,7 @@ class Admin(commands.Cog):
             logger.error(f"Configured role assignment channel {ROLE_ASSIGNMENT_CHANNEL_ID} is not a text channel")
             return
 
-        saved_message_id = get_setting_value(ROLE_ASSIGNMENT_MESSAGE_KEY, default=None)
+        saved_message_id = await db_async.get_setting_value(ROLE_ASSIGNMENT_MESSAGE_KEY, default=None)
         if saved_message_id:
             try:
                 tracked_message = await channel.fetch_message(int(saved_message_id))
@@ -289,7 +290,7 @@ class Admin(commands.Cog):
         if milestones_cog and hasattr(milestones_cog, "purge_user_from_tip_queue"):
             try:
                 purged_count = int(
-                    milestones_cog.purge_user_from_tip_queue(
+                    await milestones_cog.purge_user_from_tip_queue(
                         roobet_username=normalized_username,
                         roobet_uid=normalized_uid,
                     )
@@ -383,14 +384,31 @@ class Admin(commands.Cog):
     @app_commands.command(name="status", description="Check bot status (admin only)")
     @app_commands.default_permissions(administrator=True)
     async def status(self, interaction: discord.Interaction):
-        db_status = "Connected"
-        try:
+        def _check_connection():
             conn = get_db_connection()
             release_db_connection(conn)
+
+        db_status = "Connected"
+        try:
+            await db_async.run_db(_check_connection)
         except Exception:
             db_status = "Disconnected"
+        pool = get_db_pool_stats()
+        payouts = payout_dispatcher.stats()
+        unresolved_tips = await db_async.get_unresolved_tip_intents()
         await interaction.response.send_message(
-            f"Bot Status:\n- Database: {db_status}", ephemeral=True
+            f"Bot Status:\n- Database: {db_status}\n"
+            f"- DB Pool: {pool['in_use']}/{pool['max_connections']} in use, {pool['idle']} idle, "
+            f"{pool['waiters']} waiting\n"
+            f"- Checkout wait: avg {pool['wait_seconds_avg'] * 1000:.1f}ms, max {pool['wait_seconds_max'] * 1000:.1f}ms "
+            f"({pool['waited_checkouts']}/{pool['checkouts']} waited, {pool['timeouts']} timed out)\n"
+            f"- Reconnects: {pool['recycled']} recycled, {pool['failed_pings']} failed pings\n"
+            f"- Hot statements: {'prepared' if pool['prepared_statements_enabled'] else 'unprepared'}, "
+            f"{pool['hot_executions']} runs, avg {pool['hot_statement_ms_avg']:.2f}ms\n"
+            f"- Payouts: {payouts['tips_per_minute']} tips/min, {payouts['pending']} pending, "
+            f"{payouts['sent']} sent, {payouts['failed']} failed, {payouts['rate_limited']} rate limited, "
+            f"{len(unresolved_tips)} unresolved intents",
+            ephemeral=True
         )
 
     @app_commands.command(name="ensurerolepanel", description="Ensure the role assignment panel exists (admin only)")
@@ -427,7 +445,7 @@ class Admin(commands.Cog):
             return
 
         delta = amount if action.value == "add" else -amount
-        result = edit_checkin_balance(user.id, delta)
+        result = await db_async.edit_checkin_balance(user.id, delta)
         if result is None:
             await interaction.followup.send("❌ Failed to edit check-in balance.", ephemeral=True)
             return
@@ -484,7 +502,7 @@ class Admin(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         note_value = note.strip() if isinstance(note, str) else None
-        result = resolve_checkin_withdrawal_hold(user.id, action.value, note=note_value)
+        result = await db_async.resolve_checkin_withdrawal_hold(user.id, action.value, note=note_value)
         if result is None:
             await interaction.followup.send("❌ Failed to resolve check-in hold.", ephemeral=True)
             return
@@ -516,6 +534,49 @@ class Admin(commands.Cog):
             f"action={action.value} amount={resolved_amount:.2f}"
         )
 
+    @app_commands.command(name="vaulttotals", description="Verify or rebuild per-user vault totals from the ledgers (admin only)")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(action="verify compares totals against the ledgers; rebuild recomputes them")
+    @app_commands.choices(
+        action=[
+            app_commands.Choice(name="verify", value="verify"),
+            app_commands.Choice(name="rebuild", value="rebuild"),
+        ]
+    )
+    async def vault_totals_cmd(self, interaction: discord.Interaction, action: app_commands.Choice[str]):
+        await interaction.response.defer(ephemeral=True)
+
+        if action.value == "rebuild":
+            rebuilt = await db_async.rebuild_user_vault_totals()
+            if rebuilt is None:
+                await interaction.followup.send("❌ Failed to rebuild vault totals.", ephemeral=True)
+                return
+            await interaction.followup.send(f"✅ Rebuilt vault totals for **{rebuilt}** users.", ephemeral=True)
+            logger.info(f"[check_in] Admin {interaction.user} rebuilt user_vault_totals ({rebuilt} users)")
+            return
+
+        mismatches = await db_async.verify_user_vault_totals()
+        if mismatches is None:
+            await interaction.followup.send("❌ Failed to verify vault totals.", ephemeral=True)
+            return
+        if not mismatches:
+            await interaction.followup.send("✅ Vault totals match the ledgers.", ephemeral=True)
+            return
+
+        user_count = len({mismatch["discord_user_id"] for mismatch in mismatches})
+        embed = discord.Embed(
+            title="⚠️ Vault Totals Drift",
+            description=f"**{user_count}** users differ from the ledgers. Run `/vaulttotals rebuild` to fix.",
+            color=discord.Color.orange(),
+        )
+        for mismatch in mismatches[:10]:
+            embed.add_field(
+                name=f"{mismatch['discord_user_id']} · {mismatch['column']}",
+                value=f"stored {mismatch['stored']:,.2f}, ledger {mismatch['expected']:,.2f}",
+                inline=False,
+            )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
 
     @app_commands.command(name="backfillmonthlylogs", description="Post historical monthly winner log embeds (admin only)")
     @app_commands.describe(
@@ -595,7 +656,7 @@ class Admin(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         completion_key = "historical_monthly_logs_seeded_2025_01_to_2026_03"
-        already_seeded = get_setting_value(completion_key, default="false")
+        already_seeded = await db_async.get_setting_value(completion_key, default="false")
         if str(already_seeded).lower() == "true":
             await interaction.followup.send(
                 "ℹ️ Historical monthly logs seed already completed once. No action taken.",
@@ -633,7 +694,7 @@ class Admin(commands.Cog):
             await asyncio.sleep(1)
 
         if not failed:
-            save_setting_value(completion_key, "true")
+            await db_async.save_setting_value(completion_key, "true")
 
         summary = (
             f"✅ Historical monthly logs seed completed.\n"
@@ -653,7 +714,7 @@ class Admin(commands.Cog):
     async def populatejson(self, interaction: discord.Interaction, start_year: int = 2025, start_month: int = 1):
         await interaction.response.defer(ephemeral=True)
 
-        from utils import fetch_weighted_wager, get_month_range
+        from utils import fetch_weighted_wager_async, get_month_range
         import json, io
 
         PRIZES = [500, 300, 225, 175, 125, 75, 40, 30, 25, 5]
@@ -681,7 +742,7 @@ class Admin(commands.Cog):
             key = f"{year}-{month:02d}"
             try:
                 start_date, end_date = get_month_range(year, month)
-                data = await asyncio.to_thread(fetch_weighted_wager, start_date, end_date)
+                data = await fetch_weighted_wager_async(start_date, end_date)
 
                 sorted_data = sorted(
                     [e for e in data if isinstance(e.get("weightedWagered"), (int, float)) and e.get("weightedWagered", 0) > 0],
@@ -1,18 +1,248 @@
 import discord
 from discord.ext import commands, tasks
-from utils import fetch_total_wager, fetch_weighted_wager, get_current_month_range, fetch_user_game_stats, get_month_range, generate_backfill_months, get_current_week_range
-from db import get_all_active_slot_challenges, get_all_completed_slot_challenges, get_db_connection, release_db_connection, save_monthly_totals, backfill_monthly_totals_for_date
-import os
+from utils import fetch_total_wager_async, fetch_weighted_wager_async, get_current_month_range, get_month_range, generate_backfill_months, get_current_week_range, is_window_closed
+from publisher import create_wagerdata_publisher, encode_json_files, variant_paths, dumps_json
+from db import (
+    get_db_connection, release_db_connection, get_setting_value, save_setting_value,
+    get_tip_logs_since, get_tip_logs_for_period, get_completed_slot_challenges_since, get_completed_slot_challenges_for_period,
+)
+import db_async
+from snapshot_events import snapshot_bus
 import logging
 from datetime import datetime
 import datetime as dt
 import asyncio
 import json
-import base64
-import requests
+import hashlib
+import copy
 
 logger = logging.getLogger(__name__)
 
+LIFETIME_START_YEAR = 2025
+LIFETIME_START_MONTH = 1
+
+# Fields that change every cycle without the data changing; ignored when deciding whether to re-upload
+VOLATILE_JSON_FIELDS = {"last_updated", "last_updated_timestamp"}
+MANIFEST_FILENAME = "manifest.json"
+# Settings keys for publish state that has to survive restarts
+MANIFEST_SETTING_KEY = "wagerdata_manifest"
+TIP_LOG_EXPORT_SETTING_KEY = "export_state:tipLogs"
+CHALLENGE_HISTORY_EXPORT_SETTING_KEY = "export_state:challengeHistory"
+
+# Re-read this many export_ids below the watermark each cycle so rows from transactions that
+# committed out of order are not missed (duplicates are dropped by export_id)
+EXPORT_WATERMARK_OVERLAP = 50
+UNKNOWN_PERIOD_KEY = "unknown"
+
+
+def _strip_volatile_fields(value):
+    if isinstance(value, dict):
+        return {key: _strip_volatile_fields(item) for key, item in value.items() if key not in VOLATILE_JSON_FIELDS}
+    if isinstance(value, list):
+        return [_strip_volatile_fields(item) for item in value]
+    return value
+
+
+def _content_digest(data):
+    """SHA-256 of a payload's meaningful content (volatile timestamps removed, keys sorted)."""
+    canonical = json.dumps(_strip_volatile_fields(data), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _merge_total_wager_rows(*row_sets):
+    """Sum total wager rows per uid across several periods (later sets win for username)."""
+    merged = {}
+    for rows in row_sets:
+        for entry in rows:
+            uid = entry.get("uid")
+            if uid is None:
+                continue
+            current = merged.get(str(uid))
+            if current is None:
+                merged[str(uid)] = {
+                    "uid": uid,
+                    "username": entry.get("username", "Unknown"),
+                    "wagered": entry.get("wagered", 0) or 0,
+                    "sessions": entry.get("sessions", 0) or 0,
+                    "payout": entry.get("payout", 0) or 0,
+                    "net": entry.get("net", 0) or 0,
+                }
+                continue
+            current["username"] = entry.get("username") or current["username"]
+            for field in ("wagered", "sessions", "payout", "net"):
+                current[field] += entry.get(field, 0) or 0
+    return list(merged.values())
+
+
+def _merge_weighted_wager_rows(*row_sets):
+    """Sum weighted wager rows per uid across several periods, keeping the biggest multiplier hit."""
+    merged = {}
+    for rows in row_sets:
+        for entry in rows:
+            uid = entry.get("uid")
+            if uid is None:
+                continue
+            highest = entry.get("highestMultiplier") or {}
+            current = merged.get(str(uid))
+            if current is None:
+                merged[str(uid)] = {
+                    "uid": uid,
+                    "username": entry.get("username", "Unknown"),
+                    "weightedWagered": entry.get("weightedWagered", 0) or 0,
+                    "sessions": entry.get("sessions", 0) or 0,
+                    "highestMultiplier": highest,
+                }
+                continue
+            current["username"] = entry.get("username") or current["username"]
+            current["weightedWagered"] += entry.get("weightedWagered", 0) or 0
+            current["sessions"] += entry.get("sessions", 0) or 0
+            if (highest.get("multiplier") or 0) > (current["highestMultiplier"].get("multiplier") or 0):
+                current["highestMultiplier"] = highest
+    return list(merged.values())
+
+
+class AppendOnlyLogExport:
+    """
+    Month-partitioned, append-only view of a log table keyed by export_id.
+
+    The watermark and a summary of every month shard are stored in the settings table under
+    state_key once the shards are published, so after a restart only rows above the stored
+    watermark are read. A month's records are loaded with one query the first time it gets new
+    rows or is needed for the head file. refresh() returns the months whose shards need publishing.
+    """
+
+    def __init__(self, state_key, fetch_since, fetch_period, period_key_for, format_record, summarize=None):
+        self.state_key = state_key
+        self.fetch_since = fetch_since
+        self.fetch_period = fetch_period
+        self.period_key_for = period_key_for
+        self.format_record = format_record
+        self.summarize = summarize or (lambda records: {"count": len(records)})
+        self.watermark = None
+        self.published_watermark = 0
+        self.months = {}  # period_key -> {export_id: record}, for months loaded since startup
+        self.shards = {}  # period_key -> summary, for every month
+        self.unpublished = set()
+
+    def _load_state(self):
+        raw = get_setting_value(self.state_key)
+        state = json.loads(raw) if raw else {}
+        self.watermark = self.published_watermark = state.get("watermark", 0)
+        self.shards = state.get("shards", {})
+
+    def _load_month(self, period_key):
+        rows = self.fetch_period(period_key)
+        if rows is None:
+            raise RuntimeError(f"log query for {period_key} failed")
+        self.months[period_key] = {row["export_id"]: self.format_record(row) for row in rows}
+        return self.months[period_key]
+
+    def refresh(self):
+        if self.watermark is None:
+            self._load_state()
+        since = max(self.watermark - EXPORT_WATERMARK_OVERLAP, 0)
+        rows = self.fetch_since(since)
+        if rows is None:
+            raise RuntimeError(f"log query since export_id {since} failed")
+
+        changed = set()
+        for row in rows:
+            period_key = self.period_key_for(row)
+            records = self.months.get(period_key)
+            if records is None:
+                # Rows up to the stored watermark were published before the restart. A published
+                # month that gets new rows is reloaded whole, which also picks up any stragglers
+                if row["export_id"] > self.published_watermark:
+                    if period_key in self.shards:
+                        records = self._load_month(period_key)
+                    else:
+                        records = self.months[period_key] = {}
+                    records.setdefault(row["export_id"], self.format_record(row))
+                    changed.add(period_key)
+            elif row["export_id"] not in records:
+                records[row["export_id"]] = self.format_record(row)
+                changed.add(period_key)
+            self.watermark = max(self.watermark, row["export_id"])
+
+        for period_key in changed:
+            self.shards[period_key] = self.summarize(list(self.months[period_key].values()))
+        self.unpublished |= changed
+        return set(self.unpublished)
+
+    def records(self, period_key):
+        """Records for one month, newest first"""
+        month = self.months.get(period_key)
+        if month is None:
+            month = self._load_month(period_key) if period_key in self.shards else {}
+        return [month[export_id] for export_id in sorted(month, reverse=True)]
+
+    def mark_published(self):
+        """Store the watermark and shard summaries once the shards from refresh() are published."""
+        if self.watermark is None:
+            return
+        save_setting_value(self.state_key, json.dumps({"watermark": self.watermark, "shards": self.shards}))
+        self.published_watermark = self.watermark
+        self.unpublished.clear()
+
+
+def _tip_period_key(row):
+    if isinstance(row.get("year"), int) and isinstance(row.get("month"), int):
+        return f"{row['year']}-{row['month']:02d}"
+    if row.get("tipped_at"):
+        return row["tipped_at"].strftime("%Y-%m")
+    return UNKNOWN_PERIOD_KEY
+
+
+def _challenge_period_key(row):
+    if row.get("challenge_start"):
+        return row["challenge_start"].strftime("%Y-%m")
+    return UNKNOWN_PERIOD_KEY
+
+
+def _format_tip_log_record(row):
+    year, month = row.get("year"), row.get("month")
+    return {
+        "user_id": row.get("user_id"),
+        "username": row.get("username"),
+        "amount": float(row["amount"]) if row.get("amount") is not None else 0.0,
+        "tip_type": row.get("tip_type"),
+        "month": month,
+        "year": year,
+        "period_key": f"{year}-{month:02d}" if isinstance(year, int) and isinstance(month, int) else None,
+        "tipped_at": row["tipped_at"].isoformat() if row.get("tipped_at") else None
+    }
+
+
+def _summarize_challenge_shard(records):
+    return {"count": len(records), "prize_total": sum(record["prize_amount"] for record in records)}
+
+
+def _format_challenge_history_record(challenge):
+    prize_amount = float(challenge.get("prize", 0)) if challenge.get("prize") is not None else 0.0
+    challenge_data = {
+        "challenge_id": challenge.get("challenge_id"),
+        "game_name": challenge.get("game"),
+        "game_identifier": challenge.get("game_identifier"),
+        "required_multiplier": float(challenge.get("required_multiplier", 0)) if challenge.get("required_multiplier") is not None else 0.0,
+        "achieved_multiplier": float(challenge.get("multiplier", 0)) if challenge.get("multiplier") is not None else 0.0,
+        "min_bet_requirement": float(challenge.get("min_bet", 0)) if challenge.get("min_bet") is not None else None,
+        "winner": {
+            "username": challenge.get("winner_username", "Unknown"),  # UNCENSORED for JSON data
+            "user_id": challenge.get("winner_uid"),
+            "bet_amount": float(challenge.get("bet", 0)) if challenge.get("bet") is not None else 0.0,
+            "payout": float(challenge.get("payout", 0)) if challenge.get("payout") is not None else 0.0,
+            "multiplier_achieved": float(challenge.get("multiplier", 0)) if challenge.get("multiplier") is not None else 0.0
+        },
+        "prize_amount": prize_amount,
+        "challenge_start": challenge.get("challenge_start").isoformat() if challenge.get("challenge_start") else None
+    }
+    if challenge.get("challenge_start") and hasattr(challenge["challenge_start"], "timestamp"):
+        challenge_data["challenge_start_timestamp"] = int(challenge["challenge_start"].timestamp())
+    if challenge.get("game_identifier"):
+        challenge_data["game_url"] = f"https://roobet.com/casino/game/{challenge['game_identifier']}"
+    return challenge_data
+
+
 class DataManager(commands.Cog):
     """Centralized data manager that fetches all API data and uploads to GitHub"""
     
@@ -21,6 +251,25 @@ class DataManager(commands.Cog):
         self.cached_data = {}
         self.last_fetch_time = None
         
+        # Lifetime wager rollup state: closed months live in Postgres, summed once and reused
+        self._rolled_up_months = None
+        self._lifetime_rollup_rows = None
+        
+        # All JSON files are published to the wagerData repo as one commit per cycle
+        self.publisher = create_wagerdata_publisher()
+        # Per-file content digest / change time, published as manifest.json; loaded from settings on first publish
+        self.manifest_files = None
+        
+        # tipLogs / challengeHistory are exported as immutable monthly shards plus a small head file
+        self.tip_log_export = AppendOnlyLogExport(
+            TIP_LOG_EXPORT_SETTING_KEY, get_tip_logs_since, get_tip_logs_for_period,
+            _tip_period_key, _format_tip_log_record,
+        )
+        self.challenge_history_export = AppendOnlyLogExport(
+            CHALLENGE_HISTORY_EXPORT_SETTING_KEY, get_completed_slot_challenges_since, get_completed_slot_challenges_for_period,
+            _challenge_period_key, _format_challenge_history_record, summarize=_summarize_challenge_shard,
+        )
+        
         # Track current month for monthly totals
         now = datetime.now(dt.UTC)
         self.current_month = now.month
@@ -51,23 +300,16 @@ class DataManager(commands.Cog):
             # Generate list of months to backfill (from Jan 2025 to current month)
             months_to_backfill = generate_backfill_months(2025, 1)
             
+            # Months that already have totals are skipped, which avoids unnecessary API calls
+            existing_periods = await db_async.get_monthly_total_periods()
+            if existing_periods is None:
+                logger.error("[DataManager] Could not load existing monthly totals, skipping backfill")
+                return
+            
             backfilled_count = 0
             for year, month in months_to_backfill:
                 try:
-                    # First, check if monthly totals already exist in database
-                    # This avoids unnecessary API calls for existing data
-                    conn = get_db_connection()
-                    try:
-                        with conn.cursor() as cur:
-                            cur.execute(
-                                "SELECT COUNT(*) FROM monthly_totals WHERE year = %s AND month = %s",
-                                (year, month)
-                            )
-                            exists = cur.fetchone()[0] > 0
-                    finally:
-                        release_db_connection(conn)
-                    
-                    if exists:
+                    if (year, month) in existing_periods:
                         logger.info(f"[DataManager] Monthly totals for {year}-{month:02d} already exist, skipping backfill")
                         continue
                     
@@ -77,8 +319,8 @@ class DataManager(commands.Cog):
                     start_date, end_date = get_month_range(year, month)
                     
                     # Fetch data for this month
-                    total_wager_data = await asyncio.to_thread(fetch_total_wager, start_date, end_date)
-                    weighted_wager_data = await asyncio.to_thread(fetch_weighted_wager, start_date, end_date)
+                    total_wager_data = await fetch_total_wager_async(start_date, end_date)
+                    weighted_wager_data = await fetch_weighted_wager_async(start_date, end_date)
                     
                     # Calculate totals
                     total_wager = sum(
@@ -94,7 +336,7 @@ class DataManager(commands.Cog):
                     )
                     
                     # Save the backfill data
-                    if backfill_monthly_totals_for_date(year, month, total_wager, weighted_wager):
+                    if await db_async.backfill_monthly_totals_for_date(year, month, total_wager, weighted_wager):
                         backfilled_count += 1
                     
                     # Small delay to avoid overwhelming the API
@@ -134,13 +376,13 @@ class DataManager(commands.Cog):
             
             # Fetch all API data at once
             logger.info("[DataManager] Fetching total wager data")
-            total_wager_data = await asyncio.to_thread(fetch_total_wager, start_date, end_date)
+            total_wager_data = await fetch_total_wager_async(start_date, end_date, force_refresh=True)
             
             logger.info("[DataManager] Fetching weighted wager data")
-            weighted_wager_data = await asyncio.to_thread(fetch_weighted_wager, start_date, end_date)
+            weighted_wager_data = await fetch_weighted_wager_async(start_date, end_date, force_refresh=True)
             
             logger.info("[DataManager] Fetching active slot challenges")
-            active_challenges = get_all_active_slot_challenges()
+            active_challenges = await db_async.get_all_active_slot_challenges()
             
             # Cache all data
             self.cached_data = {
@@ -160,6 +402,10 @@ class DataManager(commands.Cog):
             
             logger.info(f"[DataManager] Data fetched - Total: {len(total_wager_data)}, Weighted: {len(weighted_wager_data)}, Challenges: {len(active_challenges)}")
             
+            # Wake subscribed cogs now rather than after the JSON upload
+            snapshot = snapshot_bus.publish(self.cached_data)
+            self.cached_data['snapshot_version'] = snapshot.version
+            
             # Generate and upload all JSON files
             await self.generate_and_upload_json_files()
             
@@ -192,7 +438,7 @@ class DataManager(commands.Cog):
             )
             
             # Save the totals for the previous month
-            save_monthly_totals(self.current_year, self.current_month, total_wager, weighted_wager)
+            await db_async.save_monthly_totals(self.current_year, self.current_month, total_wager, weighted_wager)
             logger.info(f"[DataManager] Saved monthly totals for {self.current_year}-{self.current_month:02d}")
             
         except Exception as e:
@@ -203,33 +449,25 @@ class DataManager(commands.Cog):
         try:
             logger.info("[DataManager] Generating JSON files...")
             
-            # Generate main leaderboard JSON
+            # Main leaderboard and slot challenges are built from cached data
             main_leaderboard_json = self.generate_main_leaderboard_json()
-            logger.info("[DataManager] Main leaderboard JSON generated")
-            
-            # Generate multiplier leaderboard JSON (uses blocking HTTP call, run in thread)
-            multi_leaderboard_json = await asyncio.to_thread(self.generate_multiplier_leaderboard_json)
-            logger.info("[DataManager] Multiplier leaderboard JSON generated")
-            
-            # Generate slot challenges JSON
             challenges_json = self.generate_challenges_json()
-            logger.info("[DataManager] Slot challenges JSON generated")
             
-            # Generate all-time tips JSON
-            all_time_tips_json = self.generate_all_time_tips_json()
-            logger.info("[DataManager] All-time tips JSON generated")
-
-            # Generate raw tip logs JSON (one entry per tip)
-            tip_logs_json = self.generate_tip_logs_json()
-            logger.info("[DataManager] Tip logs JSON generated")
-            
-            # Generate challenge history JSON
-            challenge_history_json = self.generate_challenge_history_json()
-            logger.info("[DataManager] Challenge history JSON generated")
-            
-            # Generate all wager data JSON (since Jan 1, 2025) (uses blocking HTTP calls, run in thread)
-            all_wager_data_json = await asyncio.to_thread(self.generate_all_wager_data_json)
-            logger.info("[DataManager] All wager data JSON generated")
+            # The rest are independent: API-backed ones run on the event loop, DB-backed ones on the DB executor
+            (
+                multi_leaderboard_json,
+                all_time_tips_json,
+                tip_log_files,
+                challenge_history_files,
+                all_wager_data_json,
+            ) = await asyncio.gather(
+                self.generate_multiplier_leaderboard_json(),
+                db_async.run_db(self.generate_all_time_tips_json),
+                db_async.run_db(self.generate_tip_log_files),
+                db_async.run_db(self.generate_challenge_history_files),
+                self.generate_all_wager_data_json(),
+            )
+            logger.info("[DataManager] All JSON payloads generated")
             
             # Upload all files to GitHub
             files_to_upload = [
@@ -237,17 +475,17 @@ class DataManager(commands.Cog):
                 ("LatestMultiLBResults.json", multi_leaderboard_json),
                 ("ActiveSlotChallenges.json", challenges_json),
                 ("allTimeTips.json", all_time_tips_json),
-                ("tipLogs.json", tip_logs_json),
-                ("challengeHistory.json", challenge_history_json),
                 ("allWagerData.json", all_wager_data_json),
             ]
+            files_to_upload.extend(tip_log_files)
+            files_to_upload.extend(challenge_history_files)
             
             logger.info(f"[DataManager] Uploading {len(files_to_upload)} files to GitHub...")
             
-            for filename, data in files_to_upload:
-                await self.upload_to_github(filename, data)
-                
-            logger.info("[DataManager] All JSON files uploaded successfully")
+            if await self.publish_json_files(files_to_upload):
+                # Shards are live, so a restart can resume both exports from here
+                await db_async.run_db(self.tip_log_export.mark_published)
+                await db_async.run_db(self.challenge_history_export.mark_published)
             
         except Exception as e:
             logger.error(f"[DataManager] Error generating/uploading JSON: {e}")
@@ -286,14 +524,14 @@ class DataManager(commands.Cog):
         
         return leaderboard_results
     
-    def generate_multiplier_leaderboard_json(self):
+    async def generate_multiplier_leaderboard_json(self):
         """Generate weekly multiplier leaderboard JSON"""
         # Get current week range for multiplier leaderboard
         week_start, week_end = get_current_week_range()
         
         try:
             # Fetch weekly weighted wager data specifically for multiplier leaderboard
-            weekly_weighted_data = fetch_weighted_wager(week_start, week_end)
+            weekly_weighted_data = await fetch_weighted_wager_async(week_start, week_end)
         except Exception as e:
             logger.error(f"[DataManager] Error fetching weekly multiplier data: {e}")
             weekly_weighted_data = []
@@ -390,62 +628,51 @@ class DataManager(commands.Cog):
         return challenges_json
     
     def generate_all_time_tips_json(self):
-        """Generate all-time tips JSON aggregating manual, milestone, and slot challenge tips"""
+        """Generate all-time tips JSON aggregating manual, milestone, and slot challenge tips (from the tip rollups)"""
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
-                # Get aggregated tip data by user and tip type
+                # Get aggregated tip data by user and tip type (latest username per user)
                 cur.execute("""
-                    SELECT 
+                    SELECT
                         user_id,
-                        username,
+                        (ARRAY_AGG(username ORDER BY year DESC, month DESC))[1] as username,
                         tip_type,
                         SUM(amount) as total_amount,
-                        COUNT(*) as tip_count,
-                        MIN(tipped_at) as first_tip,
-                        MAX(tipped_at) as latest_tip
-                    FROM manualtips 
-                    GROUP BY user_id, username, tip_type
+                        SUM(tip_count) as tip_count,
+                        MIN(first_tip) as first_tip,
+                        MAX(latest_tip) as latest_tip
+                    FROM user_monthly_tips
+                    GROUP BY user_id, tip_type
                     ORDER BY SUM(amount) DESC;
                 """)
                 tip_data = cur.fetchall()
                 
                 # Get tip data by month for searchability
                 cur.execute("""
-                    SELECT 
-                        user_id,
-                        username,
-                        tip_type,
-                        month,
-                        year,
-                        SUM(amount) as monthly_amount,
-                        COUNT(*) as monthly_count
-                    FROM manualtips 
-                    GROUP BY user_id, username, tip_type, month, year
-                    ORDER BY year DESC, month DESC, SUM(amount) DESC;
+                    SELECT user_id, username, tip_type, month, year, amount, tip_count
+                    FROM user_monthly_tips
+                    ORDER BY year DESC, month DESC, amount DESC;
                 """)
                 monthly_tip_data = cur.fetchall()
                 
                 # Get overall totals by tip type
                 cur.execute("""
-                    SELECT 
-                        tip_type,
-                        SUM(amount) as total_amount,
-                        COUNT(*) as tip_count
-                    FROM manualtips
+                    SELECT tip_type, SUM(amount) as total_amount, SUM(tip_count) as tip_count
+                    FROM tip_daily_totals
                     GROUP BY tip_type;
                 """)
                 tip_type_totals = cur.fetchall()
                 
                 # Get top recipients overall
                 cur.execute("""
-                    SELECT 
+                    SELECT
                         user_id,
-                        username,
+                        (ARRAY_AGG(username ORDER BY year DESC, month DESC))[1] as username,
                         SUM(amount) as total_received,
-                        COUNT(*) as total_tips
-                    FROM manualtips
-                    GROUP BY user_id, username
+                        SUM(tip_count) as total_tips
+                    FROM user_monthly_tips
+                    GROUP BY user_id
                     ORDER BY SUM(amount) DESC
                     LIMIT 20;
                 """)
@@ -533,151 +760,72 @@ class DataManager(commands.Cog):
         
         return tips_json
 
-    def generate_tip_logs_json(self):
-        """Generate raw tip log JSON with one record per tip event from manualtips."""
-        conn = get_db_connection()
-        tip_rows = []
-        used_fallback_query = False
+    def _generate_log_export_files(self, export, name, data_type, records_key):
+        """
+        Refresh an append-only log export and build its files: a shard per changed month
+        (<name>/YYYY-MM.json) and a head file (<name>.json) holding the current month plus the shard index.
+        """
+        changed_periods = export.refresh()
+        now = datetime.now(dt.UTC)
+        current_period = now.strftime("%Y-%m")
 
-        try:
-            with conn.cursor() as cur:
-                try:
-                    cur.execute(
-                        """
-                        SELECT
-                            user_id,
-                            username,
-                            amount,
-                            tip_type,
-                            month,
-                            year,
-                            tipped_at
-                        FROM manualtips
-                        ORDER BY tipped_at DESC NULLS LAST;
-                        """
-                    )
-                    tip_rows = cur.fetchall()
-                except Exception:
-                    used_fallback_query = True
-                    cur.execute(
-                        """
-                        SELECT
-                            user_id,
-                            username,
-                            amount,
-                            tip_type,
-                            month,
-                            year
-                        FROM manualtips
-                        ORDER BY year DESC NULLS LAST, month DESC NULLS LAST;
-                        """
-                    )
-                    base_rows = cur.fetchall()
-                    tip_rows = [(*row, None) for row in base_rows]
-        except Exception as e:
-            logger.error(f"Error querying raw tip logs: {e}")
-            return {"error": "Failed to generate tip logs"}
-        finally:
-            release_db_connection(conn)
+        files = []
+        for period_key in sorted(changed_periods):
+            records = export.records(period_key)
+            files.append((f"{name}/{period_key}.json", {
+                "data_type": data_type,
+                "period_key": period_key,
+                "count": len(records),
+                records_key: records
+            }))
 
-        now = datetime.now(dt.UTC)
-        tip_logs_json = {
-            "data_type": "tip_logs",
+        shards = [
+            {"period_key": period_key, "path": f"{name}/{period_key}.json", "count": export.shards[period_key]["count"]}
+            for period_key in sorted(export.shards, reverse=True)
+        ]
+        head = {
+            "data_type": data_type,
             "last_updated": now.isoformat(),
             "last_updated_timestamp": int(now.timestamp()),
-            "total_tips": len(tip_rows),
-            "source_table": "manualtips",
-            "used_fallback_query": used_fallback_query,
-            "tips": []
+            "current_period": current_period,
+            "export_watermark": export.watermark,
+            "shards": shards,
+            records_key: export.records(current_period)
         }
+        files.append((f"{name}.json", head))
+        return files
 
-        for row in tip_rows:
-            user_id, username, amount, tip_type, month, year, tipped_at = row
-            tip_logs_json["tips"].append({
-                "user_id": user_id,
-                "username": username,
-                "amount": float(amount) if amount is not None else 0.0,
-                "tip_type": tip_type,
-                "month": month,
-                "year": year,
-                "period_key": f"{year}-{month:02d}" if isinstance(year, int) and isinstance(month, int) else None,
-                "tipped_at": tipped_at.isoformat() if tipped_at else None
-            })
+    def generate_tip_log_files(self):
+        """Generate tipLogs.json (current month + shard index) and a shard per month with new tips."""
+        try:
+            files = self._generate_log_export_files(self.tip_log_export, "tipLogs", "tip_logs", "tips")
+        except Exception as e:
+            logger.error(f"Error generating tip log export: {e}")
+            return [("tipLogs.json", {"error": "Failed to generate tip logs"})]
 
-        return tip_logs_json
-    
-    def generate_challenge_history_json(self):
-        """Generate challenge history JSON from completed slot challenges"""
+        head = files[-1][1]
+        head["total_tips"] = sum(shard["count"] for shard in head["shards"])
+        head["source_table"] = "manualtips"
+        return files
+
+    def generate_challenge_history_files(self):
+        """Generate challengeHistory.json (current month + shard index) and a shard per month with new completions."""
         try:
-            completed_challenges = get_all_completed_slot_challenges()
+            files = self._generate_log_export_files(
+                self.challenge_history_export, "challengeHistory", "challenge_history", "challenges"
+            )
         except Exception as e:
-            logger.error(f"Error fetching completed challenges: {e}")
-            return {"error": "Failed to fetch challenge history"}
-        
-        # Build the JSON response
-        history_json = {
-            "data_type": "challenge_history",
-            "last_updated": datetime.now(dt.UTC).isoformat(),
-            "last_updated_timestamp": int(datetime.now(dt.UTC).timestamp()),
-            "total_completed_challenges": len(completed_challenges),
-            "total_prizes_paid": 0,
-            "challenges": []
-        }
-        
-        # Process each completed challenge
-        for challenge in completed_challenges:
-            # Use real username for JSON data (no censoring)
-            winner_username = challenge.get("winner_username", "Unknown")
-            
-            # Add to total prizes paid
-            prize_amount = float(challenge.get("prize", 0)) if challenge.get("prize") is not None else 0.0
-            history_json["total_prizes_paid"] += prize_amount
-            
-            # Build challenge data
-            challenge_data = {
-                "challenge_id": challenge.get("challenge_id"),
-                "game_name": challenge.get("game"),
-                "game_identifier": challenge.get("game_identifier"),
-                "required_multiplier": float(challenge.get("required_multiplier", 0)) if challenge.get("required_multiplier") is not None else 0.0,
-                "achieved_multiplier": float(challenge.get("multiplier", 0)) if challenge.get("multiplier") is not None else 0.0,
-                "min_bet_requirement": float(challenge.get("min_bet", 0)) if challenge.get("min_bet") is not None else None,
-                "winner": {
-                    "username": winner_username,  # UNCENSORED for JSON data
-                    "user_id": challenge.get("winner_uid"),
-                    "bet_amount": float(challenge.get("bet", 0)) if challenge.get("bet") is not None else 0.0,
-                    "payout": float(challenge.get("payout", 0)) if challenge.get("payout") is not None else 0.0,
-                    "multiplier_achieved": float(challenge.get("multiplier", 0)) if challenge.get("multiplier") is not None else 0.0
-                },
-                "prize_amount": prize_amount,
-                "challenge_start": challenge.get("challenge_start").isoformat() if challenge.get("challenge_start") else None
-            }
-            
-            # Add start timestamp if we can parse the time
-            try:
-                if challenge.get("challenge_start"):
-                    if isinstance(challenge["challenge_start"], str):
-                        start_dt = datetime.fromisoformat(challenge["challenge_start"].replace('Z', '+00:00'))
-                        challenge_data["challenge_start_timestamp"] = int(start_dt.timestamp())
-                    elif hasattr(challenge["challenge_start"], 'timestamp'):
-                        challenge_data["challenge_start_timestamp"] = int(challenge["challenge_start"].timestamp())
-            except:
-                pass
-                
-            # Create game URL if identifier exists
-            if challenge.get("game_identifier"):
-                challenge_data["game_url"] = f"https://roobet.com/casino/game/{challenge['game_identifier']}"
-            
-            history_json["challenges"].append(challenge_data)
-        
-        # Sort challenges by start time (most recent first)
-        history_json["challenges"].sort(
-            key=lambda x: x.get("challenge_start_timestamp", 0), 
-            reverse=True
+            logger.error(f"Error generating challenge history export: {e}")
+            return [("challengeHistory.json", {"error": "Failed to fetch challenge history"})]
+
+        head = files[-1][1]
+        head["total_completed_challenges"] = sum(shard["count"] for shard in head["shards"])
+        head["total_prizes_paid"] = sum(
+            shard.get("prize_total", 0.0) for shard in self.challenge_history_export.shards.values()
         )
-        
-        return history_json
+        return files
     
-    def generate_all_wager_data_json(self):
+    async def generate_all_wager_data_json(self):
         """Generate comprehensive wager data JSON with both lifetime (since Jan 1, 2025) and current month data"""
         try:
             # Get current month range (already available from cached data)
@@ -690,13 +838,16 @@ class DataManager(commands.Cog):
             logger.info(f"[DataManager] Fetching lifetime wager data from {lifetime_start_date} to {lifetime_end_date}")
             logger.info(f"[DataManager] Fetching current month wager data from {current_month_start} to {current_month_end}")
             
-            # Fetch lifetime data (since Jan 1, 2025)
-            lifetime_total_wager = fetch_total_wager(lifetime_start_date, lifetime_end_date)
-            lifetime_weighted_wager = fetch_weighted_wager(lifetime_start_date, lifetime_end_date)
+            # Fetch current month data (normally already cached by this cycle's main fetch)
+            month_total_wager, month_weighted_wager = await asyncio.gather(
+                fetch_total_wager_async(current_month_start, current_month_end),
+                fetch_weighted_wager_async(current_month_start, current_month_end),
+            )
             
-            # Fetch current month data
-            month_total_wager = fetch_total_wager(current_month_start, current_month_end)
-            month_weighted_wager = fetch_weighted_wager(current_month_start, current_month_end)
+            # Lifetime data = rolled-up closed months from Postgres + live months from the API
+            lifetime_total_wager, lifetime_weighted_wager = await self._load_lifetime_wager_rows(
+                lifetime_start_date, lifetime_end_date
+            )
             
             # Build the comprehensive JSON response
             wager_json = {
@@ -853,55 +1004,118 @@ class DataManager(commands.Cog):
                 "last_updated": datetime.now(dt.UTC).isoformat()
             }
     
-    async def upload_to_github(self, filename, data):
-        """Upload a single file to GitHub asynchronously"""
-        GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-        REPO_OWNER = "FTSStreams"
-        REPO_NAME = "wagerData"
-        BRANCH = "main"
-        API_URL = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/contents/{filename}"
-        
-        headers = {
-            "Authorization": f"Bearer {GITHUB_TOKEN}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        
+    async def _load_lifetime_wager_rows(self, lifetime_start_date, lifetime_end_date):
+        """
+        Build lifetime per-user total/weighted rows incrementally.
+        Finished months are fetched once, stored per user and summed in Postgres; only months that
+        are still open are fetched each cycle. Falls back to one full-window fetch if the rollup fails.
+        """
         try:
-            # Convert to JSON and encode as base64
-            json_content = json.dumps(data, indent=2)
-            content = base64.b64encode(json_content.encode()).decode()
+            if self._rolled_up_months is None:
+                self._rolled_up_months = await db_async.get_rolled_up_wager_months()
             
-            # Use asyncio.to_thread to make the requests non-blocking
-            def make_get_request():
-                return requests.get(API_URL, headers=headers)
+            live_months = []
+            for year, month in generate_backfill_months(LIFETIME_START_YEAR, LIFETIME_START_MONTH):
+                if (year, month) in self._rolled_up_months:
+                    continue
+                start_date, end_date = get_month_range(year, month)
+                if not is_window_closed(end_date):
+                    live_months.append((start_date, end_date))
+                    continue
+                
+                logger.info(f"[DataManager] Rolling up per-user lifetime wagers for {year}-{month:02d}")
+                total_rows, weighted_rows = await asyncio.gather(
+                    fetch_total_wager_async(start_date, end_date),
+                    fetch_weighted_wager_async(start_date, end_date),
+                )
+                if not await db_async.save_user_monthly_wagers(year, month, total_rows, weighted_rows):
+                    raise RuntimeError(f"Failed to store per-user wagers for {year}-{month:02d}")
+                self._rolled_up_months.add((year, month))
+                self._lifetime_rollup_rows = None
             
-            def make_put_request(payload):
-                return requests.put(API_URL, headers=headers, json=payload)
+            if self._lifetime_rollup_rows is None:
+                self._lifetime_rollup_rows = await db_async.get_lifetime_user_wagers()
+            rolled_total_rows, rolled_weighted_rows = self._lifetime_rollup_rows
             
-            # Get the current file SHA if it exists (async)
-            resp = await asyncio.to_thread(make_get_request)
-            if resp.status_code == 200:
-                sha = resp.json()["sha"]
-            else:
-                sha = None
+            total_sets = [rolled_total_rows]
+            weighted_sets = [rolled_weighted_rows]
+            for start_date, end_date in live_months:
+                total_rows, weighted_rows = await asyncio.gather(
+                    fetch_total_wager_async(start_date, end_date),
+                    fetch_weighted_wager_async(start_date, end_date),
+                )
+                total_sets.append(total_rows)
+                weighted_sets.append(weighted_rows)
+            
+            return _merge_total_wager_rows(*total_sets), _merge_weighted_wager_rows(*weighted_sets)
+        except Exception as e:
+            logger.error(f"[DataManager] Incremental lifetime rollup failed, fetching full lifetime window: {e}")
+            self._rolled_up_months = None
+            self._lifetime_rollup_rows = None
+            return await asyncio.gather(
+                fetch_total_wager_async(lifetime_start_date, lifetime_end_date),
+                fetch_weighted_wager_async(lifetime_start_date, lifetime_end_date),
+            )
+    
+    async def publish_json_files(self, files_to_upload):
+        """
+        Publish generated JSON files to the wagerData repo as a single commit.
+        Files whose content digest is unchanged are skipped; manifest.json is always refreshed
+        so consumers can see when each file was last checked and last changed. The digests are kept
+        in settings so a restart doesn't republish everything. Returns True once the commit landed.
+        """
+        try:
+            if self.manifest_files is None:
+                raw_manifest = await db_async.get_setting_value(MANIFEST_SETTING_KEY)
+                self.manifest_files = json.loads(raw_manifest) if raw_manifest else {}
+            now = datetime.now(dt.UTC)
+            manifest_files = copy.deepcopy(self.manifest_files)
+            files = {}
             
-            data_payload = {
-                "message": f"Update {filename}",
-                "content": content,
-                "branch": BRANCH
+            for filename, data in files_to_upload:
+                digest = _content_digest(data)
+                entry = manifest_files.get(filename, {})
+                variants = variant_paths(filename)
+                # Republish when the data changed or the configured variants (.gz, columnar...) did
+                if entry.get("digest") != digest or entry.get("variants", []) != variants:
+                    encoded = encode_json_files(filename, data)
+                    files.update(encoded)
+                    entry = {
+                        "digest": digest,
+                        "changed_at": now.isoformat(),
+                        "changed_timestamp": int(now.timestamp()),
+                        "size": len(encoded[filename].encode("utf-8")),
+                        "variants": variants,
+                    }
+                entry["checked_at"] = now.isoformat()
+                entry["checked_timestamp"] = int(now.timestamp())
+                manifest_files[filename] = entry
+            
+            manifest = {
+                "data_type": "manifest",
+                "last_updated": now.isoformat(),
+                "last_updated_timestamp": int(now.timestamp()),
+                "files": manifest_files,
             }
-            if sha:
-                data_payload["sha"] = sha
+            changed_names = sorted(name for name, _ in files_to_upload if name in files)
+            skipped = len(files_to_upload) - len(changed_names)
+            files[MANIFEST_FILENAME] = dumps_json(manifest)
             
-            # Upload the file (async)
-            put_resp = await asyncio.to_thread(make_put_request, data_payload)
-            if put_resp.status_code in (200, 201):
-                logger.info(f"[DataManager] {filename} uploaded to GitHub successfully")
-            else:
-                logger.error(f"[DataManager] Failed to upload {filename}: {put_resp.status_code} {put_resp.text}")
-                
+            commit_sha = await self.publisher.publish(
+                files,
+                f"Update {len(changed_names)} data files\n\n" + "\n".join(changed_names or ["(manifest only)"])
+            )
+            # Only remember the new digests once the commit landed, so failed files are retried next cycle
+            self.manifest_files = manifest_files
+            await db_async.save_setting_value(MANIFEST_SETTING_KEY, json.dumps(manifest_files))
+            logger.info(
+                f"[DataManager] Published {len(changed_names)} changed files ({skipped} unchanged skipped)"
+                + (f" in commit {commit_sha}" if commit_sha else "")
+            )
+            return True
         except Exception as e:
-            logger.error(f"[DataManager] Error uploading {filename} to GitHub: {e}")
+            logger.error(f"[DataManager] Error publishing JSON files to GitHub: {e}")
+            return False
     
     def cog_unload(self):
         self.fetch_and_upload_all_data.cancel()
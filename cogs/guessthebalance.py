@@ -6,14 +6,7 @@ from datetime import datetime
 import datetime as dt
 import logging
 
-from db import (
-    get_gtb_game_state,
-    set_gtb_game_state,
-    add_gtb_guess,
-    get_gtb_guesses,
-    clear_gtb_game,
-    add_funds_to_vault,
-)
+import db_async
 
 logger = logging.getLogger(__name__)
 
@@ -144,7 +137,7 @@ class GuessTheBalance(commands.Cog):
 
         await interaction.response.defer()
 
-        set_gtb_game_state("open", {})
+        await db_async.set_gtb_game_state("open", {})
         embed = self._build_gtb_game_embed("open", {})
         mention_text = f"<@&{GTB_NOTIFY_ROLE_ID}>"
         message = await interaction.followup.send(
@@ -171,15 +164,15 @@ class GuessTheBalance(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        game_state = get_gtb_game_state()
+        game_state = await db_async.get_gtb_game_state()
         if game_state is None or game_state.get("status") != "open":
             await interaction.followup.send("❌ No active GTB game is currently open.", ephemeral=True)
             return
 
         username = interaction.user.display_name
-        add_gtb_guess(interaction.user.id, username, amount)
+        await db_async.add_gtb_guess(interaction.user.id, username, amount)
 
-        guesses = get_gtb_guesses()
+        guesses = await db_async.get_gtb_guesses()
         embed = self._build_gtb_game_embed("open", guesses)
         participant_count = len(guesses)
 
@@ -207,13 +200,13 @@ class GuessTheBalance(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        game_state = get_gtb_game_state()
+        game_state = await db_async.get_gtb_game_state()
         if game_state is None or game_state.get("status") != "open":
             await interaction.followup.send("❌ No active GTB game is currently open.", ephemeral=True)
             return
 
-        guesses = get_gtb_guesses()
-        set_gtb_game_state("closed", guesses)
+        guesses = await db_async.get_gtb_guesses()
+        await db_async.set_gtb_game_state("closed", guesses)
 
         embed = self._build_gtb_game_embed("closed", guesses)
 
@@ -237,12 +230,12 @@ class GuessTheBalance(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        game_state = get_gtb_game_state()
+        game_state = await db_async.get_gtb_game_state()
         if game_state is None or game_state.get("status") != "closed":
             await interaction.followup.send("❌ No closed GTB game found. Please close the game first.", ephemeral=True)
             return
 
-        guesses = get_gtb_guesses()
+        guesses = await db_async.get_gtb_guesses()
         if not guesses:
             await interaction.followup.send("❌ No guesses recorded. Cannot post results.", ephemeral=True)
             return
@@ -277,7 +270,7 @@ class GuessTheBalance(commands.Cog):
                 f"{multiplier:.1f}x Multiplier - Won ${final_prize:,.2f}"
             )
             winner_mention_ids.append(user_id)
-            add_funds_to_vault(user_id, final_prize, gtb_placement=placement, gtb_display_name=username)
+            await db_async.add_funds_to_vault(user_id, final_prize, gtb_placement=placement, gtb_display_name=username)
 
         embed = discord.Embed(
             title="🎯 **Guess the Balance - Results!**",
@@ -304,7 +297,7 @@ class GuessTheBalance(commands.Cog):
 
         await self._send_admin_log("\n".join(payout_log_lines))
 
-        clear_gtb_game()
+        await db_async.clear_gtb_game()
         self.game_message_id = None
 
         await interaction.followup.send("✅ Results posted and prizes awarded to top 3 players.", ephemeral=True)
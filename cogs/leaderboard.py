@@ -1,14 +1,16 @@
 import discord
 from discord.ext import commands, tasks
-from utils import get_current_month_range, get_month_range, fetch_total_wager, fetch_weighted_wager
-from db import get_leaderboard_message_id, save_leaderboard_message_id, save_announced_goals, load_announced_goals, load_sent_tips, get_setting_value, save_setting_value
+from utils import get_current_month_range, get_month_range, fetch_total_wager_async, fetch_weighted_wager_async
+from db import load_announced_goals
+import db_async
+from snapshot_events import snapshot_bus, SNAPSHOT_WAIT_SECONDS
 import os
 import logging
 from datetime import datetime
 import datetime as dt
-import asyncio
 import calendar
 from milestones_config import MILESTONES
+from milestone_engine import cumulative_tips_through, milestone_index_for
 
 logger = logging.getLogger(__name__)
 GUILD_ID = int(os.getenv("GUILD_ID"))
@@ -31,6 +33,8 @@ class Leaderboard(commands.Cog):
         year_month = f"{now.year}_{now.month:02d}"
         self.announced_goals = load_announced_goals(year_month)
         self.year_month = year_month
+        self.leaderboard_snapshots = snapshot_bus.subscribe("Leaderboard")
+        self.goal_snapshots = snapshot_bus.subscribe("MonthlyGoal")
         self.auto_post_monthly_goal.start()
         self.update_roobet_leaderboard.start()
         logger.info("[Leaderboard] Initialized - leaderboard tasks started")
@@ -87,7 +91,7 @@ class Leaderboard(commands.Cog):
         target_key = f"{target_year}-{target_month:02d}"
 
         if not force:
-            last_posted = get_setting_value("wager_lb_last_logged_month", default="")
+            last_posted = await db_async.get_setting_value("wager_lb_last_logged_month", default="")
             if last_posted == target_key:
                 return False
 
@@ -95,8 +99,8 @@ class Leaderboard(commands.Cog):
         logger.info(f"[Leaderboard] Building monthly winner logs for {target_key}: {start_date} -> {end_date}")
 
         try:
-            total_wager_data = await asyncio.to_thread(fetch_total_wager, start_date, end_date)
-            weighted_wager_data = await asyncio.to_thread(fetch_weighted_wager, start_date, end_date)
+            total_wager_data = await fetch_total_wager_async(start_date, end_date)
+            weighted_wager_data = await fetch_weighted_wager_async(start_date, end_date)
         except Exception as e:
             logger.error(f"[Leaderboard] Failed to fetch monthly winner log data for {target_key}: {e}")
             return False
@@ -136,7 +140,7 @@ class Leaderboard(commands.Cog):
 
         ping_content = f"<@&{WAGER_LEADERBOARD_PING_ROLE_ID}>" if WAGER_LEADERBOARD_PING_ROLE_ID else None
         await logs_channel.send(content=ping_content, embed=embed)
-        save_setting_value("wager_lb_last_logged_month", target_key)
+        await db_async.save_setting_value("wager_lb_last_logged_month", target_key)
         logger.info(f"[Leaderboard] Posted monthly winner logs for {target_key} to channel {WAGER_LEADERBOARD_LOGS_CHANNEL_ID}")
         return True
 
@@ -150,48 +154,21 @@ class Leaderboard(commands.Cog):
     
     def get_milestone_info(self, weighted_wagered):
         """Get milestone rank info for a given weighted wager amount"""
-        current_rank = None
-        current_rank_index = -1
-        
-        # Find the highest milestone achieved
-        for j, milestone in enumerate(reversed(MILESTONES)):  # Check from highest to lowest
-            if weighted_wagered >= milestone["threshold"]:
-                current_rank = milestone
-                current_rank_index = len(MILESTONES) - 1 - j  # Convert back to normal index
-                break
-        
+        current_rank_index = milestone_index_for(weighted_wagered)
+        current_rank = MILESTONES[current_rank_index] if current_rank_index >= 0 else None
         return current_rank, current_rank_index
     
     def calculate_total_tips_for_rank(self, current_rank_index):
         """Calculate the total cumulative tips earned up to a specific rank"""
-        if current_rank_index == -1:
-            return 0.0
-        
-        total = 0.0
-        for i in range(current_rank_index + 1):  # Include the current rank
-            total += MILESTONES[i]["tip"]
-        return total
+        return cumulative_tips_through(current_rank_index)
     
-    def get_monthly_tips_earned(self, user_id, month, year):
-        """Get the total tips earned by a user this month"""
-        sent_tips = load_sent_tips(month, year)
-        # sent_tips is a set of (user_id, tier) tuples
-        user_tips = [tier for (uid, tier) in sent_tips if uid == user_id]
-        
-        total_tips = 0.0
-        for tier in user_tips:
-            # Find the tip amount for this tier
-            for milestone in MILESTONES:
-                if milestone['tier'] == tier:
-                    total_tips += milestone['tip']
-                    break
-        
-        return total_tips
-
-    @tasks.loop(minutes=10)
+    @tasks.loop(seconds=0)  # Paced by DataManager snapshots
     async def update_roobet_leaderboard(self):
-        logger.info("[Leaderboard] Starting leaderboard update cycle, waiting 2 minutes...")
-        await asyncio.sleep(120)  # 2 minute offset (DataManager runs at 0:00, we run at 0:02)
+        snapshot = await self.leaderboard_snapshots.wait(timeout=SNAPSHOT_WAIT_SECONDS)
+        if snapshot is None:
+            logger.warning("[Leaderboard] No DataManager snapshot received, updating from cached data")
+        else:
+            logger.info(f"[Leaderboard] Starting leaderboard update cycle for snapshot v{snapshot.version}")
         channel = self.bot.get_channel(LEADERBOARD_CHANNEL_ID)
         if not channel:
             logger.error("Leaderboard channel not found.")
@@ -229,11 +206,6 @@ class Leaderboard(commands.Cog):
             reverse=True
         )
         
-        # Get current month for tip calculations
-        now = datetime.now(dt.UTC)
-        current_month = now.month
-        current_year = now.year
-        
         leaderboard_lines = []
         position_markers = [
             "🥇", "🥈", "🥉", ":four:", ":five:",
@@ -256,7 +228,6 @@ class Leaderboard(commands.Cog):
                 
                 # Get milestone information
                 current_rank, current_rank_index = self.get_milestone_info(weighted_wagered)
-                monthly_tips = self.get_monthly_tips_earned(uid, current_month, current_year)
                 
                 if current_rank:
                     rank_emoji = current_rank["emoji"]
@@ -302,7 +273,7 @@ class Leaderboard(commands.Cog):
         )
 
         # Update Discord message
-        message_id = get_leaderboard_message_id(key="leaderboard_message_id")
+        message_id = await db_async.get_leaderboard_message_id(key="leaderboard_message_id")
         logger.info(f"[Leaderboard] Retrieved leaderboard message ID: {message_id}")
         if message_id:
             try:
@@ -313,7 +284,7 @@ class Leaderboard(commands.Cog):
                 logger.warning(f"Leaderboard message ID {message_id} not found, sending new message.")
                 try:
                     message = await channel.send(embed=embed)
-                    save_leaderboard_message_id(message.id, key="leaderboard_message_id")
+                    await db_async.save_leaderboard_message_id(message.id, key="leaderboard_message_id")
                     logger.info("[Leaderboard] New leaderboard message sent.")
                 except discord.errors.Forbidden:
                     logger.error("Bot lacks permission to send messages in leaderboard channel.")
@@ -323,15 +294,18 @@ class Leaderboard(commands.Cog):
             logger.info("[Leaderboard] No leaderboard message ID found, sending new message.")
             try:
                 message = await channel.send(embed=embed)
-                save_leaderboard_message_id(message.id, key="leaderboard_message_id")
+                await db_async.save_leaderboard_message_id(message.id, key="leaderboard_message_id")
                 logger.info("[Leaderboard] New leaderboard message sent.")
             except discord.errors.Forbidden:
                 logger.error("Bot lacks permission to send messages in leaderboard channel.")
 
-    @tasks.loop(minutes=10)
+    @tasks.loop(seconds=0)  # Paced by DataManager snapshots
     async def auto_post_monthly_goal(self):
-        logger.info("[Leaderboard] Starting monthly goal check cycle, waiting 2 minutes...")
-        await asyncio.sleep(120)  # 2 minute offset (DataManager runs at 0:00, we run at 0:02)
+        snapshot = await self.goal_snapshots.wait(timeout=SNAPSHOT_WAIT_SECONDS)
+        if snapshot is not None and not snapshot.has_changes:
+            logger.info(f"[Leaderboard] Snapshot v{snapshot.version} has no wager changes, skipping monthly goal check")
+            return
+        logger.info("[Leaderboard] Starting monthly goal check cycle")
         channel = self.bot.get_channel(MONTHLY_GOAL_CHANNEL_ID)
         if not channel:
             logger.error("Monthly goal channel not found.")
@@ -368,7 +342,7 @@ class Leaderboard(commands.Cog):
             if crossed:
                 threshold = max(crossed)
                 self.announced_goals.add(threshold)
-                save_announced_goals(self.announced_goals, self.year_month)
+                await db_async.save_announced_goals(self.announced_goals, self.year_month)
                 embed = discord.Embed(
                     title="📈 Monthly Wager Stats",
                     description=(
@@ -1,15 +1,19 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-from utils import send_tip, get_current_month_range
-from db import get_db_connection, release_db_connection, save_tip_log, load_sent_tips, save_tip, get_leaderboard_message_id, save_leaderboard_message_id, get_setting_value
+from utils import get_current_month_range
+from db import get_leaderboard_message_id, save_leaderboard_message_id, get_setting_parsed
+import db_async
 import os
 import logging
 from datetime import datetime
 import datetime as dt
-import asyncio
+import time
 from milestones_config import MILESTONES
-from collections import deque
+from milestone_engine import MILESTONE_INDEX_BY_TIER, MilestoneProgress, cumulative_tips_through
+from payout_dispatcher import payout_dispatcher, LANE_MILESTONE
+from payout_queue import payout_queue
+from snapshot_events import snapshot_bus, SNAPSHOT_WAIT_SECONDS
 
 logger = logging.getLogger(__name__)
 MILESTONE_PRIZES_CHANNEL_ID = 1362517492651790416
@@ -77,16 +81,19 @@ except (ValueError, TypeError) as e:
 class Milestones(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.tip_queue = asyncio.Queue()
         
         # Initialize month/year state tracking
         now = datetime.now(dt.UTC)
         self.current_month = now.month
         self.current_year = now.year
         logger.info(f"[Milestones] Initialized with month/year: {self.current_year}-{self.current_month:02d}")
+        # Per-user paid/queued ranks for the current month, loaded from milestonetips on first use
+        self.progress = None
+        # Users with a released rank; re-evaluated next cycle even if their wager hasn't changed
+        self.retry_user_ids = set()
+        self.snapshots = snapshot_bus.subscribe("Milestones")
         
         self.check_wager_milestones.start()
-        # process_tip_queue_task will be started in cog_load
     
     def get_data_manager(self):
         """Helper to get DataManager cog"""
@@ -101,8 +108,8 @@ class Milestones(commands.Cog):
             cleaned = cleaned[1:]
         return cleaned.lower()
 
-    def _load_blocked_identities(self):
-        raw_value = get_setting_value(MILESTONE_BLOCKED_USER_IDS_KEY, default="{}")
+    @staticmethod
+    def _parse_blocked_identities(raw_value):
         usernames = set()
         uids = set()
 
@@ -112,9 +119,9 @@ class Milestones(commands.Cog):
             parsed = json.loads(raw_value)
             if isinstance(parsed, dict):
                 usernames = {
-                    self._normalize_roobet_username(entry)
+                    Milestones._normalize_roobet_username(entry)
                     for entry in parsed.get("usernames", [])
-                    if self._normalize_roobet_username(entry)
+                    if Milestones._normalize_roobet_username(entry)
                 }
                 uids = {
                     str(entry).strip()
@@ -134,6 +141,14 @@ class Milestones(commands.Cog):
         tokens = {entry.strip() for entry in str(raw_value).split(",") if entry and entry.strip()}
         return {"usernames": set(), "uids": tokens}
 
+    def _load_blocked_identities(self):
+        # Parsed once per change of the setting, then served from the settings cache
+        return get_setting_parsed(
+            MILESTONE_BLOCKED_USER_IDS_KEY,
+            self._parse_blocked_identities,
+            default={"usernames": set(), "uids": set()},
+        )
+
     def is_user_blocked_from_milestones(self, user_id, username=None):
         identities = self._load_blocked_identities()
         blocked_uids = identities.get("uids", set())
@@ -145,11 +160,14 @@ class Milestones(commands.Cog):
 
     def _find_milestone_by_tier(self, tier_name):
         """Return the milestone definition for a stored tier name, such as 'Rank 7'."""
-        tier_name = str(tier_name).strip()
-        for milestone in MILESTONES:
-            if milestone.get("tier") == tier_name:
-                return milestone
-        return None
+        index = MILESTONE_INDEX_BY_TIER.get(str(tier_name).strip())
+        return MILESTONES[index] if index is not None else None
+
+    def _release_queued_milestone(self, user_id, milestone, month, year):
+        """Let the next cycle queue a rank again after its queued tip was dropped or failed."""
+        if self.progress is not None and self.progress.period == (month, year):
+            self.progress.release(user_id, MILESTONE_INDEX_BY_TIER[milestone["tier"]])
+            self.retry_user_ids.add(user_id)
 
     def _build_milestone_embed(self, username, milestone, tip_amount, footer_text="AutoTip Engine Live • Payout Sent Successfully"):
         display_username = username
@@ -175,94 +193,108 @@ class Milestones(commands.Cog):
         embed.set_footer(text=footer_text)
         return embed
 
-    def purge_user_from_tip_queue(self, roobet_username=None, roobet_uid=None):
-        """Remove queued milestone tips for a specific Roobet user and return removed count."""
+    async def purge_user_from_tip_queue(self, roobet_username=None, roobet_uid=None):
+        """Cancel queued milestone tips for a specific Roobet user and return removed count."""
         username_key = self._normalize_roobet_username(roobet_username)
         uid_key = str(roobet_uid).strip() if roobet_uid is not None and str(roobet_uid).strip() else ""
 
         if not username_key and not uid_key:
             return 0
 
-        original_items = list(self.tip_queue._queue)
-        kept_items = []
-        removed_count = 0
-
-        for item in original_items:
-            queued_user_id = str(item[0]) if isinstance(item, tuple) and len(item) > 0 else ""
-            queued_username = self._normalize_roobet_username(item[1]) if isinstance(item, tuple) and len(item) > 1 else ""
-
-            uid_match = uid_key and queued_user_id == uid_key
-            username_match = username_key and queued_username == username_key
-
-            if uid_match or username_match:
-                removed_count += 1
-            else:
-                kept_items.append(item)
-
-        if removed_count <= 0:
-            return 0
-
-        self.tip_queue._queue = deque(kept_items)
-        self.tip_queue._unfinished_tasks = max(0, self.tip_queue._unfinished_tasks - removed_count)
-        if self.tip_queue._unfinished_tasks == 0:
-            self.tip_queue._finished.set()
-
+        def matches(request):
+            if request.source != "milestone":
+                return False
+            uid_match = uid_key and str(request.to_user_id) == uid_key
+            username_match = username_key and self._normalize_roobet_username(request.to_username) == username_key
+            return bool(uid_match or username_match)
+
+        # Jobs still in payout_jobs, plus claimed ones waiting in the dispatcher; both paths
+        # close the job as cancelled and release the rank
+        removed_count = await payout_queue.cancel("milestone", user_id=uid_key or None, username=username_key or None)
+        removed_count += len(payout_dispatcher.cancel(matches))
         return removed_count
 
+    @staticmethod
+    def _milestone_job_key(user_id, milestone, month, year):
+        return f"milestone:{user_id}:{milestone['tier']}:{year}-{month:02d}"
+
     async def cog_load(self):
-        self.process_tip_queue_task = asyncio.create_task(self.process_tip_queue())
+        payout_queue.register("milestone", self._pay_milestone_job, on_closed=self._milestone_job_closed)
 
     def cog_unload(self):
         self.check_wager_milestones.cancel()
-        if hasattr(self, 'process_tip_queue_task'):
-            self.process_tip_queue_task.cancel()
+        payout_queue.unregister("milestone")
 
-    async def process_tip_queue(self):
-        while True:
-            # Always get or fetch the channel each time
-            channel = self.bot.get_channel(MILESTONE_CHANNEL_ID)
-            if channel is None:
-                try:
-                    channel = await self.bot.fetch_channel(MILESTONE_CHANNEL_ID)
-                except Exception as e:
-                    logger.error(f"Failed to fetch milestone channel: {e}")
-                    channel = None
-            if channel is None:
-                logger.error(f"Milestone channel with ID {MILESTONE_CHANNEL_ID} not found. Cannot send milestone embed.")
-                # ❌ BUG FIX: Don't call task_done() here - we haven't called get() yet
-                await asyncio.sleep(5)
-                continue
-            
+    async def _get_milestone_channel(self):
+        channel = self.bot.get_channel(MILESTONE_CHANNEL_ID)
+        if channel is None:
             try:
-                user_id, username, milestone, month, year = await self.tip_queue.get()
-                if self.is_user_blocked_from_milestones(user_id, username):
-                    logger.info(
-                        f"[Milestones] Skipping blocked user {username} ({user_id}) for {milestone['tier']}"
-                    )
-                    continue
-                logger.info(f"[Milestones] Processing tip for {username} - {milestone['tier']} (month={month}, year={year})")
-                bot_user_id = os.getenv("ROOBET_USER_ID")
-                tip_response = await send_tip(bot_user_id, username, user_id, milestone["tip"])
-                if tip_response.get("success"):
-                    save_tip(user_id, milestone["tier"], month, year)
-                    save_tip_log(user_id, username, milestone["tip"], "milestone", month, year)
-                    logger.info(f"[Milestones] Successfully saved tip for {username} - {milestone['tier']} in database (month={month}, year={year})")
-                    embed = self._build_milestone_embed(username, milestone, milestone['tip'])
-                    await channel.send(embed=embed)
-                else:
-                    logger.error(f"Failed to send milestone tip to {username}: {tip_response.get('message')}")
-                    
-                await asyncio.sleep(30)
+                channel = await self.bot.fetch_channel(MILESTONE_CHANNEL_ID)
             except Exception as e:
-                logger.error(f"Error processing tip queue item: {e}")
-            finally:
-                # Always call task_done() after get(), even if there was an error
-                self.tip_queue.task_done()
+                logger.error(f"Failed to fetch milestone channel: {e}")
+        return channel
+
+    async def _queue_milestone_tip(self, user_id, username, milestone, month, year):
+        queued = await payout_queue.enqueue(
+            self._milestone_job_key(user_id, milestone, month, year), "milestone", LANE_MILESTONE,
+            user_id, username, milestone["tip"], {"tier": milestone["tier"], "month": month, "year": year},
+        )
+        if queued is None:
+            self._release_queued_milestone(user_id, milestone, month, year)
+        elif not queued:
+            logger.info(f"[Milestones] {milestone['tier']} for {username} is already queued or paid")
+
+    async def _milestone_job_closed(self, job, status):
+        milestone = self._find_milestone_by_tier(job["payload"].get("tier"))
+        if milestone is not None:
+            self._release_queued_milestone(job["user_id"], milestone, job["payload"]["month"], job["payload"]["year"])
+
+    async def _pay_milestone_job(self, job):
+        """payout_queue handler: send one milestone tip, then record and announce it."""
+        user_id, username = job["user_id"], job["username"]
+        month, year = job["payload"]["month"], job["payload"]["year"]
+        milestone = self._find_milestone_by_tier(job["payload"].get("tier"))
+        if milestone is None:
+            return {"success": False, "cancelled": True, "message": f"unknown tier {job['payload'].get('tier')}"}
+        if self.is_user_blocked_from_milestones(user_id, username):
+            logger.info(f"[Milestones] Skipping blocked user {username} ({user_id}) for {milestone['tier']}")
+            return {"success": False, "cancelled": True, "message": "blocked"}
+
+        logger.info(f"[Milestones] Processing tip for {username} - {milestone['tier']} (month={month}, year={year})")
+        tip_response = await payout_dispatcher.send(
+            LANE_MILESTONE, username, user_id, milestone["tip"], source="milestone",
+            idempotency_key=job["idempotency_key"],
+        )
+        if tip_response.get("cancelled"):
+            logger.info(f"[Milestones] Cancelled queued {milestone['tier']} tip for {username} ({user_id})")
+            return tip_response
+        if not tip_response.get("success"):
+            logger.error(f"Failed to send milestone tip to {username}: {tip_response.get('message')}")
+            return tip_response
+
+        await db_async.record_tip_payout(
+            user_id, username, milestone["tip"], "milestone", month, year,
+            milestone_tier=milestone["tier"], payout_job_id=job["id"],
+        )
+        logger.info(f"[Milestones] Successfully saved tip for {username} - {milestone['tier']} in database (month={month}, year={year})")
+        try:
+            channel = await self._get_milestone_channel()
+            if channel is None:
+                logger.error(f"Milestone channel with ID {MILESTONE_CHANNEL_ID} not found. Cannot send milestone embed.")
+            else:
+                embed = self._build_milestone_embed(username, milestone, milestone['tip'])
+                await channel.send(embed=embed)
+        except Exception as e:
+            logger.error(f"Error announcing milestone tip for {username}: {e}")
+        return tip_response
 
-    @tasks.loop(minutes=10)
+    @tasks.loop(seconds=0)  # Paced by DataManager snapshots
     async def check_wager_milestones(self):
-        logger.info("[Milestones] Starting milestone check cycle, waiting 2 minutes...")
-        await asyncio.sleep(120)  # 2 minute offset (DataManager runs at 0:00, we run at 0:02)
+        snapshot = await self.snapshots.wait(timeout=SNAPSHOT_WAIT_SECONDS)
+        if snapshot is None:
+            logger.warning("[Milestones] No DataManager snapshot received, checking all cached users")
+        else:
+            logger.info(f"[Milestones] Starting milestone check cycle for snapshot v{snapshot.version}")
         
         now = datetime.now(dt.UTC)
         month = now.month
@@ -275,48 +307,66 @@ class Milestones(commands.Cog):
             self.current_year = year
             logger.info("[Milestones] Month/year state updated for new period")
         
-        sent_tips = load_sent_tips(month, year)
-        logger.info(f"[Milestones] Loaded {len(sent_tips)} existing tips for {year}-{month:02d}")
+        # Only users whose wager changed can have crossed a threshold; everyone is checked
+        # after a reload, a full snapshot, or when no snapshot arrived
+        check_all = snapshot is None or snapshot.full
+        if self.progress is None or self.progress.period != (month, year):
+            sent_tips = await db_async.load_sent_tips(month, year)
+            # Ranks still in payout_jobs (queued before a restart, or held for review) count as claimed
+            queued_tips = {
+                (job["user_id"], job["payload"].get("tier"))
+                for job in await db_async.get_open_payout_jobs("milestone")
+                if (job["payload"].get("month"), job["payload"].get("year")) == (month, year)
+            }
+            self.progress = MilestoneProgress(month, year, set(sent_tips) | queued_tips)
+            self.retry_user_ids = set()
+            check_all = True
+            logger.info(f"[Milestones] Loaded {len(sent_tips)} existing tips for {year}-{month:02d}")
         
-        # Get data from DataManager
-        data_manager = self.get_data_manager()
-        if not data_manager:
-            logger.error("[Milestones] DataManager not available")
-            return
-            
-        cached_data = data_manager.get_cached_data()
+        if snapshot is not None:
+            cached_data = snapshot.data
+        else:
+            data_manager = self.get_data_manager()
+            if not data_manager:
+                logger.error("[Milestones] DataManager not available")
+                return
+            cached_data = data_manager.get_cached_data()
         if not cached_data:
             logger.error("[Milestones] No cached data available")
             return
             
+        user_ids_to_check = None if check_all else snapshot.changed_uids | self.retry_user_ids
+        self.retry_user_ids = set()
         weighted_wager_data = cached_data.get('weighted_wager', [])
+        if user_ids_to_check is not None:
+            weighted_wager_data = [entry for entry in weighted_wager_data if entry.get("uid") in user_ids_to_check]
         logger.info(f"[Milestones] Checking {len(weighted_wager_data)} users for milestones")
         
-        # Track what we're queuing in this cycle to prevent duplicates
-        queued_this_cycle = set()
-        
+        # Ranks are claimed as they are queued, so a tip still waiting in payout_jobs is not
+        # queued again by the next cycle; failed or cancelled jobs release the rank for a retry
+        started = time.perf_counter()
+        to_queue = []
         for entry in weighted_wager_data:
             user_id = entry.get("uid")
+            weighted_wagered = entry.get("weightedWagered", 0)
+            if not isinstance(weighted_wagered, (int, float)) or weighted_wagered < 0:
+                continue
+            pending = self.progress.pending(user_id, weighted_wagered)
+            if not pending:
+                continue
             username = entry.get("username", "Unknown")
             if self.is_user_blocked_from_milestones(user_id, username):
                 logger.info(f"[Milestones] Skipping queue for blocked user {username} ({user_id})")
                 continue
-            weighted_wagered = entry.get("weightedWagered", 0)
-            if not isinstance(weighted_wagered, (int, float)) or weighted_wagered < 0:
-                continue
-            for milestone in MILESTONES:
-                tier = milestone["tier"]
-                threshold = milestone["threshold"]
-                milestone_key = (user_id, tier)
-                
-                # Check both database and this cycle's queue to prevent duplicates
-                if (weighted_wagered >= threshold and 
-                    milestone_key not in sent_tips and 
-                    milestone_key not in queued_this_cycle):
-                    
-                    logger.info(f"[Milestones] Queuing milestone {tier} for {username} (${weighted_wagered:,.2f})")
-                    await self.tip_queue.put((user_id, username, milestone, month, year))
-                    queued_this_cycle.add(milestone_key)
+            for index in pending:
+                self.progress.claim(user_id, index)
+                to_queue.append((user_id, username, MILESTONES[index], weighted_wagered))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"[Milestones] Evaluated {len(weighted_wager_data)} users in {elapsed_ms:.2f}ms, {len(to_queue)} new milestones")
+
+        for user_id, username, milestone, weighted_wagered in to_queue:
+            logger.info(f"[Milestones] Queuing milestone {milestone['tier']} for {username} (${weighted_wagered:,.2f})")
+            await self._queue_milestone_tip(user_id, username, milestone, month, year)
 
     @check_wager_milestones.before_loop
     async def before_milestone_loop(self):
@@ -324,13 +374,7 @@ class Milestones(commands.Cog):
 
     def calculate_total_tips_for_rank(self, current_rank_index):
         """Calculate the total cumulative tips earned up to a specific rank"""
-        if current_rank_index == -1:
-            return 0.0
-        
-        total = 0.0
-        for i in range(current_rank_index + 1):  # Include the current rank
-            total += MILESTONES[i]["tip"]
-        return total
+        return cumulative_tips_through(current_rank_index)
 
     @app_commands.command(name="restoremilestones", description="Restore recent milestone log posts to the milestone channel")
     @app_commands.default_permissions(administrator=True)
@@ -352,25 +396,10 @@ class Milestones(commands.Cog):
                 await interaction.followup.send("❌ Could not find the milestone channel.", ephemeral=True)
                 return
 
-        conn = get_db_connection()
-        try:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT user_id, tier, month, year, tipped_at
-                    FROM milestonetips
-                    ORDER BY tipped_at DESC NULLS LAST, year DESC, month DESC
-                    LIMIT %s;
-                    """,
-                    (amount,),
-                )
-                rows = cur.fetchall()
-        except Exception as e:
-            logger.error(f"[Milestones] Failed to load milestone rows for restore: {e}")
+        rows = await db_async.get_recent_milestone_tips(amount)
+        if rows is None:
             await interaction.followup.send("❌ Failed to load recent milestone records from the database.", ephemeral=True)
             return
-        finally:
-            release_db_connection(conn)
 
         if not rows:
             await interaction.followup.send("ℹ️ No milestone records were found to restore.", ephemeral=True)
@@ -387,22 +416,7 @@ class Milestones(commands.Cog):
                     failed += 1
                     continue
 
-                username = None
-                conn2 = get_db_connection()
-                try:
-                    with conn2.cursor() as cur2:
-                        cur2.execute(
-                            "SELECT username FROM manualtips WHERE user_id = %s AND tip_type = 'milestone' AND month = %s AND year = %s AND amount = %s ORDER BY tipped_at DESC LIMIT 1;",
-                            (user_id, month, year, milestone['tip'])
-                        )
-                        result = cur2.fetchone()
-                        if result:
-                            username = result[0]
-                except Exception as e:
-                    logger.error(f"[Milestones] Failed to resolve username for restore row user_id={user_id}: {e}")
-                finally:
-                    release_db_connection(conn2)
-
+                username = await db_async.get_milestone_tip_username(user_id, month, year, milestone['tip'])
                 if not username:
                     username = "Unknown"
 
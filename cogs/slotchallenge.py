@@ -1,11 +1,10 @@
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
-from utils import send_tip
-from db import (
-    get_all_active_slot_challenges, add_active_slot_challenge, remove_active_slot_challenge, log_slot_challenge,
-    get_leaderboard_message_id, save_leaderboard_message_id, save_tip_log
-)
+from payout_dispatcher import payout_dispatcher, LANE_CHALLENGE
+from payout_queue import payout_queue
+import db_async
+from snapshot_events import snapshot_bus, SNAPSHOT_WAIT_SECONDS
 import os
 import logging
 from datetime import datetime, timezone
@@ -27,118 +26,147 @@ class SlotChallenge(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.snapshots = snapshot_bus.subscribe("SlotChallenge")
         self.check_challenge.start()
         self.ensure_challenge_embed.start()
-        self.payout_queue = asyncio.Queue()
-        self.process_payout_queue_task = asyncio.create_task(self.process_payout_queue())
         # History now uses individual posts instead of large embed updates
 
-    async def process_payout_queue(self):
-        while True:
-            challenge, winner, second, history_channel = await self.payout_queue.get()
-            tip_response = await send_tip(
-                user_id=os.getenv("ROOBET_USER_ID"),
-                to_username=winner["username"],
-                to_user_id=winner["uid"],
-                amount=challenge["prize"]
-            )
-            if tip_response.get("success"):
-                # Censor usernames for public display
-                winner_display_name = winner['username']
-                if len(winner_display_name) > 3:
-                    winner_display_name = winner_display_name[:-3] + "•••"
-                else:
-                    winner_display_name = "•••"
-                
-                # Create payout embed in the current event-log style.
-                embed = discord.Embed(
-                    title="🏆 Slot Challenge Payout",
-                    color=discord.Color.green()
-                )
-                
-                description = ""
-                
-                # Add timestamps for challenge duration
-                try:
-                    start_dt = datetime.fromisoformat(str(challenge['start_time']).replace('Z', '+00:00'))
-                    end_dt = datetime.now(timezone.utc)
-                    start_ts = int(start_dt.timestamp())
-                    end_ts = int(end_dt.timestamp())
-                    description += f"**Challenge Duration:** <t:{start_ts}:F> → <t:{end_ts}:F>\n\n"
-                except Exception:
-                    description += f"**Challenge Duration:** Started {challenge['start_time']}\n\n"
+    @staticmethod
+    def _challenge_job_payload(challenge, winner):
+        """JSON-safe copy of what the payout handler needs (payout_jobs.payload)."""
+        start_time = challenge["start_time"]
+        return {
+            "challenge": {
+                "challenge_id": challenge["challenge_id"],
+                "game_identifier": challenge["game_identifier"],
+                "game_name": challenge["game_name"],
+                "required_multi": float(challenge["required_multi"]),
+                "prize": float(challenge["prize"]),
+                "start_time": start_time.isoformat() if isinstance(start_time, datetime) else start_time,
+                "min_bet": float(challenge["min_bet"]) if challenge.get("min_bet") is not None else None,
+            },
+            "winner": winner,
+        }
 
-                description += f"🧾 **Challenge ID:** #{challenge['challenge_id']}\n\n"
-                description += f"👑 **Winner:** {winner_display_name}\n"
-                description += (
-                    f"✅ **Multi Hit:** x{winner.get('multiplier', 0):.2f} / "
-                    f"x{int(challenge['required_multi'])}\n"
-                )
-                description += f"💰 **Bet:** ${winner.get('bet', 0):.2f} | **Game Payout:** ${winner.get('payout', 0):.2f}\n"
-                description += f"💸 **Prize Sent:** ${challenge.get('prize', 0):.2f}\n\n"
-                description += (
-                    f"📍 **Track active challenges:** <#{ACTIVE_CHALLENGES_CHANNEL_ID}>\n"
-                    f"🎭 **Claim the {SLOT_CHALLENGE_ROLE_LABEL} role:** <#{SLOT_CHALLENGE_ROLE_CLAIM_CHANNEL_ID}>"
-                )
-                
-                embed.description = description
-                embed.set_footer(text="AutoTip Engine Live • Payout Sent Successfully")
-                
-                # Send with role ping
-                if history_channel:
-                    content = f"<@&{SLOT_CHALLENGE_PING_ROLE_ID}>" if SLOT_CHALLENGE_PING_ROLE_ID else None
-                    await history_channel.send(content=content, embed=embed)
-                logger.info(f"Calling log_slot_challenge for COMPLETED: id={challenge['challenge_id']} game={challenge['game_name']} winner={winner['username']}")
-                # Use the actual completion time for logging
-                completion_time = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
-                log_slot_challenge(
-                    challenge["challenge_id"],
-                    challenge["game_name"],
-                    challenge["game_identifier"],
-                    winner["uid"],
-                    winner["username"],
-                    winner["multiplier"],
-                    winner.get("bet", 0),
-                    winner.get("payout", 0),
-                    challenge["required_multi"],
-                    challenge["prize"],
-                    challenge.get("min_bet", 0),
-                    completion_time
-                )
-                
-                # Also log to manualtips for tipstats inclusion
-                save_tip_log(
-                    winner["uid"],
-                    winner["username"], 
-                    challenge["prize"],
-                    "slot_challenge",
-                    month=datetime.now(timezone.utc).month,
-                    year=datetime.now(timezone.utc).year
-                )
+    async def _pay_challenge_job(self, job):
+        """payout_queue handler: send a challenge prize, then announce and record it."""
+        challenge, winner = job["payload"]["challenge"], job["payload"]["winner"]
+        history_channel = self.bot.get_channel(HISTORY_CHANNEL_ID)
+        tip_response = await payout_dispatcher.send(
+            LANE_CHALLENGE,
+            to_username=winner["username"],
+            to_user_id=winner["uid"],
+            amount=challenge["prize"],
+            source="slot_challenge",
+            idempotency_key=job["idempotency_key"],
+        )
+        if tip_response.get("success"):
+            # Censor usernames for public display
+            winner_display_name = winner['username']
+            if len(winner_display_name) > 3:
+                winner_display_name = winner_display_name[:-3] + "•••"
             else:
-                # Send failed payout embed
-                if history_channel:
-                    embed = discord.Embed(
-                        title="⚠️ Challenge Complete - Payment Issue",
-                        color=discord.Color.orange()
-                    )
-                    
-                    # Build single-line description
-                    description = f"**Game:** {challenge['game_name']}\n"
-                    description += f"**Winner:** {winner['username']}\n"
-                    description += f"**Multiplier Achieved:** x{winner.get('multiplier', 0):.2f}\n"
-                    description += f"**Prize Amount:** ${challenge.get('prize', 0):.2f}\n\n"
-                    description += f"❌ **Payment Failed:** Insufficient account balance\n"
-                    description += f"📋 **Next Steps:** Please create a ticket in <#1296221508145905674>\n\n"
-                    description += f"**Challenge ID:** #{challenge['challenge_id']}"
-                    
-                    embed.description = description
-                    
-                    ping_role_id = os.getenv("SLOT_CHALLENGE_PING_ROLE_ID")
-                    content = f"<@&{ping_role_id}>" if ping_role_id else None
+                winner_display_name = "•••"
+            
+            # Create payout embed in the current event-log style.
+            embed = discord.Embed(
+                title="🏆 Slot Challenge Payout",
+                color=discord.Color.green()
+            )
+            
+            description = ""
+            
+            # Add timestamps for challenge duration
+            try:
+                start_dt = datetime.fromisoformat(str(challenge['start_time']).replace('Z', '+00:00'))
+                end_dt = datetime.now(timezone.utc)
+                start_ts = int(start_dt.timestamp())
+                end_ts = int(end_dt.timestamp())
+                description += f"**Challenge Duration:** <t:{start_ts}:F> → <t:{end_ts}:F>\n\n"
+            except Exception:
+                description += f"**Challenge Duration:** Started {challenge['start_time']}\n\n"
+
+            description += f"🧾 **Challenge ID:** #{challenge['challenge_id']}\n\n"
+            description += f"👑 **Winner:** {winner_display_name}\n"
+            description += (
+                f"✅ **Multi Hit:** x{winner.get('multiplier', 0):.2f} / "
+                f"x{int(challenge['required_multi'])}\n"
+            )
+            description += f"💰 **Bet:** ${winner.get('bet', 0):.2f} | **Game Payout:** ${winner.get('payout', 0):.2f}\n"
+            description += f"💸 **Prize Sent:** ${challenge.get('prize', 0):.2f}\n\n"
+            description += (
+                f"📍 **Track active challenges:** <#{ACTIVE_CHALLENGES_CHANNEL_ID}>\n"
+                f"🎭 **Claim the {SLOT_CHALLENGE_ROLE_LABEL} role:** <#{SLOT_CHALLENGE_ROLE_CLAIM_CHANNEL_ID}>"
+            )
+            
+            embed.description = description
+            embed.set_footer(text="AutoTip Engine Live • Payout Sent Successfully")
+            
+            # Send with role ping; the tip is out, so a Discord error must not fail the job
+            if history_channel:
+                content = f"<@&{SLOT_CHALLENGE_PING_ROLE_ID}>" if SLOT_CHALLENGE_PING_ROLE_ID else None
+                try:
                     await history_channel.send(content=content, embed=embed)
-            await asyncio.sleep(30)
-            self.payout_queue.task_done()
+                except Exception as e:
+                    logger.error(f"[SlotChallenge] Failed to post payout for challenge {challenge['challenge_id']}: {e}")
+            logger.info(f"Calling log_slot_challenge for COMPLETED: id={challenge['challenge_id']} game={challenge['game_name']} winner={winner['username']}")
+            # Use the actual completion time for logging
+            completion_time = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+            # Challenge log and the manualtips entry (for tipstats) are written together
+            await db_async.record_tip_payout(
+                winner["uid"],
+                winner["username"],
+                challenge["prize"],
+                "slot_challenge",
+                month=datetime.now(timezone.utc).month,
+                year=datetime.now(timezone.utc).year,
+                slot_challenge={
+                    "challenge_id": challenge["challenge_id"],
+                    "game": challenge["game_name"],
+                    "game_identifier": challenge["game_identifier"],
+                    "winner_uid": winner["uid"],
+                    "winner_username": winner["username"],
+                    "multiplier": winner["multiplier"],
+                    "bet": winner.get("bet", 0),
+                    "payout": winner.get("payout", 0),
+                    "required_multiplier": challenge["required_multi"],
+                    "prize": challenge["prize"],
+                    "min_bet": challenge.get("min_bet", 0),
+                    "challenge_start": completion_time,
+                },
+                payout_job_id=job["id"],
+            )
+        return tip_response
+
+    async def _challenge_job_closed(self, job, status):
+        """Announce a prize that could not be paid after every retry."""
+        if status != "failed":
+            return
+        challenge, winner = job["payload"]["challenge"], job["payload"]["winner"]
+        history_channel = self.bot.get_channel(HISTORY_CHANNEL_ID)
+        if history_channel:
+            embed = discord.Embed(
+                title="⚠️ Challenge Complete - Payment Issue",
+                color=discord.Color.orange()
+            )
+            
+            # Build single-line description
+            description = f"**Game:** {challenge['game_name']}\n"
+            description += f"**Winner:** {winner['username']}\n"
+            description += f"**Multiplier Achieved:** x{winner.get('multiplier', 0):.2f}\n"
+            description += f"**Prize Amount:** ${challenge.get('prize', 0):.2f}\n\n"
+            description += f"❌ **Payment Failed:** Insufficient account balance\n"
+            description += f"📋 **Next Steps:** Please create a ticket in <#1296221508145905674>\n\n"
+            description += f"**Challenge ID:** #{challenge['challenge_id']}"
+            
+            embed.description = description
+            
+            ping_role_id = os.getenv("SLOT_CHALLENGE_PING_ROLE_ID")
+            content = f"<@&{ping_role_id}>" if ping_role_id else None
+            await history_channel.send(content=content, embed=embed)
+
+    async def cog_load(self):
+        payout_queue.register("slot_challenge", self._pay_challenge_job, on_closed=self._challenge_job_closed)
 
     @challenge.command(name="create", description="Set a slot challenge for a specific game and multiplier.")
     @app_commands.describe(game_identifier="Game identifier (e.g. pragmatic:vs10bbbbrnd)", game_name="Game name for display", required_multi="Required multiplier (e.g. 100)", prize="Prize amount in USD", emoji="Optional emoji for this challenge", min_bet="Minimum bet size in USD (optional)")
@@ -158,14 +186,14 @@ class SlotChallenge(commands.Cog):
             await interaction.response.send_message("❌ Minimum bet must be greater than 0.", ephemeral=True)
             return
             
-        active = get_all_active_slot_challenges()
+        active = await db_async.get_all_active_slot_challenges()
         if len(active) >= 10:
             await interaction.response.send_message("There are already 10 active slot challenges. Please cancel one before adding another.", ephemeral=True)
             return
         challenge_start_utc = datetime.now(dt.UTC).replace(microsecond=0).isoformat()
         # Remove any quotes from game_name before saving
         clean_game_name = game_name.replace('"', '').replace("'", "")
-        challenge_id = add_active_slot_challenge(
+        challenge_id = await db_async.add_active_slot_challenge(
             game_identifier, clean_game_name, required_multi, prize, challenge_start_utc,
             interaction.user.id, interaction.user.display_name, None, emoji, min_bet
         )
@@ -211,7 +239,7 @@ class SlotChallenge(commands.Cog):
         channel = self.bot.get_channel(CHALLENGE_CHANNEL_ID)
         if not channel:
             return
-        active = get_all_active_slot_challenges()
+        active = await db_async.get_all_active_slot_challenges()
         if not active:
             # Optionally delete the embed if no challenges remain
             return
@@ -251,7 +279,7 @@ class SlotChallenge(commands.Cog):
         embed.set_footer(text="AutoTip Engine • Auto-pays ~15 minutes after challenge completion.")
         
         # Use consistent message ID tracking like leaderboards
-        message_id = get_leaderboard_message_id(key="active_challenges_message_id")
+        message_id = await db_async.get_leaderboard_message_id(key="active_challenges_message_id")
         if message_id:
             try:
                 msg = await channel.fetch_message(message_id)
@@ -261,7 +289,7 @@ class SlotChallenge(commands.Cog):
                 logger.warning(f"Active challenges message ID {message_id} not found, sending new message.")
                 try:
                     msg = await channel.send(embed=embed)
-                    save_leaderboard_message_id(msg.id, key="active_challenges_message_id")
+                    await db_async.save_leaderboard_message_id(msg.id, key="active_challenges_message_id")
                     logger.info("[SlotChallenge] New active challenges message sent.")
                 except discord.errors.Forbidden:
                     logger.error("Bot lacks permission to send messages in challenge channel.")
@@ -271,7 +299,7 @@ class SlotChallenge(commands.Cog):
             logger.info("[SlotChallenge] No active challenges message ID found, sending new message.")
             try:
                 msg = await channel.send(embed=embed)
-                save_leaderboard_message_id(msg.id, key="active_challenges_message_id")
+                await db_async.save_leaderboard_message_id(msg.id, key="active_challenges_message_id")
                 logger.info("[SlotChallenge] New active challenges message sent.")
             except discord.errors.Forbidden:
                 logger.error("Bot lacks permission to send messages in challenge channel.")
@@ -282,13 +310,13 @@ class SlotChallenge(commands.Cog):
         if interaction.user.id != BOT_OWNER_ID:
             await interaction.response.send_message("You do not have permission to cancel a challenge.", ephemeral=True)
             return
-        active = get_all_active_slot_challenges()
+        active = await db_async.get_all_active_slot_challenges()
         challenge = next((c for c in active if c['challenge_id'] == challenge_id), None)
         if not challenge:
             await interaction.response.send_message(f"No active slot challenge found with ID {challenge_id}.", ephemeral=True)
             return
         logger.info(f"Calling log_slot_challenge for CANCELLED: id={challenge['challenge_id']} game={challenge['game_name']} by={challenge['posted_by_username']}")
-        log_slot_challenge(
+        await db_async.log_slot_challenge(
             challenge["challenge_id"],
             challenge["game_name"],
             challenge["game_identifier"],
@@ -296,7 +324,7 @@ class SlotChallenge(commands.Cog):
             challenge["posted_by_username"],
             None, None, None, None, None, challenge.get("min_bet"), challenge["start_time"]
         )
-        remove_active_slot_challenge(challenge_id)
+        await db_async.remove_active_slot_challenge(challenge_id)
         await self.update_challenges_embed()
         await interaction.response.send_message(f"Slot challenge ID {challenge_id} cancelled.", ephemeral=True)
         
@@ -332,12 +360,13 @@ class SlotChallenge(commands.Cog):
             content = f"<@&{ping_role_id}>" if ping_role_id else None
             await history_channel.send(content=content, embed=embed)
 
-    @tasks.loop(minutes=10)  # Now synchronized with DataManager schedule
+    @tasks.loop(seconds=0)  # Paced by DataManager snapshots
     async def check_challenge(self):
-        logger.info("[SlotChallenge] Starting challenge check cycle, waiting 2 minutes...")
-        await asyncio.sleep(120)  # 2 minute offset (DataManager runs at 0:00, we run at 0:02)
+        # Each challenge's game data is fetched here, so a missing snapshot only delays the check
+        await self.snapshots.wait(timeout=SNAPSHOT_WAIT_SECONDS)
+        logger.info("[SlotChallenge] Starting challenge check cycle")
         
-        active = get_all_active_slot_challenges()
+        active = await db_async.get_all_active_slot_challenges()
         if not active:
             return
             
@@ -361,8 +390,8 @@ class SlotChallenge(commands.Cog):
             # Make single API call to get ALL users and multipliers for this specific game
             start_date_str = challenge_start_dt.isoformat()
             try:
-                from utils import fetch_weighted_wager
-                game_data = await asyncio.to_thread(fetch_weighted_wager, start_date_str, None, challenge['game_identifier'])
+                from utils import fetch_weighted_wager_async
+                game_data = await fetch_weighted_wager_async(start_date_str, None, challenge['game_identifier'], force_refresh=True)
                 
                 # Check each user's highest multiplier for this specific game
                 best_multi = 0.0
@@ -416,15 +445,22 @@ class SlotChallenge(commands.Cog):
             if winners:
                 winners_sorted = sorted(winners, key=lambda x: x["multiplier"], reverse=True)
                 winner = winners_sorted[0]
-                second = winners_sorted[1] if len(winners_sorted) > 1 else None
-                history_channel = self.bot.get_channel(HISTORY_CHANNEL_ID)
-                self.payout_queue.put_nowait((challenge, winner, second, history_channel))
+                # Queued durably before the challenge is removed; the key makes a re-detection after
+                # a crash in between a no-op
+                queued = await payout_queue.enqueue(
+                    f"slot_challenge:{challenge['challenge_id']}", "slot_challenge", LANE_CHALLENGE,
+                    winner["uid"], winner["username"], float(challenge["prize"]),
+                    self._challenge_job_payload(challenge, winner),
+                )
+                if queued is None:
+                    logger.error(f"[SlotChallenge] Could not queue payout for challenge {challenge['challenge_id']}, will retry next check")
+                    continue
                 completed_ids.add(challenge["challenge_id"])
                 logger.info(f"[SlotChallenge] Challenge {challenge['game_name']} completed by {winner['username']} with {winner['multiplier']}x")
                 
         # Remove completed challenges
         for cid in completed_ids:
-            remove_active_slot_challenge(cid)
+            await db_async.remove_active_slot_challenge(cid)
         if completed_ids:
             await self.update_challenges_embed()
         
@@ -448,9 +484,8 @@ class SlotChallenge(commands.Cog):
     @challenge.command(name="results", description="Show top wager stats for each challenge since it started.")
     async def challenge_results(self, interaction: discord.Interaction):
         await interaction.response.defer(thinking=True)
-        from db import get_all_active_slot_challenges, get_db_connection, release_db_connection
-        from utils import fetch_weighted_wager
-        active = get_all_active_slot_challenges()
+        from utils import fetch_weighted_wager_async
+        active = await db_async.get_all_active_slot_challenges()
         # Only show live (active) challenges, not completed/logged ones
         all_challenges = []
         seen = set()
@@ -466,7 +501,7 @@ class SlotChallenge(commands.Cog):
             logger.info(f"[SlotChallenge] Fetching challenge results for {challenge['game_name']} ({challenge['game_identifier']})")
             try:
                 # Fetch only for this game identifier
-                data = await asyncio.to_thread(fetch_weighted_wager, start_date, end_date, challenge['game_identifier'])
+                data = await fetch_weighted_wager_async(start_date, end_date, challenge['game_identifier'])
                 logger.info(f"[SlotChallenge] Found {len(data)} users for {challenge['game_name']}")
             except Exception as e:
                 desc += f"\n**{challenge['game_name']}**: Error fetching data: {e}\n"
@@ -541,8 +576,7 @@ class SlotChallenge(commands.Cog):
     def cog_unload(self):
         self.check_challenge.cancel()
         self.ensure_challenge_embed.cancel()
-        if hasattr(self, 'process_payout_queue_task'):
-            self.process_payout_queue_task.cancel()
+        payout_queue.unregister("slot_challenge")
 
 async def setup(bot):
     await bot.add_cog(SlotChallenge(bot))
@@ -2,28 +2,13 @@ import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 from discord import ui
-from utils import send_tip, get_current_month_range, get_current_week_range, fetch_weighted_wager, fetch_total_wager, get_month_range
+from utils import get_current_month_range, get_current_week_range, fetch_weighted_wager_async, fetch_total_wager_async, get_month_range
 from db import (
     get_db_connection,
     release_db_connection,
-    save_tip_log,
-    get_monthly_totals,
-    get_user_slot_challenge_stats,
-    process_daily_checkin,
-    reserve_checkin_withdrawal,
-    finalize_checkin_withdrawal,
-    get_checkin_withdrawal_logs,
-    get_checkin_account_summary,
-    get_top_checkin_balances,
-    get_leaderboard_message_id,
-    save_leaderboard_message_id,
-    process_coinflip_bet,
-    get_coinflip_pnl_summary,
-    get_or_create_daily_checkin_random_drop,
-    mark_checkin_random_drop_posted,
-    expire_stale_checkin_random_drops,
-    process_checkin_random_drop_claim,
 )
+import db_async
+from payout_dispatcher import payout_dispatcher, LANE_INTERACTIVE
 import os
 from datetime import datetime
 import datetime as dt
@@ -111,7 +96,7 @@ class User(commands.Cog):
         return self.bot.get_cog('DataManager')
 
     async def _run_coinflip(self, interaction: discord.Interaction, wager_amount: float, side: str):
-        result = process_coinflip_bet(interaction.user.id, wager_amount, side)
+        result = await db_async.process_coinflip_bet(interaction.user.id, wager_amount, side)
         if result is None:
             await interaction.followup.send("❌ Coinflip failed due to a backend error. Please try again.", ephemeral=True)
             return
@@ -185,7 +170,7 @@ class User(commands.Cog):
         if channel is None:
             return
 
-        pnl_summary = get_coinflip_pnl_summary(interaction.user.id)
+        pnl_summary = await db_async.get_coinflip_pnl_summary(interaction.user.id)
         if pnl_summary is None:
             logger.warning(f"Failed to load coinflip PNL summary for user {interaction.user.id}")
             return
@@ -302,7 +287,7 @@ class User(commands.Cog):
                 await interaction.response.send_message("❌ This vault drop is no longer claimable.", ephemeral=True)
                 return
 
-            result = process_checkin_random_drop_claim(
+            result = await db_async.process_checkin_random_drop_claim(
                 source_message.id,
                 interaction.user.id,
                 now=datetime.now(dt.UTC),
@@ -624,7 +609,7 @@ class User(commands.Cog):
             logger.error(f"[vault_drop] Failed to send vault random drop: {e}")
             return None
 
-        updated_drop = mark_checkin_random_drop_posted(drop["id"], channel.id, message.id)
+        updated_drop = await db_async.mark_checkin_random_drop_posted(drop["id"], channel.id, message.id)
         if updated_drop is None:
             logger.error(f"[vault_drop] Failed to persist posted state for drop {drop['id']}")
             return None
@@ -783,7 +768,7 @@ class User(commands.Cog):
         import calendar
 
         # Get historical monthly data from database
-        monthly_data = get_monthly_totals()
+        monthly_data = await db_async.get_monthly_totals()
 
         # Force fresh data fetch for current month
         current_total = 0
@@ -791,7 +776,7 @@ class User(commands.Cog):
 
         try:
             # Always fetch fresh data for current month - no caching
-            from utils import get_current_month_range, fetch_total_wager, fetch_weighted_wager
+            from utils import get_current_month_range, fetch_total_wager_async, fetch_weighted_wager_async
 
             logger.info("[monthtomonth] Fetching fresh current month data...")
 
@@ -799,8 +784,8 @@ class User(commands.Cog):
             start_date, end_date = get_current_month_range()
 
             # Fetch fresh data for current month
-            fresh_total_data = fetch_total_wager(start_date, end_date)
-            fresh_weighted_data = fetch_weighted_wager(start_date, end_date)
+            fresh_total_data = await fetch_total_wager_async(start_date, end_date)
+            fresh_weighted_data = await fetch_weighted_wager_async(start_date, end_date)
 
             # Calculate totals from fresh data
             current_total = sum(
@@ -1116,7 +1101,7 @@ class User(commands.Cog):
             return
 
         now_utc = datetime.now(dt.UTC)
-        expired_drops = expire_stale_checkin_random_drops(
+        expired_drops = await db_async.expire_stale_checkin_random_drops(
             now=now_utc,
             expiry_minutes=VAULT_RANDOM_DROP_EXPIRY_MINUTES,
         )
@@ -1133,7 +1118,7 @@ class User(commands.Cog):
                     reason=f"Split: ${split_amount:,.2f} each",
                 )
 
-        drop = get_or_create_daily_checkin_random_drop(
+        drop = await db_async.get_or_create_daily_checkin_random_drop(
             now=now_utc,
             reward_amount=VAULT_RANDOM_DROP_REWARD_AMOUNT,
             max_claims=VAULT_RANDOM_DROP_MAX_CLAIMS,
@@ -1170,7 +1155,7 @@ class User(commands.Cog):
             return
 
         now_utc = datetime.now(dt.UTC)
-        expired_drops = expire_stale_checkin_random_drops(
+        expired_drops = await db_async.expire_stale_checkin_random_drops(
             now=now_utc,
             expiry_minutes=VAULT_RANDOM_DROP_EXPIRY_MINUTES,
         )
@@ -1187,7 +1172,7 @@ class User(commands.Cog):
                     reason=f"Split: ${split_amount:,.2f} each",
                 )
 
-        drop = get_or_create_daily_checkin_random_drop(
+        drop = await db_async.get_or_create_daily_checkin_random_drop(
             now=now_utc,
             reward_amount=VAULT_RANDOM_DROP_REWARD_AMOUNT,
             max_claims=VAULT_RANDOM_DROP_MAX_CLAIMS,
@@ -1242,7 +1227,7 @@ class User(commands.Cog):
                 logger.error(f"[check_in] Failed to fetch check-in leaderboard channel: {e}")
                 return
 
-        top_balances = get_top_checkin_balances(limit=10)
+        top_balances = await db_async.get_top_checkin_balances(limit=10)
         guild = getattr(channel, "guild", None)
         for row in top_balances:
             display_name = None
@@ -1266,7 +1251,7 @@ class User(commands.Cog):
         embed = self._build_checkin_balance_leaderboard_embed(top_balances)
 
         message_key = "checkin_balance_leaderboard_message_id"
-        message_id = get_leaderboard_message_id(key=message_key)
+        message_id = await db_async.get_leaderboard_message_id(key=message_key)
         if message_id:
             try:
                 message = await channel.fetch_message(message_id)
@@ -1279,7 +1264,7 @@ class User(commands.Cog):
 
         try:
             message = await channel.send(embed=embed)
-            save_leaderboard_message_id(message.id, key=message_key)
+            await db_async.save_leaderboard_message_id(message.id, key=message_key)
         except Exception as e:
             logger.error(f"[check_in] Failed to send check-in leaderboard message: {e}")
 
@@ -1288,107 +1273,83 @@ class User(commands.Cog):
         await self.bot.wait_until_ready()
 
     async def _generate_tipstats_embeds(self):
-        """Build and return (summary_embed, by_type_embed) from the manualtips table."""
-        conn = get_db_connection()
-        try:
-            with conn.cursor() as cur:
-                now = datetime.now(dt.UTC)
-                last_24h = now - dt.timedelta(hours=24)
-                last_7d = now - dt.timedelta(days=7)
-                last_30d = now - dt.timedelta(days=30)
-                current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                since_jan1 = datetime(2025, 1, 1, tzinfo=dt.UTC)
-                cur.execute("""
-                    SELECT 
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS last_24h,
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS last_7d,
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS last_30d,
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS current_month,
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS since_jan1
-                    FROM manualtips;
-                """, (last_24h, last_7d, last_30d, current_month_start, since_jan1))
-                result = cur.fetchone()
-
-                cur.execute("""
-                    SELECT
-                        tip_type,
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS last_24h,
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS last_7d,
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS last_30d,
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS current_month,
-                        COALESCE(SUM(CASE WHEN tipped_at >= %s THEN amount ELSE 0 END), 0) AS lifetime
-                    FROM manualtips
-                    GROUP BY tip_type;
-                """, (last_24h, last_7d, last_30d, current_month_start, since_jan1))
-                by_type_rows = cur.fetchall()
-
-                by_type_stats = {}
-                for row in by_type_rows:
-                    tip_type = row[0] or "unknown"
-                    by_type_stats[tip_type] = {
-                        "last_24h": float(row[1]),
-                        "last_7d": float(row[2]),
-                        "last_30d": float(row[3]),
-                        "current_month": float(row[4]),
-                        "lifetime": float(row[5]),
-                    }
-
-                def format_by_type(window_key):
-                    lines = []
-                    for tip_type in TIP_TYPE_DISPLAY_ORDER:
-                        window_amount = by_type_stats.get(tip_type, {}).get(window_key, 0.0)
-                        display_name = TIP_TYPE_DISPLAY_NAMES.get(tip_type, tip_type.replace("_", " ").title())
-                        lines.append(f"• **{display_name}:** `${window_amount:,.2f}`")
-                    remaining_types = sorted(
-                        [tip_type for tip_type in by_type_stats.keys() if tip_type not in TIP_TYPE_DISPLAY_ORDER]
-                    )
-                    for tip_type in remaining_types:
-                        window_amount = by_type_stats.get(tip_type, {}).get(window_key, 0.0)
-                        display_name = TIP_TYPE_DISPLAY_NAMES.get(tip_type, tip_type.replace("_", " ").title())
-                        lines.append(f"• **{display_name}:** `${window_amount:,.2f}`")
-                    return "\n".join(lines)
-
-                stats = {
-                    "last_24h": float(result[0]),
-                    "last_7d": float(result[1]),
-                    "last_30d": float(result[2]),
-                    "current_month": float(result[3]),
-                    "since_jan1": float(result[4]) + 11295.53,
-                    "legacy_adjustment": 11295.53,
-                }
-
-            summary_embed = discord.Embed(
-                title="📊 Tip Statistics",
-                description=(
-                    f"**Past 24 Hours**: ${stats['last_24h']:.2f} USD\n"
-                    f"**Past 7 Days**: ${stats['last_7d']:.2f} USD\n"
-                    f"**Past 30 Days**: ${stats['last_30d']:.2f} USD\n"
-                    f"**Current Month**: ${stats['current_month']:.2f} USD\n"
-                    f"**Lifetime (Since Jan. 1st 2025)**: ${stats['since_jan1']:.2f} USD"
-                ),
-                color=discord.Color.blue()
-            )
-            summary_embed.add_field(
-                name="Lifetime Adjustment",
-                value=f"Legacy baseline included: ${stats['legacy_adjustment']:.2f}",
-                inline=False,
-            )
-            summary_embed.set_footer(text=f"Generated on {datetime.now(dt.UTC).strftime('%Y-%m-%d %H:%M:%S')} GMT")
+        """Build and return (summary_embed, by_type_embed) from the tip rollups."""
+        now = datetime.now(dt.UTC)
+        last_24h = now - dt.timedelta(hours=24)
+        last_7d = now - dt.timedelta(days=7)
+        last_30d = now - dt.timedelta(days=30)
+        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        since_jan1 = datetime(2025, 1, 1, tzinfo=dt.UTC)
+
+        window_totals = await db_async.get_tip_window_totals({
+            "last_24h": last_24h,
+            "last_7d": last_7d,
+            "last_30d": last_30d,
+            "current_month": current_month_start,
+            "lifetime": since_jan1,
+        }, now=now)
+        if window_totals is None:
+            raise RuntimeError("tip window totals unavailable")
+
+        by_type_stats = {}
+        for window_key, type_amounts in window_totals.items():
+            for tip_type, amount in type_amounts.items():
+                by_type_stats.setdefault(tip_type, {})[window_key] = amount
+
+        def format_by_type(window_key):
+            lines = []
+            for tip_type in TIP_TYPE_DISPLAY_ORDER:
+                window_amount = by_type_stats.get(tip_type, {}).get(window_key, 0.0)
+                display_name = TIP_TYPE_DISPLAY_NAMES.get(tip_type, tip_type.replace("_", " ").title())
+                lines.append(f"• **{display_name}:** `${window_amount:,.2f}`")
+            remaining_types = sorted(
+                [tip_type for tip_type in by_type_stats.keys() if tip_type not in TIP_TYPE_DISPLAY_ORDER]
+            )
+            for tip_type in remaining_types:
+                window_amount = by_type_stats.get(tip_type, {}).get(window_key, 0.0)
+                display_name = TIP_TYPE_DISPLAY_NAMES.get(tip_type, tip_type.replace("_", " ").title())
+                lines.append(f"• **{display_name}:** `${window_amount:,.2f}`")
+            return "\n".join(lines)
+
+        stats = {
+            "last_24h": sum(window_totals["last_24h"].values()),
+            "last_7d": sum(window_totals["last_7d"].values()),
+            "last_30d": sum(window_totals["last_30d"].values()),
+            "current_month": sum(window_totals["current_month"].values()),
+            "since_jan1": sum(window_totals["lifetime"].values()) + 11295.53,
+            "legacy_adjustment": 11295.53,
+        }
+
+        summary_embed = discord.Embed(
+            title="📊 Tip Statistics",
+            description=(
+                f"**Past 24 Hours**: ${stats['last_24h']:.2f} USD\n"
+                f"**Past 7 Days**: ${stats['last_7d']:.2f} USD\n"
+                f"**Past 30 Days**: ${stats['last_30d']:.2f} USD\n"
+                f"**Current Month**: ${stats['current_month']:.2f} USD\n"
+                f"**Lifetime (Since Jan. 1st 2025)**: ${stats['since_jan1']:.2f} USD"
+            ),
+            color=discord.Color.blue()
+        )
+        summary_embed.add_field(
+            name="Lifetime Adjustment",
+            value=f"Legacy baseline included: ${stats['legacy_adjustment']:.2f}",
+            inline=False,
+        )
+        summary_embed.set_footer(text=f"Generated on {datetime.now(dt.UTC).strftime('%Y-%m-%d %H:%M:%S')} GMT")
 
-            by_type_embed = discord.Embed(
-                title="📊 Tip Statistics by Type",
-                color=discord.Color.blurple(),
-            )
-            by_type_embed.add_field(name="By Type • Past 24 Hours", value=format_by_type("last_24h"), inline=False)
-            by_type_embed.add_field(name="By Type • Past 7 Days", value=format_by_type("last_7d"), inline=False)
-            by_type_embed.add_field(name="By Type • Past 30 Days", value=format_by_type("last_30d"), inline=False)
-            by_type_embed.add_field(name="By Type • Current Month", value=format_by_type("current_month"), inline=False)
-            by_type_embed.add_field(name="By Type • Lifetime", value=format_by_type("lifetime"), inline=False)
-            by_type_embed.set_footer(text="Type totals come from stored tip_type values in manualtips")
+        by_type_embed = discord.Embed(
+            title="📊 Tip Statistics by Type",
+            color=discord.Color.blurple(),
+        )
+        by_type_embed.add_field(name="By Type • Past 24 Hours", value=format_by_type("last_24h"), inline=False)
+        by_type_embed.add_field(name="By Type • Past 7 Days", value=format_by_type("last_7d"), inline=False)
+        by_type_embed.add_field(name="By Type • Past 30 Days", value=format_by_type("last_30d"), inline=False)
+        by_type_embed.add_field(name="By Type • Current Month", value=format_by_type("current_month"), inline=False)
+        by_type_embed.add_field(name="By Type • Lifetime", value=format_by_type("lifetime"), inline=False)
+        by_type_embed.set_footer(text="Type totals come from stored tip_type values in manualtips")
 
-            return summary_embed, by_type_embed
-        finally:
-            release_db_connection(conn)
+        return summary_embed, by_type_embed
 
     async def _send_logged_tip(self, interaction: discord.Interaction, username: str, amount: float, tip_type: str, success_title: str):
         if amount <= 0:
@@ -1403,7 +1364,7 @@ class User(commands.Cog):
             await interaction.followup.send("❌ Data service unavailable. Please try again later.", ephemeral=True)
             return
 
-        from utils import fetch_weighted_wager
+        from utils import fetch_weighted_wager_async
 
         try:
             current_year = datetime.now(dt.UTC).year
@@ -1411,7 +1372,7 @@ class User(commands.Cog):
             end_date = datetime.now(dt.UTC).isoformat()
 
             logger.info(f"[{tip_type}] Searching for {username} in yearly data from {start_date} to {end_date}")
-            yearly_wager_data = await asyncio.to_thread(fetch_weighted_wager, start_date, end_date)
+            yearly_wager_data = await fetch_weighted_wager_async(start_date, end_date)
 
             username_lower = username.lower()
             roobet_uid = None
@@ -1460,8 +1421,8 @@ class User(commands.Cog):
             return
 
         logger.info(f"Attempting to send {tip_type} tip of ${amount} to {username} (UID: {roobet_uid})")
-        response = await send_tip(
-            user_id=os.getenv("ROOBET_USER_ID"),
+        response = await payout_dispatcher.send(
+            LANE_INTERACTIVE,
             to_username=username,
             to_user_id=roobet_uid,
             amount=amount,
@@ -1471,7 +1432,7 @@ class User(commands.Cog):
 
         masked_username = username[:-3] + "\\*\\*\\*" if len(username) > 3 else "\\*\\*\\*"
         if response.get("success"):
-            save_tip_log(roobet_uid, username, amount, tip_type, month=datetime.now(dt.UTC).month, year=datetime.now(dt.UTC).year)
+            await db_async.save_tip_log(roobet_uid, username, amount, tip_type, month=datetime.now(dt.UTC).month, year=datetime.now(dt.UTC).year)
             embed = discord.Embed(
                 title=success_title,
                 description=(
@@ -1485,6 +1446,8 @@ class User(commands.Cog):
             logger.info(f"{tip_type} tip of ${amount} sent to {username} (UID: {roobet_uid})")
         else:
             error_message = response.get("message", "Unknown error")
+            if response.get("unknown"):
+                error_message += " (the tip may still have gone through; check before sending again)"
             await interaction.followup.send(
                 f"❌ Failed to send tip to {username}: {error_message}", ephemeral=True
             )
@@ -1498,7 +1461,7 @@ class User(commands.Cog):
             current_year = datetime.now(dt.UTC).year
             start_date = f"{current_year}-01-01T00:00:00Z"
             end_date = datetime.now(dt.UTC).isoformat()
-            yearly_wager_data = await asyncio.to_thread(fetch_weighted_wager, start_date, end_date)
+            yearly_wager_data = await fetch_weighted_wager_async(start_date, end_date)
 
             for entry in yearly_wager_data:
                 entry_username = entry.get("username", "").lower()
@@ -1534,7 +1497,7 @@ class User(commands.Cog):
 
         await interaction.response.defer()
 
-        checkin_result = process_daily_checkin(interaction.user.id)
+        checkin_result = await db_async.process_daily_checkin(interaction.user.id)
         if checkin_result is None:
             await interaction.followup.send("❌ Failed to process check-in. Please try again shortly.", ephemeral=True)
             return
@@ -1575,7 +1538,7 @@ class User(commands.Cog):
     async def balance(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        summary = get_checkin_account_summary(interaction.user.id)
+        summary = await db_async.get_checkin_account_summary(interaction.user.id)
         if summary is None:
             await interaction.followup.send("❌ Failed to load your check-in balance. Please try again shortly.", ephemeral=True)
             return
@@ -1622,7 +1585,7 @@ class User(commands.Cog):
     async def admincheckbalance(self, interaction: discord.Interaction, user: discord.Member):
         await interaction.response.defer(ephemeral=True)
 
-        summary = get_checkin_account_summary(user.id)
+        summary = await db_async.get_checkin_account_summary(user.id)
         if summary is None:
             await interaction.followup.send("❌ Failed to load that user's check-in balance. Please try again shortly.", ephemeral=True)
             return
@@ -1681,7 +1644,7 @@ class User(commands.Cog):
         start_utc = now_utc - dt.timedelta(days=30)
 
         try:
-            wager_data = await asyncio.to_thread(fetch_total_wager, start_utc.isoformat(), now_utc.isoformat())
+            wager_data = await fetch_total_wager_async(start_utc.isoformat(), now_utc.isoformat())
         except Exception as e:
             logger.error(f"Failed to load 30-day wager data for /expose {cleaned_rooid}: {e}")
             await interaction.followup.send("❌ Failed to load wager data right now. Please try again shortly.")
@@ -1738,7 +1701,7 @@ class User(commands.Cog):
             await interaction.followup.send("❌ Withdrawal amount must be greater than 0.", ephemeral=True)
             return
 
-        reserve_result = reserve_checkin_withdrawal(
+        reserve_result = await db_async.reserve_checkin_withdrawal(
             interaction.user.id,
             minimum_amount=CHECKIN_MIN_WITHDRAW_AMOUNT,
             hold_timeout_minutes=CHECKIN_WITHDRAW_HOLD_TIMEOUT_MINUTES,
@@ -1863,13 +1826,12 @@ class User(commands.Cog):
         lookback_start = lookback_end - dt.timedelta(days=CHECKIN_WITHDRAW_WAGER_LOOKBACK_DAYS)
         lookback_data = []
         try:
-            lookback_data = await asyncio.to_thread(
-                fetch_weighted_wager,
+            lookback_data = await fetch_weighted_wager_async(
                 lookback_start.isoformat(),
                 lookback_end.isoformat(),
             )
         except Exception as e:
-            finalize_checkin_withdrawal(
+            await db_async.finalize_checkin_withdrawal(
                 interaction.user.id,
                 outcome="failed",
                 withdrawal_id=withdrawal_id,
@@ -1914,7 +1876,7 @@ class User(commands.Cog):
         remaining_wager = max(0.0, required_wager - lookback_wager_value)
 
         if lookback_wager_value < required_wager:
-            finalize_checkin_withdrawal(
+            await db_async.finalize_checkin_withdrawal(
                 interaction.user.id,
                 outcome="failed",
                 withdrawal_id=withdrawal_id,
@@ -1953,7 +1915,7 @@ class User(commands.Cog):
             canonical_username = lookback_username_hint
 
         if not roobet_uid:
-            finalize_checkin_withdrawal(
+            await db_async.finalize_checkin_withdrawal(
                 interaction.user.id,
                 outcome="failed",
                 withdrawal_id=withdrawal_id,
@@ -1975,16 +1937,19 @@ class User(commands.Cog):
             return
 
         try:
-            response = await send_tip(
-                user_id=os.getenv("ROOBET_USER_ID"),
+            response = await payout_dispatcher.send(
+                LANE_INTERACTIVE,
                 to_username=canonical_username,
                 to_user_id=roobet_uid,
                 amount=withdraw_amount,
                 show_in_chat=True,
                 balance_type="crypto",
+                idempotency_key=f"withdrawal:{withdrawal_id}",
             )
+            if response.get("unknown"):
+                raise RuntimeError(response.get("message") or "tip outcome unknown")
         except Exception as e:
-            finalize_checkin_withdrawal(
+            await db_async.finalize_checkin_withdrawal(
                 interaction.user.id,
                 outcome="unknown",
                 withdrawal_id=withdrawal_id,
@@ -2011,7 +1976,7 @@ class User(commands.Cog):
             return
 
         if response.get("success"):
-            save_tip_log(
+            await db_async.save_tip_log(
                 roobet_uid,
                 canonical_username,
                 withdraw_amount,
@@ -2019,7 +1984,7 @@ class User(commands.Cog):
                 month=datetime.now(dt.UTC).month,
                 year=datetime.now(dt.UTC).year,
             )
-            finalize_result = finalize_checkin_withdrawal(
+            finalize_result = await db_async.finalize_checkin_withdrawal(
                 interaction.user.id,
                 outcome="success",
                 withdrawal_id=withdrawal_id,
@@ -2056,7 +2021,7 @@ class User(commands.Cog):
             )
         else:
             error_message = response.get("message", "Unknown error")
-            finalize_checkin_withdrawal(
+            await db_async.finalize_checkin_withdrawal(
                 interaction.user.id,
                 outcome="failed",
                 withdrawal_id=withdrawal_id,
@@ -2101,7 +2066,7 @@ class User(commands.Cog):
             await interaction.followup.send("❌ Limit must be greater than 0.", ephemeral=True)
             return
 
-        logs = get_checkin_withdrawal_logs(limit=limit, statuses=("success",))
+        logs = await db_async.get_checkin_withdrawal_logs(limit=limit, statuses=("success",))
         if logs is None:
             await interaction.followup.send("❌ Failed to load historical withdrawal logs from the database.", ephemeral=True)
             return
@@ -2166,7 +2131,7 @@ class User(commands.Cog):
             )
             return
 
-        summary = get_checkin_account_summary(interaction.user.id)
+        summary = await db_async.get_checkin_account_summary(interaction.user.id)
         if summary is None:
             await interaction.followup.send("❌ Failed to load your balance. Try again.", ephemeral=True)
             return
@@ -2377,7 +2342,7 @@ class User(commands.Cog):
         leaderboard_status_block = "\n".join(leaderboard_status_lines)
 
         now_utc = datetime.now(dt.UTC)
-        slot_stats = get_user_slot_challenge_stats(roobet_uid, month=now_utc.month, year=now_utc.year)
+        slot_stats = await db_async.get_user_slot_challenge_stats(roobet_uid, month=now_utc.month, year=now_utc.year)
         slot_challenge_status_block = (
             f"🎯 **Slot Challenges Completed (All-Time)**: **{slot_stats['completed_all_time']}**\n"
             f"🎯 **Slot Challenges Completed (Current Month)**: **{slot_stats['completed_current_month']}**\n"
@@ -2392,7 +2357,7 @@ class User(commands.Cog):
         current_multi_prize = 0.0
         try:
             week_start, week_end = get_current_week_range()
-            weekly_weighted_data = await asyncio.to_thread(fetch_weighted_wager, week_start, week_end)
+            weekly_weighted_data = await fetch_weighted_wager_async(week_start, week_end)
             weekly_candidates = []
             for entry in weekly_weighted_data:
                 if not isinstance(entry, dict):
@@ -2482,7 +2447,7 @@ class User(commands.Cog):
         milestone_paid_all_time = 0.0
         milestone_paid_current_month = 0.0
         wager_lb_paid_all_time = 0.0
-        try:
+        def _load_milestone_paid():
             conn = get_db_connection()
             try:
                 with conn.cursor() as cur:
@@ -2494,7 +2459,7 @@ class User(commands.Cog):
                         """,
                         (str(roobet_uid),)
                     )
-                    milestone_paid_all_time = float((cur.fetchone() or [0])[0] or 0)
+                    all_time = float((cur.fetchone() or [0])[0] or 0)
 
                     cur.execute(
                         """
@@ -2507,9 +2472,13 @@ class User(commands.Cog):
                         """,
                         (str(roobet_uid), now_utc.month, now_utc.year)
                     )
-                    milestone_paid_current_month = float((cur.fetchone() or [0])[0] or 0)
+                    current_month = float((cur.fetchone() or [0])[0] or 0)
+                    return all_time, current_month
             finally:
                 release_db_connection(conn)
+
+        try:
+            milestone_paid_all_time, milestone_paid_current_month = await db_async.run_db(_load_milestone_paid)
         except Exception as e:
             logger.warning(f"Error building payout summary for /mywager: {e}")
 
@@ -2665,8 +2634,7 @@ class User(commands.Cog):
 
         start_date, end_date = get_month_range(selected_year, selected_month)
         try:
-            game_entries = await asyncio.to_thread(
-                fetch_weighted_wager,
+            game_entries = await fetch_weighted_wager_async(
                 start_date,
                 end_date,
                 game_identifier,
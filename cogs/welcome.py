@@ -1,10 +1,9 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from utils import fetch_weighted_wager, fetch_total_wager, get_current_month_range, get_current_week_range
+from utils import fetch_weighted_wager_async, fetch_total_wager_async, get_current_month_range, get_current_week_range
 import os
 import logging
-import asyncio
 from datetime import datetime
 import datetime as dt
 
@@ -33,7 +32,7 @@ async def _fetch_live_stats():
     # ── Monthly wager 10th place ──────────────────────────────────────────────
     try:
         start_date, end_date = get_current_month_range()
-        wager_data = await asyncio.to_thread(fetch_total_wager, start_date, end_date)
+        wager_data = await fetch_total_wager_async(start_date, end_date)
         sorted_wager = sorted(
             [e for e in wager_data if isinstance(e.get("wagered"), (int, float)) and e["wagered"] > 0],
             key=lambda x: x["wagered"],
@@ -49,7 +48,7 @@ async def _fetch_live_stats():
     # ── Weekly multi 3rd place ────────────────────────────────────────────────
     try:
         week_start, week_end = get_current_week_range()
-        weekly_data = await asyncio.to_thread(fetch_weighted_wager, week_start, week_end)
+        weekly_data = await fetch_weighted_wager_async(week_start, week_end)
         multi_data = sorted(
             [e for e in weekly_data if e.get("highestMultiplier") and float(e["highestMultiplier"].get("multiplier", 0)) > 0],
             key=lambda x: float(x["highestMultiplier"]["multiplier"]),
@@ -1,22 +1,42 @@
 import os
 import logging
 import psycopg2
-from psycopg2 import pool
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
+from pgpool import ManagedConnectionPool
+from settings_cache import SettingsCache, SettingsListener
 from datetime import datetime
 import datetime as dt
 from decimal import Decimal, ROUND_DOWN
 import uuid
 import secrets
+import json
+import re
+import threading
+import time
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+DB_POOL_MIN_CONNECTIONS = int(os.getenv("DB_POOL_MIN_CONNECTIONS", "1"))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "20"))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "10"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+DB_POOL_PING_AFTER_IDLE = float(os.getenv("DB_POOL_PING_AFTER_IDLE", "10"))
+# Server-side prepared statements for HOT_STATEMENTS; set to false to compare timings without them
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() in ("1", "true", "yes")
+
 try:
-    db_pool = psycopg2.pool.SimpleConnectionPool(1, 20, os.getenv("DATABASE_URL"))
-    if db_pool is None:
-        raise psycopg2.Error("Failed to initialize database connection pool")
+    # Connections are checked out from the event loop thread, the DB executor and to_thread workers
+    db_pool = ManagedConnectionPool(
+        os.getenv("DATABASE_URL"),
+        minconn=DB_POOL_MIN_CONNECTIONS,
+        maxconn=DB_POOL_MAX_CONNECTIONS,
+        checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT,
+        max_lifetime=DB_POOL_MAX_LIFETIME,
+        ping_after_idle=DB_POOL_PING_AFTER_IDLE,
+    )
 except psycopg2.Error as e:
     logger.critical(f"Failed to initialize database connection pool: {e}")
     raise
@@ -25,7 +45,7 @@ def get_db_connection():
     try:
         return db_pool.getconn()
     except Exception as e:
-        logger.error(f"Failed to get DB connection: {e}")
+        logger.error(f"Failed to get DB connection: {e} (pool: {db_pool.stats()})")
         raise
 
 def release_db_connection(conn):
@@ -34,122 +54,645 @@ def release_db_connection(conn):
 def close_db_pool():
     db_pool.closeall()
 
+def get_db_pool_stats():
+    """Connection pool usage: in_use, idle, waiters, checkout wait times, recycled/failed connections,
+    plus hot statement counts and timings."""
+    with _hot_statement_lock:
+        hot = dict(_hot_statement_counters)
+    return {
+        **db_pool.stats(),
+        "prepared_statements_enabled": DB_PREPARED_STATEMENTS,
+        **hot,
+        "hot_statement_ms_avg": hot["hot_statement_seconds"] * 1000 / hot["hot_executions"] if hot["hot_executions"] else 0.0,
+    }
+
+
+# Statements run on nearly every interaction. With DB_PREPARED_STATEMENTS each one is PREPAREd
+# the first time a pooled connection runs it and EXECUTEd after that, skipping parse/plan.
+HOT_STATEMENTS = {
+    "setting_get": "SELECT value FROM settings WHERE key = %s;",
+    "setting_upsert": "INSERT INTO settings (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value;",
+    "sent_tips_for_month": "SELECT user_id, tier FROM milestonetips WHERE month = %s AND year = %s;",
+    "checkin_row_create": "INSERT INTO user_checkins (discord_user_id) VALUES (%s) ON CONFLICT (discord_user_id) DO NOTHING;",
+    "checkin_row_lock": (
+        "SELECT streak_days, balance, last_checkin_date, withdrawal_hold_amount, withdrawal_hold_created_at, "
+        "total_earned, total_withdrawn FROM user_checkins WHERE discord_user_id = %s FOR UPDATE;"
+    ),
+    "daily_checkin_insert": (
+        "INSERT INTO daily_checkins (discord_user_id, checkin_date, streak_days, reward_amount, balance_after) "
+        "VALUES (%s, %s, %s, %s, %s) ON CONFLICT (discord_user_id, checkin_date) DO NOTHING RETURNING id;"
+    ),
+    "daily_checkin_apply": (
+        "UPDATE user_checkins SET streak_days = %s, balance = %s, last_checkin_date = %s, total_earned = %s, "
+        "updated_at = NOW() WHERE discord_user_id = %s;"
+    ),
+}
+
+_hot_statement_lock = threading.Lock()
+_hot_statement_counters = {"statements_prepared": 0, "hot_executions": 0, "hot_statement_seconds": 0.0}
+
+
+def _positional_params(sql):
+    """Rewrite %s placeholders as $1, $2, ... for PREPARE."""
+    counter = iter(range(1, sql.count("%s") + 1))
+    return re.sub(r"%s", lambda _: f"${next(counter)}", sql)
+
+
+def _execute_hot(cur, name, params=()):
+    """Run HOT_STATEMENTS[name] on cur, as a prepared statement when enabled."""
+    started = time.perf_counter()
+    prepared = getattr(cur.connection, "prepared_statements", None)
+    if not DB_PREPARED_STATEMENTS or prepared is None:
+        cur.execute(HOT_STATEMENTS[name], params)
+    else:
+        newly_prepared = name not in prepared
+        if newly_prepared:
+            # PREPARE is session state and survives rollbacks, so it only happens once per connection
+            cur.execute(f"PREPARE {name} AS {_positional_params(HOT_STATEMENTS[name])}")
+            prepared.add(name)
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})" if params else f"EXECUTE {name}", params)
+        if newly_prepared:
+            with _hot_statement_lock:
+                _hot_statement_counters["statements_prepared"] += 1
+
+    with _hot_statement_lock:
+        _hot_statement_counters["hot_executions"] += 1
+        _hot_statement_counters["hot_statement_seconds"] += time.perf_counter() - started
+
 def save_leaderboard_message_id(message_id, key="leaderboard_message_id"):
+    save_setting_value(key, str(message_id))
+
+def get_leaderboard_message_id(key="leaderboard_message_id"):
+    value = get_setting_value(key)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError) as e:
+        logger.error(f"Error retrieving leaderboard message ID: {e}")
+        return None
+
+# Every process keeps the settings table in memory once start_settings_cache() has run;
+# changes from any process reach it through the settings trigger's NOTIFY
+settings_cache = SettingsCache()
+_settings_listener = None
+
+def start_settings_cache():
+    """Load all settings into memory and keep them current via LISTEN/NOTIFY (see settings_cache.py)."""
+    global _settings_listener
+    if _settings_listener is None:
+        _settings_listener = SettingsListener(os.getenv("DATABASE_URL"), settings_cache)
+        _settings_listener.start()
+
+def stop_settings_cache():
+    global _settings_listener
+    if _settings_listener is not None:
+        _settings_listener.stop()
+        _settings_listener = None
+    settings_cache.invalidate()
+
+def save_setting_value(key, value):
+    """Save a generic string setting value (write-through to the settings cache)."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            _execute_hot(cur, "setting_upsert", (key, str(value)))
+            conn.commit()
+        settings_cache.put(key, str(value))
+    except Exception as e:
+        logger.error(f"Error saving setting '{key}': {e}")
+    finally:
+        release_db_connection(conn)
+
+def get_setting_value(key, default=None):
+    """Load a generic string setting value, from memory once the settings cache is loaded."""
+    if settings_cache.loaded:
+        return settings_cache.get(key, default)
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            _execute_hot(cur, "setting_get", (key,))
+            result = cur.fetchone()
+            if result and result[0] is not None:
+                return result[0]
+            return default
+    except Exception as e:
+        logger.error(f"Error loading setting '{key}': {e}")
+        return default
+    finally:
+        release_db_connection(conn)
+
+def get_setting_parsed(key, parser, default=None):
+    """parser(setting value), memoized until the value changes; default if the setting is unset."""
+    if settings_cache.loaded:
+        return settings_cache.get_parsed(key, parser, default)
+    raw = get_setting_value(key)
+    return default if raw is None else parser(raw)
+
+def _add_tip_to_rollups(cur, user_id, username, amount, tip_type, month, year, tipped_at):
+    """Fold one manualtips row into tip_daily_totals and user_monthly_tips."""
+    tipped_at_utc = tipped_at.astimezone(dt.UTC) if tipped_at.tzinfo else tipped_at
+    tip_type = tip_type or "unknown"
+    cur.execute(
+        """
+        INSERT INTO tip_daily_totals (day, tip_type, amount, tip_count)
+        VALUES (%s, %s, %s, 1)
+        ON CONFLICT (day, tip_type) DO UPDATE SET
+            amount = tip_daily_totals.amount + EXCLUDED.amount,
+            tip_count = tip_daily_totals.tip_count + 1;
+        """,
+        (tipped_at_utc.date(), tip_type, amount),
+    )
+    cur.execute(
+        """
+        INSERT INTO user_monthly_tips (year, month, user_id, tip_type, username, amount, tip_count, first_tip, latest_tip)
+        VALUES (%s, %s, %s, %s, %s, %s, 1, %s, %s)
+        ON CONFLICT (year, month, user_id, tip_type) DO UPDATE SET
+            username = COALESCE(EXCLUDED.username, user_monthly_tips.username),
+            amount = user_monthly_tips.amount + EXCLUDED.amount,
+            tip_count = user_monthly_tips.tip_count + 1,
+            first_tip = LEAST(user_monthly_tips.first_tip, EXCLUDED.first_tip),
+            latest_tip = GREATEST(user_monthly_tips.latest_tip, EXCLUDED.latest_tip);
+        """,
+        (
+            year or tipped_at_utc.year, month or tipped_at_utc.month, str(user_id), tip_type, username,
+            amount, tipped_at, tipped_at,
+        ),
+    )
+
+
+def _insert_tip_log(cur, user_id, username, amount, tip_type, month=None, year=None):
+    cur.execute(
+        """
+        INSERT INTO manualtips (user_id, username, amount, tip_type, month, year, tipped_at)
+        VALUES (%s, %s, %s, %s, %s, %s, NOW())
+        RETURNING amount, tipped_at;
+        """,
+        (user_id, username, amount, tip_type, month, year)
+    )
+    stored_amount, tipped_at = cur.fetchone()
+    _add_tip_to_rollups(cur, user_id, username, stored_amount, tip_type, month, year, tipped_at)
+
+
+def save_tip_log(user_id, username, amount, tip_type, month=None, year=None):
+    conn = get_db_connection()
+    try:
+        conn.autocommit = False
+        with conn.cursor() as cur:
+            _insert_tip_log(cur, user_id, username, amount, tip_type, month, year)
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error saving tip log to database: {e}")
+    finally:
+        conn.autocommit = True
+        release_db_connection(conn)
+
+
+def record_tip_payout(user_id, username, amount, tip_type, month=None, year=None,
+                      milestone_tier=None, slot_challenge=None, weekly_payout=None, payout_job_id=None):
+    """
+    Record a sent tip as one unit of work: the manualtips log (with its rollups) plus, when given,
+    the milestonetips row (milestone_tier), the slot_challenge_logs row (slot_challenge: kwargs of
+    log_slot_challenge) or the weekly_multiplier_payouts row (weekly_payout: column -> value),
+    and marks payout_job_id done.
+    Milestone and weekly rows are inserted with ON CONFLICT DO NOTHING instead of check-then-insert.
+    Returns False if that row already existed, True otherwise, None on error (nothing is written).
+    """
+    conn = get_db_connection()
+    try:
+        conn.autocommit = False
+        newly_recorded = True
+        with conn.cursor() as cur:
+            if milestone_tier is not None:
+                newly_recorded = _insert_milestone_tip(cur, user_id, milestone_tier, month, year)
+            if slot_challenge is not None:
+                _insert_slot_challenge_log(cur, **slot_challenge)
+            if weekly_payout is not None:
+                columns = list(weekly_payout)
+                cur.execute(
+                    f"""
+                    INSERT INTO weekly_multiplier_payouts ({", ".join(columns)})
+                    VALUES ({", ".join(["%s"] * len(columns))})
+                    ON CONFLICT (week_start, rank) DO NOTHING
+                    RETURNING id;
+                    """,
+                    tuple(weekly_payout[column] for column in columns),
+                )
+                newly_recorded = cur.fetchone() is not None
+            _insert_tip_log(cur, user_id, username, amount, tip_type, month, year)
+            if payout_job_id is not None:
+                cur.execute(
+                    "UPDATE payout_jobs SET status = 'done', last_error = NULL, updated_at = NOW() WHERE id = %s;",
+                    (payout_job_id,),
+                )
+            conn.commit()
+
+        if not newly_recorded:
+            logger.warning(f"[Payouts] {tip_type} payout for {user_id} was already recorded; logged the tip only")
+        return newly_recorded
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error recording {tip_type} tip payout for {user_id}: {e}")
+        return None
+    finally:
+        conn.autocommit = True
+        release_db_connection(conn)
+
+
+def get_weekly_multiplier_paid_rows(week_key):
+    """Recorded weekly multiplier payouts for a week by rank: {rank: {...}}; empty on error."""
+    conn = get_db_connection()
+    paid_rows_by_rank = {}
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT rank, username, multiplier, game_name, prize_amount, wagered, payout
+                FROM weekly_multiplier_payouts
+                WHERE week_start = %s AND rank > 0
+                ORDER BY rank ASC;
+                """,
+                (week_key,)
+            )
+            for rank, username, multiplier, game_name, prize_amount, wagered, payout in cur.fetchall():
+                paid_rows_by_rank[int(rank)] = {
+                    "rank": int(rank),
+                    "username": username,
+                    "multiplier": float(multiplier),
+                    "game_name": game_name,
+                    "wagered": float(wagered or 0),
+                    "payout": float(payout or 0),
+                    "prize": float(prize_amount),
+                }
+    except Exception as e:
+        logger.error(f"Error loading weekly multiplier payouts for {week_key}: {e}")
+    finally:
+        release_db_connection(conn)
+    return paid_rows_by_rank
+
+
+def release_weekly_multiplier_lock(week_key):
+    """Delete the PROCESSING_LOCK row of a weekly multiplier payout run; returns True on success."""
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
             cur.execute(
-                "INSERT INTO settings (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = %s;",
-                (key, str(message_id), str(message_id))
+                "DELETE FROM weekly_multiplier_payouts WHERE week_start = %s AND rank = 0 AND username = 'PROCESSING_LOCK'",
+                (week_key,)
             )
             conn.commit()
+            return True
     except Exception as e:
-        logger.error(f"Error saving leaderboard message ID: {e}")
+        logger.warning(f"Failed to clean up weekly multiplier lock for {week_key}: {e}")
+        return False
     finally:
         release_db_connection(conn)
 
-def get_leaderboard_message_id(key="leaderboard_message_id"):
+
+def get_tip_window_totals(window_starts, now=None):
+    """
+    Tip totals by tip_type for each window in window_starts ({name: aware datetime}), each
+    window running from its start until now: {name: {tip_type: amount}}, or None on error.
+    Whole UTC days come from tip_daily_totals; only the partial first day reads manualtips.
+    """
+    now = now or datetime.now(dt.UTC)
+    parts = []
+    params = []
+    for name, start in window_starts.items():
+        start = start.astimezone(dt.UTC)
+        first_full_day = start.date()
+        if start != datetime.combine(first_full_day, dt.time(), dt.UTC):
+            first_full_day += dt.timedelta(days=1)
+        edge_end = min(datetime.combine(first_full_day, dt.time(), dt.UTC), now)
+        parts.append("SELECT %s, tip_type, amount FROM manualtips WHERE tipped_at >= %s AND tipped_at < %s")
+        params.extend([name, start, edge_end])
+        parts.append("SELECT %s, tip_type, amount FROM tip_daily_totals WHERE day >= %s")
+        params.extend([name, first_full_day])
+
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT value FROM settings WHERE key = %s;", (key,))
-            result = cur.fetchone()
-            return int(result[0]) if result else None
+            cur.execute(
+                f"""
+                SELECT window_name, COALESCE(tip_type, 'unknown'), COALESCE(SUM(amount), 0)
+                FROM ({" UNION ALL ".join(parts)}) AS windows (window_name, tip_type, amount)
+                GROUP BY 1, 2;
+                """,
+                tuple(params),
+            )
+            totals = {name: {} for name in window_starts}
+            for name, tip_type, amount in cur.fetchall():
+                totals[name][tip_type] = totals[name].get(tip_type, 0.0) + float(amount)
+            return totals
     except Exception as e:
-        logger.error(f"Error retrieving leaderboard message ID: {e}")
+        logger.error(f"Error loading tip window totals: {e}")
         return None
     finally:
         release_db_connection(conn)
 
-def save_setting_value(key, value):
-    """Save a generic string setting value."""
+PAYOUT_JOB_COLUMNS = "id, idempotency_key, kind, lane, user_id, username, amount, payload, attempts"
+
+
+def _payout_job_row(row):
+    job = dict(zip([column.strip() for column in PAYOUT_JOB_COLUMNS.split(",")], row))
+    job["amount"] = float(job["amount"])
+    return job
+
+
+def enqueue_payout_job(idempotency_key, kind, lane, user_id, username, amount, payload=None):
+    """
+    Queue a payout in payout_jobs. A key that is already queued, claimed or done is left alone;
+    one that ended failed or cancelled is queued again.
+    Returns True if queued, False if the key was already open or done, None on error.
+    """
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
             cur.execute(
-                "INSERT INTO settings (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = %s;",
-                (key, str(value), str(value))
+                """
+                INSERT INTO payout_jobs (idempotency_key, kind, lane, user_id, username, amount, payload)
+                VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb)
+                ON CONFLICT (idempotency_key) DO UPDATE SET
+                    status = 'queued', attempts = 0, available_at = NOW(), claimed_by = NULL,
+                    last_error = NULL, username = EXCLUDED.username, amount = EXCLUDED.amount,
+                    payload = EXCLUDED.payload, updated_at = NOW()
+                WHERE payout_jobs.status IN ('failed', 'cancelled')
+                RETURNING id;
+                """,
+                (idempotency_key, kind, lane, str(user_id), username, amount, json.dumps(payload or {})),
             )
+            queued = cur.fetchone() is not None
             conn.commit()
+            return queued
     except Exception as e:
-        logger.error(f"Error saving setting '{key}': {e}")
+        logger.error(f"Error queueing payout job {idempotency_key}: {e}")
+        return None
     finally:
         release_db_connection(conn)
 
-def get_setting_value(key, default=None):
-    """Load a generic string setting value."""
+
+def claim_payout_jobs(worker_id, kinds, limit, visibility_seconds):
+    """
+    Claim up to limit due jobs of the given kinds, lowest lane first, until visibility_seconds from
+    now. Jobs whose earlier claim expired (a worker died mid-job) are claimed again.
+    """
+    if not kinds or limit <= 0:
+        return []
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT value FROM settings WHERE key = %s;", (key,))
-            result = cur.fetchone()
-            if result and result[0] is not None:
-                return result[0]
-            return default
+            cur.execute(
+                f"""
+                UPDATE payout_jobs SET
+                    status = 'claimed', claimed_by = %s, attempts = attempts + 1,
+                    available_at = NOW() + %s * INTERVAL '1 second', updated_at = NOW()
+                WHERE id IN (
+                    SELECT id FROM payout_jobs
+                    WHERE status IN ('queued', 'claimed') AND available_at <= NOW() AND kind = ANY(%s)
+                    ORDER BY lane, available_at, id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING {PAYOUT_JOB_COLUMNS};
+                """,
+                (worker_id, visibility_seconds, list(kinds), limit),
+            )
+            jobs = [_payout_job_row(row) for row in cur.fetchall()]
+            conn.commit()
+            return sorted(jobs, key=lambda job: (job["lane"], job["id"]))
     except Exception as e:
-        logger.error(f"Error loading setting '{key}': {e}")
-        return default
+        logger.error(f"Error claiming payout jobs: {e}")
+        return []
     finally:
         release_db_connection(conn)
 
-def save_tip_log(user_id, username, amount, tip_type, month=None, year=None):
+
+def extend_payout_job_claims(worker_id, job_ids, visibility_seconds):
+    """Push out the claim expiry of jobs this worker is still working on."""
+    if not job_ids:
+        return
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
             cur.execute(
-                "INSERT INTO manualtips (user_id, username, amount, tip_type, month, year) VALUES (%s, %s, %s, %s, %s, %s);",
-                (user_id, username, amount, tip_type, month, year)
+                """
+                UPDATE payout_jobs SET available_at = NOW() + %s * INTERVAL '1 second', updated_at = NOW()
+                WHERE id = ANY(%s) AND status = 'claimed' AND claimed_by = %s;
+                """,
+                (visibility_seconds, list(job_ids), worker_id),
             )
             conn.commit()
     except Exception as e:
-        logger.error(f"Error saving tip log to database: {e}")
+        logger.error(f"Error extending payout job claims: {e}")
     finally:
         release_db_connection(conn)
 
-def save_announced_goals(goals, year_month=None):
-    # Ensure all goals are saved as integers (not strings)
-    goals_int = set(int(g) for g in goals)
-    if year_month is None:
-        now = datetime.now()
-        year_month = f"{now.year}_{now.month:02d}"
-    key = f"announced_goals_{year_month}"
+
+def finish_payout_job(job_id, worker_id, status, error=None, retry_in=None):
+    """
+    Close a claimed job as status ('done', 'failed', 'cancelled' or 'review'), or with retry_in seconds
+    put it back in the queue. Only the worker holding the claim can close it.
+    Returns True if the job was updated, False if the claim was lost, None on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            if retry_in is not None:
+                cur.execute(
+                    """
+                    UPDATE payout_jobs SET
+                        status = 'queued', claimed_by = NULL, last_error = %s,
+                        available_at = NOW() + %s * INTERVAL '1 second', updated_at = NOW()
+                    WHERE id = %s AND status = 'claimed' AND claimed_by = %s;
+                    """,
+                    (error, retry_in, job_id, worker_id),
+                )
+            else:
+                cur.execute(
+                    """
+                    UPDATE payout_jobs SET status = %s, last_error = %s, updated_at = NOW()
+                    WHERE id = %s AND status = 'claimed' AND claimed_by = %s;
+                    """,
+                    (status, error, job_id, worker_id),
+                )
+            updated = cur.rowcount > 0
+            conn.commit()
+            return updated
+    except Exception as e:
+        logger.error(f"Error finishing payout job {job_id}: {e}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+
+def cancel_payout_jobs(kind, user_id=None, username=None):
+    """Cancel queued (not claimed) jobs of kind for a user id and/or username; returns the cancelled jobs."""
+    if user_id is None and username is None:
+        return []
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE payout_jobs SET status = 'cancelled', last_error = 'cancelled', updated_at = NOW()
+                WHERE kind = %s AND status = 'queued'
+                  AND (user_id = %s OR LOWER(username) = LOWER(%s))
+                RETURNING {PAYOUT_JOB_COLUMNS};
+                """,
+                (kind, None if user_id is None else str(user_id), username),
+            )
+            jobs = [_payout_job_row(row) for row in cur.fetchall()]
+            conn.commit()
+            return jobs
+    except Exception as e:
+        logger.error(f"Error cancelling {kind} payout jobs: {e}")
+        return []
+    finally:
+        release_db_connection(conn)
+
+
+def get_open_payout_jobs(kind):
+    """Queued, claimed and held-for-review jobs of kind."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {PAYOUT_JOB_COLUMNS} FROM payout_jobs WHERE kind = %s AND status IN ('queued', 'claimed', 'review');",
+                (kind,),
+            )
+            return [_payout_job_row(row) for row in cur.fetchall()]
+    except Exception as e:
+        logger.error(f"Error loading open {kind} payout jobs: {e}")
+        return []
+    finally:
+        release_db_connection(conn)
+
+
+def begin_tip_intent(idempotency_key, nonce, to_user_id, to_username, amount):
+    """
+    Get or create the tip_intents row for idempotency_key before sending. An existing intent keeps
+    its nonce unless it ended 'failed', in which case it gets `nonce` and starts over as pending.
+    Returns {"nonce", "status", "response"} or None on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO tip_intents (idempotency_key, nonce, to_user_id, to_username, amount)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (idempotency_key) DO UPDATE SET
+                    nonce = CASE WHEN tip_intents.status = 'failed' THEN EXCLUDED.nonce ELSE tip_intents.nonce END,
+                    status = CASE WHEN tip_intents.status = 'failed' THEN 'pending' ELSE tip_intents.status END,
+                    updated_at = NOW()
+                RETURNING nonce, status, response;
+                """,
+                (idempotency_key, nonce, str(to_user_id), to_username, amount),
+            )
+            nonce, status, response = cur.fetchone()
+            conn.commit()
+            return {"nonce": nonce, "status": status, "response": response}
+    except Exception as e:
+        logger.error(f"Error recording tip intent {idempotency_key}: {e}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+
+def finish_tip_intent(idempotency_key, status, status_code=None, response=None, error=None):
+    """Record the outcome of one send attempt ('pending', 'sent', 'failed', 'unknown' or 'review')."""
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
             cur.execute(
-                "INSERT INTO settings (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = %s;",
-                (key, ",".join(str(g) for g in goals_int), ",".join(str(g) for g in goals_int))
+                """
+                UPDATE tip_intents SET
+                    status = %s, attempts = attempts + 1, last_status_code = %s, last_error = %s,
+                    response = COALESCE(%s::jsonb, response), updated_at = NOW()
+                WHERE idempotency_key = %s AND status <> 'sent';
+                """,
+                (status, status_code, error, json.dumps(response) if response is not None else None, idempotency_key),
             )
             conn.commit()
     except Exception as e:
-        logger.error(f"Error saving announced goals: {e}")
+        logger.error(f"Error updating tip intent {idempotency_key}: {e}")
     finally:
         release_db_connection(conn)
 
+
+def mark_stale_tip_intents_unknown(older_than_seconds=600):
+    """Pending intents nobody has touched for a while were cut off mid-send; returns how many were marked."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE tip_intents SET status = 'unknown', last_error = 'send interrupted', updated_at = NOW()
+                WHERE status = 'pending' AND updated_at < NOW() - %s * INTERVAL '1 second';
+                """,
+                (older_than_seconds,),
+            )
+            marked = cur.rowcount
+            conn.commit()
+            return marked
+    except Exception as e:
+        logger.error(f"Error marking stale tip intents: {e}")
+        return 0
+    finally:
+        release_db_connection(conn)
+
+
+def get_unresolved_tip_intents(limit=25):
+    """Intents whose outcome is unknown or held for review, oldest first."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT idempotency_key, nonce, to_user_id, to_username, amount, attempts, last_error, updated_at
+                FROM tip_intents
+                WHERE status IN ('unknown', 'review')
+                ORDER BY updated_at ASC
+                LIMIT %s;
+                """,
+                (limit,),
+            )
+            columns = ["idempotency_key", "nonce", "to_user_id", "to_username", "amount", "attempts", "last_error", "updated_at"]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+    except Exception as e:
+        logger.error(f"Error loading unresolved tip intents: {e}")
+        return []
+    finally:
+        release_db_connection(conn)
+
+
+def save_announced_goals(goals, year_month=None):
+    # Ensure all goals are saved as integers (not strings)
+    goals_int = set(int(g) for g in goals)
+    if year_month is None:
+        now = datetime.now()
+        year_month = f"{now.year}_{now.month:02d}"
+    key = f"announced_goals_{year_month}"
+    save_setting_value(key, ",".join(str(g) for g in goals_int))
+
 def load_announced_goals(year_month=None):
     if year_month is None:
         now = datetime.now()
         year_month = f"{now.year}_{now.month:02d}"
     key = f"announced_goals_{year_month}"
-    conn = get_db_connection()
     try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT value FROM settings WHERE key = %s;", (key,))
-            result = cur.fetchone()
-            if result and result[0]:
-                return set(int(x) for x in result[0].split(",") if x)
-            return set()
+        value = get_setting_value(key)
+        if value:
+            return set(int(x) for x in value.split(",") if x)
+        return set()
     except Exception as e:
         logger.error(f"Error loading announced goals: {e}")
         return set()
-    finally:
-        release_db_connection(conn)
 
 def load_sent_tips(month, year):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT user_id, tier FROM milestonetips WHERE month = %s AND year = %s;", (month, year))
+            _execute_hot(cur, "sent_tips_for_month", (month, year))
             tips = {(row[0], row[1]) for row in cur.fetchall()}
         return tips
     except Exception as e:
@@ -158,33 +701,72 @@ def load_sent_tips(month, year):
     finally:
         release_db_connection(conn)
 
-def save_tip(user_id, tier, month, year, tipped_at=None):
+def _insert_milestone_tip(cur, user_id, tier, month, year, tipped_at=None):
+    """Insert a milestonetips row; returns False if that user/tier/month was already recorded."""
+    cur.execute(
+        """
+        INSERT INTO milestonetips (user_id, tier, month, year, tipped_at)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (user_id, tier, month, year) DO NOTHING
+        RETURNING user_id;
+        """,
+        (user_id, tier, month, year, tipped_at or datetime.now())
+    )
+    return cur.fetchone() is not None
+
+def save_tip(user_id, tier, month, year, tipped_at=None):
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            inserted = _insert_milestone_tip(cur, user_id, tier, month, year, tipped_at)
+            conn.commit()
+            if not inserted:
+                logger.warning(f"Tip already exists for user {user_id}, tier {tier}, month {month}, year {year}")
+                return False
+            logger.info(f"Successfully inserted tip: user_id={user_id}, tier={tier}, month={month}, year={year}")
+            return True
+    except Exception as e:
+        logger.error(f"Error saving tip to database: {e}")
+        logger.error(f"Failed tip details: user_id={user_id}, tier={tier}, month={month}, year={year}")
+        return False
+    finally:
+        release_db_connection(conn)
+
+def get_recent_milestone_tips(limit):
+    """Most recent milestonetips rows (user_id, tier, month, year, tipped_at), newest first; None on error."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT user_id, tier, month, year, tipped_at
+                FROM milestonetips
+                ORDER BY tipped_at DESC NULLS LAST, year DESC, month DESC
+                LIMIT %s;
+                """,
+                (limit,),
+            )
+            return cur.fetchall()
+    except Exception as e:
+        logger.error(f"Error loading recent milestone tips: {e}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+def get_milestone_tip_username(user_id, month, year, amount):
+    """Username logged with a user's milestone tip of this amount in that month, or None."""
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            # First check if this tip already exists
-            cur.execute(
-                "SELECT COUNT(*) FROM milestonetips WHERE user_id = %s AND tier = %s AND month = %s AND year = %s;",
-                (user_id, tier, month, year)
-            )
-            existing_count = cur.fetchone()[0]
-            
-            if existing_count > 0:
-                logger.warning(f"Tip already exists for user {user_id}, tier {tier}, month {month}, year {year}")
-                return False
-            
-            # Insert the new tip
             cur.execute(
-                "INSERT INTO milestonetips (user_id, tier, month, year, tipped_at) VALUES (%s, %s, %s, %s, %s);",
-                (user_id, tier, month, year, tipped_at or datetime.now())
+                "SELECT username FROM manualtips WHERE user_id = %s AND tip_type = 'milestone' AND month = %s AND year = %s AND amount = %s ORDER BY tipped_at DESC LIMIT 1;",
+                (user_id, month, year, amount)
             )
-            conn.commit()
-            logger.info(f"Successfully inserted tip: user_id={user_id}, tier={tier}, month={month}, year={year}")
-            return True
+            result = cur.fetchone()
+            return result[0] if result else None
     except Exception as e:
-        logger.error(f"Error saving tip to database: {e}")
-        logger.error(f"Failed tip details: user_id={user_id}, tier={tier}, month={month}, year={year}")
-        return False
+        logger.error(f"Error resolving milestone tip username for user_id={user_id}: {e}")
+        return None
     finally:
         release_db_connection(conn)
 
@@ -238,17 +820,23 @@ def clear_active_slot_challenge():
     finally:
         release_db_connection(conn)
 
+def _insert_slot_challenge_log(cur, challenge_id, game, game_identifier, winner_uid, winner_username, multiplier, bet, payout, required_multiplier, prize, min_bet, challenge_start):
+    cur.execute(
+        """
+        INSERT INTO slot_challenge_logs (
+            challenge_id, game, game_identifier, winner_uid, winner_username, multiplier, bet, payout, required_multiplier, prize, min_bet, challenge_start
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+        """,
+        (challenge_id, game, game_identifier, winner_uid, winner_username, multiplier, bet, payout, required_multiplier, prize, min_bet, challenge_start)
+    )
+
 def log_slot_challenge(challenge_id, game, game_identifier, winner_uid, winner_username, multiplier, bet, payout, required_multiplier, prize, min_bet, challenge_start):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO slot_challenge_logs (
-                    challenge_id, game, game_identifier, winner_uid, winner_username, multiplier, bet, payout, required_multiplier, prize, min_bet, challenge_start
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-                """,
-                (challenge_id, game, game_identifier, winner_uid, winner_username, multiplier, bet, payout, required_multiplier, prize, min_bet, challenge_start)
+            _insert_slot_challenge_log(
+                cur, challenge_id, game, game_identifier, winner_uid, winner_username, multiplier, bet, payout,
+                required_multiplier, prize, min_bet, challenge_start
             )
             conn.commit()
     except Exception as e:
@@ -351,6 +939,65 @@ def get_all_completed_slot_challenges():
     finally:
         release_db_connection(conn)
 
+TIP_LOG_EXPORT_COLUMNS = ("export_id", "user_id", "username", "amount", "tip_type", "month", "year", "tipped_at")
+CHALLENGE_LOG_EXPORT_COLUMNS = (
+    "export_id", "challenge_id", "game", "game_identifier", "winner_uid", "winner_username", "multiplier",
+    "bet", "payout", "required_multiplier", "prize", "min_bet", "challenge_start",
+)
+
+# Month shard key of a log row, matching _tip_period_key / _challenge_period_key in cogs/datamanager.py
+TIP_LOG_PERIOD_SQL = """
+    CASE
+        WHEN year IS NOT NULL AND month IS NOT NULL THEN year::text || '-' || lpad(month::text, 2, '0')
+        WHEN tipped_at IS NOT NULL THEN to_char(tipped_at, 'YYYY-MM')
+        ELSE 'unknown'
+    END
+"""
+CHALLENGE_LOG_PERIOD_SQL = "COALESCE(to_char(challenge_start, 'YYYY-MM'), 'unknown')"
+
+def _fetch_export_rows(table, columns, where_sql, params, description):
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {', '.join(columns)} FROM {table} WHERE {where_sql} ORDER BY export_id;",
+                params
+            )
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+    except Exception as e:
+        logger.error(f"Error fetching {description}: {e}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+def get_tip_logs_since(export_id=0):
+    """Return manualtips rows with export_id greater than the given watermark (None on error)."""
+    return _fetch_export_rows(
+        "manualtips", TIP_LOG_EXPORT_COLUMNS, "export_id > %s", (export_id,),
+        f"tip logs since export_id {export_id}"
+    )
+
+def get_tip_logs_for_period(period_key):
+    """Return every manualtips row of one month shard ("YYYY-MM" or "unknown"), None on error."""
+    return _fetch_export_rows(
+        "manualtips", TIP_LOG_EXPORT_COLUMNS, f"{TIP_LOG_PERIOD_SQL} = %s", (period_key,),
+        f"tip logs for {period_key}"
+    )
+
+def get_completed_slot_challenges_since(export_id=0):
+    """Return slot_challenge_logs rows with export_id greater than the given watermark (None on error)."""
+    return _fetch_export_rows(
+        "slot_challenge_logs", CHALLENGE_LOG_EXPORT_COLUMNS, "export_id > %s", (export_id,),
+        f"completed slot challenges since export_id {export_id}"
+    )
+
+def get_completed_slot_challenges_for_period(period_key):
+    """Return every slot_challenge_logs row of one month shard ("YYYY-MM" or "unknown"), None on error."""
+    return _fetch_export_rows(
+        "slot_challenge_logs", CHALLENGE_LOG_EXPORT_COLUMNS, f"{CHALLENGE_LOG_PERIOD_SQL} = %s", (period_key,),
+        f"completed slot challenges for {period_key}"
+    )
+
 def get_user_slot_challenge_stats(user_id, month=None, year=None):
     """Return all-time and optional month-specific slot challenge completion stats for one user."""
     conn = get_db_connection()
@@ -465,6 +1112,19 @@ def get_monthly_totals():
     finally:
         release_db_connection(conn)
 
+def get_monthly_total_periods():
+    """(year, month) pairs that already have monthly totals, or None on error."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT year, month FROM monthly_totals;")
+            return {(row[0], row[1]) for row in cur.fetchall()}
+    except Exception as e:
+        logger.error(f"Error loading monthly total periods: {e}")
+        return None
+    finally:
+        release_db_connection(conn)
+
 def backfill_monthly_totals_for_date(year, month, total_wager, weighted_wager):
     """Backfill monthly totals for a specific year/month"""
     conn = get_db_connection()
@@ -497,112 +1157,196 @@ def backfill_monthly_totals_for_date(year, month, total_wager, weighted_wager):
     finally:
         release_db_connection(conn)
 
+def get_closed_period_response(cache_key):
+    """Load a stored affiliate API response for a finished window, or None if not stored."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT payload FROM affiliate_period_cache WHERE cache_key = %s;", (cache_key,))
+            result = cur.fetchone()
+            return result[0] if result else None
+    except Exception as e:
+        logger.error(f"Error loading closed period response '{cache_key}': {e}")
+        return None
+    finally:
+        release_db_connection(conn)
 
-def _ensure_checkin_tables(cur):
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS user_checkins (
-            discord_user_id BIGINT PRIMARY KEY,
-            streak_days INTEGER NOT NULL DEFAULT 0,
-            balance NUMERIC(12, 2) NOT NULL DEFAULT 0,
-            last_checkin_date DATE,
-            withdrawal_hold_amount NUMERIC(12, 2) NOT NULL DEFAULT 0,
-            withdrawal_hold_created_at TIMESTAMPTZ,
-            total_earned NUMERIC(12, 2) NOT NULL DEFAULT 0,
-            total_withdrawn NUMERIC(12, 2) NOT NULL DEFAULT 0,
-            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        );
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS daily_checkins (
-            id BIGSERIAL PRIMARY KEY,
-            discord_user_id BIGINT NOT NULL,
-            checkin_date DATE NOT NULL,
-            streak_days INTEGER NOT NULL,
-            reward_amount NUMERIC(12, 2) NOT NULL,
-            balance_after NUMERIC(12, 2) NOT NULL,
-            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-            UNIQUE(discord_user_id, checkin_date)
-        );
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS checkin_withdrawals (
-            withdrawal_id UUID PRIMARY KEY,
-            discord_user_id BIGINT NOT NULL,
-            amount NUMERIC(12, 2) NOT NULL,
-            status TEXT NOT NULL,
-            roobet_uid TEXT,
-            roobet_username TEXT,
-            error_message TEXT,
-            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        );
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS checkin_coinflip_logs (
-            id BIGSERIAL PRIMARY KEY,
-            discord_user_id BIGINT NOT NULL,
-            wager_amount NUMERIC(12, 2) NOT NULL,
-            player_choice TEXT NOT NULL,
-            outcome TEXT NOT NULL,
-            payout_multiplier NUMERIC(6, 3) NOT NULL,
-            payout_amount NUMERIC(12, 2) NOT NULL,
-            net_amount NUMERIC(12, 2) NOT NULL,
-            balance_before NUMERIC(12, 2) NOT NULL,
-            balance_after NUMERIC(12, 2) NOT NULL,
-            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        );
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS checkin_random_drops (
-            id BIGSERIAL PRIMARY KEY,
-            drop_date DATE NOT NULL UNIQUE,
-            scheduled_for TIMESTAMPTZ NOT NULL,
-            reward_amount NUMERIC(12, 2) NOT NULL DEFAULT 1.50,
-            max_claims INTEGER NOT NULL DEFAULT 3,
-            status TEXT NOT NULL DEFAULT 'scheduled',
-            message_channel_id BIGINT,
-            message_id BIGINT,
-            posted_at TIMESTAMPTZ,
-            completed_at TIMESTAMPTZ,
-            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        );
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS checkin_random_drop_claims (
-            id BIGSERIAL PRIMARY KEY,
-            drop_id BIGINT NOT NULL REFERENCES checkin_random_drops(id) ON DELETE CASCADE,
-            discord_user_id BIGINT NOT NULL,
-            claimed_amount NUMERIC(12, 2) NOT NULL,
-            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-            UNIQUE(drop_id, discord_user_id)
-        );
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS gtb_payout_logs (
-            id BIGSERIAL PRIMARY KEY,
-            discord_user_id BIGINT NOT NULL,
-            display_name TEXT,
-            payout_amount NUMERIC(12, 2) NOT NULL,
-            placement INTEGER NOT NULL,
-            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        );
-        """
-    )
+def save_closed_period_response(cache_key, start_date, end_date, game_identifiers, categories, payload):
+    """Store the full affiliate API response for a finished window (immutable once written)."""
+    rows = payload.get("data", []) if isinstance(payload, dict) else payload
+    row_count = len(rows) if isinstance(rows, list) else 0
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO affiliate_period_cache
+                    (cache_key, start_date, end_date, game_identifiers, categories, payload, row_count, fetched_at)
+                VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s, %s)
+                ON CONFLICT (cache_key) DO NOTHING;
+                """,
+                (cache_key, start_date, end_date, game_identifiers, categories, json.dumps(payload), row_count, datetime.now(dt.UTC))
+            )
+            conn.commit()
+            return cur.rowcount > 0
+    except Exception as e:
+        logger.error(f"Error saving closed period response '{cache_key}': {e}")
+        return False
+    finally:
+        release_db_connection(conn)
+
+def get_rolled_up_wager_months():
+    """Return the set of (year, month) whose per-user wagers are already stored."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT year, month FROM wager_rollup_months;")
+            return {(year, month) for year, month in cur.fetchall()}
+    except Exception as e:
+        logger.error(f"Error loading rolled up wager months: {e}")
+        return set()
+    finally:
+        release_db_connection(conn)
+
+def save_user_monthly_wagers(year, month, total_rows, weighted_rows):
+    """
+    Store one finished month of per-user affiliate rows (total + weighted) and mark it rolled up.
+    Rows use the affiliate API shape (uid, username, wagered, weightedWagered, highestMultiplier, ...).
+    """
+    users = {}
+    for entry in total_rows:
+        uid = entry.get("uid")
+        if uid is None:
+            continue
+        users[str(uid)] = {
+            "username": entry.get("username"),
+            "wagered": entry.get("wagered", 0) or 0,
+            "sessions": entry.get("sessions", 0) or 0,
+            "payout": entry.get("payout", 0) or 0,
+            "net": entry.get("net", 0) or 0,
+            "weighted_wagered": None,
+            "weighted_sessions": None,
+            "highest_multiplier": None,
+        }
+    for entry in weighted_rows:
+        uid = entry.get("uid")
+        if uid is None:
+            continue
+        row = users.setdefault(str(uid), {
+            "username": entry.get("username"),
+            "wagered": None,
+            "sessions": None,
+            "payout": None,
+            "net": None,
+        })
+        row["username"] = row.get("username") or entry.get("username")
+        row["weighted_wagered"] = entry.get("weightedWagered", 0) or 0
+        row["weighted_sessions"] = entry.get("sessions", 0) or 0
+        highest = entry.get("highestMultiplier")
+        row["highest_multiplier"] = json.dumps(highest) if isinstance(highest, dict) else None
+
+    values = [
+        (
+            year, month, uid, row["username"], row["wagered"], row["sessions"], row["payout"], row["net"],
+            row["weighted_wagered"], row["weighted_sessions"], row["highest_multiplier"],
+        )
+        for uid, row in users.items()
+    ]
+
+    conn = get_db_connection()
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM user_monthly_wagers WHERE year = %s AND month = %s;", (year, month))
+            if values:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO user_monthly_wagers (
+                        year, month, user_id, username, wagered, sessions, payout, net,
+                        weighted_wagered, weighted_sessions, highest_multiplier
+                    ) VALUES %s;
+                    """,
+                    values,
+                    template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb)",
+                )
+            cur.execute(
+                """
+                INSERT INTO wager_rollup_months (year, month, user_count, rolled_up_at)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (year, month) DO UPDATE SET
+                    user_count = EXCLUDED.user_count,
+                    rolled_up_at = EXCLUDED.rolled_up_at;
+                """,
+                (year, month, len(values), datetime.now(dt.UTC))
+            )
+        conn.commit()
+        logger.info(f"Rolled up per-user wagers for {year}-{month:02d}: {len(values)} users")
+        return True
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error saving per-user wagers for {year}-{month:02d}: {e}")
+        return False
+    finally:
+        conn.autocommit = True
+        release_db_connection(conn)
+
+def get_lifetime_user_wagers():
+    """
+    Sum every rolled-up month per user.
+    Returns (total_rows, weighted_rows) in the affiliate API row shape so they can be merged with live data.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                    user_id,
+                    (array_agg(username ORDER BY year DESC, month DESC))[1] AS username,
+                    SUM(wagered),
+                    SUM(sessions),
+                    SUM(payout),
+                    SUM(net),
+                    COUNT(wagered),
+                    SUM(weighted_wagered),
+                    SUM(weighted_sessions),
+                    COUNT(weighted_wagered),
+                    (array_agg(highest_multiplier ORDER BY COALESCE((highest_multiplier->>'multiplier')::numeric, 0) DESC)
+                        FILTER (WHERE highest_multiplier IS NOT NULL))[1]
+                FROM user_monthly_wagers
+                GROUP BY user_id;
+                """
+            )
+            total_rows = []
+            weighted_rows = []
+            for (
+                user_id, username, wagered, sessions, payout, net, total_months,
+                weighted_wagered, weighted_sessions, weighted_months, highest_multiplier,
+            ) in cur.fetchall():
+                if total_months:
+                    total_rows.append({
+                        "uid": user_id,
+                        "username": username,
+                        "wagered": float(wagered or 0),
+                        "sessions": int(sessions or 0),
+                        "payout": float(payout or 0),
+                        "net": float(net or 0),
+                    })
+                if weighted_months:
+                    weighted_rows.append({
+                        "uid": user_id,
+                        "username": username,
+                        "weightedWagered": float(weighted_wagered or 0),
+                        "sessions": int(weighted_sessions or 0),
+                        "highestMultiplier": highest_multiplier or {},
+                    })
+            return total_rows, weighted_rows
+    except Exception as e:
+        logger.error(f"Error loading lifetime per-user wagers: {e}")
+        raise
+    finally:
+        release_db_connection(conn)
 
 
 def _get_checkin_random_drop_claims(cur, drop_id):
@@ -672,6 +1416,11 @@ def _settle_checkin_random_drop(cur, drop, now_utc):
                 """,
                 (payout_amount, int(claim["id"])),
             )
+            _add_to_user_vault_totals(
+                cur,
+                claim["discord_user_id"],
+                flash_drop_earnings=payout_amount - Decimal(str(claim.get("claimed_amount", 0))),
+            )
 
             row = _get_or_create_checkin_row(cur, int(claim["discord_user_id"]))
             current_balance = Decimal(row[1] or 0)
@@ -756,7 +1505,6 @@ def get_or_create_daily_checkin_random_drop(now=None, reward_amount=1.50, max_cl
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             cur.execute(
                 """
                 SELECT
@@ -834,7 +1582,6 @@ def get_checkin_random_drop_by_message(message_id):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             cur.execute(
                 """
                 SELECT
@@ -869,7 +1616,6 @@ def mark_checkin_random_drop_posted(drop_id, channel_id, message_id):
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             cur.execute(
                 """
                 UPDATE checkin_random_drops
@@ -921,7 +1667,6 @@ def expire_stale_checkin_random_drops(now=None, expiry_minutes=3):
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             cur.execute(
                 """
                 SELECT
@@ -996,7 +1741,6 @@ def process_checkin_random_drop_claim(message_id, discord_user_id, now=None, exp
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             cur.execute(
                 """
                 SELECT
@@ -1101,31 +1845,143 @@ def process_checkin_random_drop_claim(message_id, discord_user_id, now=None, exp
 
 
 def _get_or_create_checkin_row(cur, discord_user_id):
+    _execute_hot(cur, "checkin_row_create", (str(discord_user_id),))
+    _execute_hot(cur, "checkin_row_lock", (str(discord_user_id),))
+    return cur.fetchone()
+
+
+USER_VAULT_TOTAL_COLUMNS = (
+    "flash_drop_earnings",
+    "coinflip_bets",
+    "coinflip_wins",
+    "coinflip_losses",
+    "coinflip_wagered",
+    "coinflip_net",
+    "gtb_earnings",
+)
+
+# Per-user totals recomputed from the ledger tables; used to rebuild and verify user_vault_totals
+_USER_VAULT_TOTALS_FROM_LEDGER = """
+    SELECT
+        discord_user_id,
+        SUM(flash_drop_earnings),
+        SUM(coinflip_bets),
+        SUM(coinflip_wins),
+        SUM(coinflip_losses),
+        SUM(coinflip_wagered),
+        SUM(coinflip_net),
+        SUM(gtb_earnings)
+    FROM (
+        SELECT discord_user_id, claimed_amount AS flash_drop_earnings, 0 AS coinflip_bets, 0 AS coinflip_wins,
+               0 AS coinflip_losses, 0 AS coinflip_wagered, 0 AS coinflip_net, 0 AS gtb_earnings
+        FROM checkin_random_drop_claims
+        UNION ALL
+        SELECT discord_user_id, 0, 1, CASE WHEN net_amount > 0 THEN 1 ELSE 0 END, CASE WHEN net_amount < 0 THEN 1 ELSE 0 END,
+               wager_amount, net_amount, 0
+        FROM checkin_coinflip_logs
+        UNION ALL
+        SELECT discord_user_id, 0, 0, 0, 0, 0, 0, payout_amount
+        FROM gtb_payout_logs
+    ) ledger
+    GROUP BY discord_user_id
+"""
+
+
+def _add_to_user_vault_totals(cur, discord_user_id, **deltas):
+    """Apply deltas to a user's user_vault_totals row; call inside the transaction that writes the ledger row."""
+    columns = [column for column in USER_VAULT_TOTAL_COLUMNS if deltas.get(column)]
+    if not columns:
+        return
     cur.execute(
-        """
-        INSERT INTO user_checkins (discord_user_id)
-        VALUES (%s)
-        ON CONFLICT (discord_user_id) DO NOTHING;
+        f"""
+        INSERT INTO user_vault_totals (discord_user_id, {", ".join(columns)})
+        VALUES (%s, {", ".join(["%s"] * len(columns))})
+        ON CONFLICT (discord_user_id) DO UPDATE SET
+            {", ".join(f"{column} = user_vault_totals.{column} + EXCLUDED.{column}" for column in columns)},
+            updated_at = NOW();
         """,
-        (str(discord_user_id),),
+        (str(discord_user_id), *[deltas[column] for column in columns]),
     )
+
+
+def _get_user_vault_totals(cur, discord_user_id):
     cur.execute(
-        """
-        SELECT
-            streak_days,
-            balance,
-            last_checkin_date,
-            withdrawal_hold_amount,
-            withdrawal_hold_created_at,
-            total_earned,
-            total_withdrawn
-        FROM user_checkins
-        WHERE discord_user_id = %s
-        FOR UPDATE;
-        """,
+        f"SELECT {', '.join(USER_VAULT_TOTAL_COLUMNS)} FROM user_vault_totals WHERE discord_user_id = %s;",
         (str(discord_user_id),),
     )
-    return cur.fetchone()
+    row = cur.fetchone()
+    if row is None:
+        return {column: 0 for column in USER_VAULT_TOTAL_COLUMNS}
+    return dict(zip(USER_VAULT_TOTAL_COLUMNS, row))
+
+
+def rebuild_user_vault_totals():
+    """
+    Recompute user_vault_totals from the ledger tables. The table is locked for the rebuild, so
+    ledger writes that race with it wait and then apply their delta on top of the rebuilt rows.
+    Returns the number of users rebuilt, or None on error.
+    """
+    conn = get_db_connection()
+    try:
+        conn.autocommit = False
+        with conn.cursor() as cur:
+            cur.execute("LOCK TABLE user_vault_totals IN EXCLUSIVE MODE;")
+            cur.execute("DELETE FROM user_vault_totals;")
+            cur.execute(
+                f"""
+                INSERT INTO user_vault_totals (discord_user_id, {", ".join(USER_VAULT_TOTAL_COLUMNS)})
+                {_USER_VAULT_TOTALS_FROM_LEDGER};
+                """
+            )
+            rebuilt = cur.rowcount
+            conn.commit()
+            logger.info(f"Rebuilt user_vault_totals for {rebuilt} users")
+            return rebuilt
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error rebuilding user_vault_totals: {e}")
+        return None
+    finally:
+        conn.autocommit = True
+        release_db_connection(conn)
+
+
+def verify_user_vault_totals():
+    """
+    Compare user_vault_totals with totals recomputed from the ledger tables.
+    Returns a list of {"discord_user_id", "column", "stored", "expected"} mismatches, or None on error.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT
+                    COALESCE(ledger.discord_user_id, totals.discord_user_id),
+                    {", ".join(f"COALESCE(totals.{column}, 0)" for column in USER_VAULT_TOTAL_COLUMNS)},
+                    {", ".join(f"COALESCE(ledger.{column}, 0)" for column in USER_VAULT_TOTAL_COLUMNS)}
+                FROM ({_USER_VAULT_TOTALS_FROM_LEDGER}) AS ledger (discord_user_id, {", ".join(USER_VAULT_TOTAL_COLUMNS)})
+                FULL OUTER JOIN user_vault_totals totals ON totals.discord_user_id = ledger.discord_user_id;
+                """
+            )
+            width = len(USER_VAULT_TOTAL_COLUMNS)
+            mismatches = []
+            for row in cur.fetchall():
+                stored, expected = row[1:1 + width], row[1 + width:]
+                for column, stored_value, expected_value in zip(USER_VAULT_TOTAL_COLUMNS, stored, expected):
+                    if Decimal(stored_value) != Decimal(expected_value):
+                        mismatches.append({
+                            "discord_user_id": int(row[0]),
+                            "column": column,
+                            "stored": float(stored_value),
+                            "expected": float(expected_value),
+                        })
+            return mismatches
+    except Exception as e:
+        logger.error(f"Error verifying user_vault_totals: {e}")
+        return None
+    finally:
+        release_db_connection(conn)
 
 
 def _get_effective_checkin_streak(streak_days, last_checkin_date, today=None):
@@ -1143,7 +1999,6 @@ def process_daily_checkin(discord_user_id):
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             row = _get_or_create_checkin_row(cur, discord_user_id)
 
             streak_days = int(row[0] or 0)
@@ -1179,13 +2034,9 @@ def process_daily_checkin(discord_user_id):
             new_balance = (balance + reward).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
             new_total_earned = (total_earned + reward).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
 
-            cur.execute(
-                """
-                INSERT INTO daily_checkins (discord_user_id, checkin_date, streak_days, reward_amount, balance_after)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (discord_user_id, checkin_date) DO NOTHING
-                RETURNING id;
-                """,
+            _execute_hot(
+                cur,
+                "daily_checkin_insert",
                 (str(discord_user_id), today, streak_days, reward, new_balance),
             )
             inserted = cur.fetchone()
@@ -1193,7 +2044,6 @@ def process_daily_checkin(discord_user_id):
                 conn.rollback()
                 conn.autocommit = False
                 with conn.cursor() as retry_cur:
-                    _ensure_checkin_tables(retry_cur)
                     retry_cur.execute(
                         """
                         SELECT
@@ -1219,17 +2069,9 @@ def process_daily_checkin(discord_user_id):
                         "total_withdrawn": float(Decimal(retry_row[4] or 0)),
                     }
 
-            cur.execute(
-                """
-                UPDATE user_checkins
-                SET
-                    streak_days = %s,
-                    balance = %s,
-                    last_checkin_date = %s,
-                    total_earned = %s,
-                    updated_at = NOW()
-                WHERE discord_user_id = %s;
-                """,
+            _execute_hot(
+                cur,
+                "daily_checkin_apply",
                 (streak_days, new_balance, today, new_total_earned, str(discord_user_id)),
             )
             conn.commit()
@@ -1262,7 +2104,6 @@ def reserve_checkin_withdrawal(
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             row = _get_or_create_checkin_row(cur, discord_user_id)
 
             streak_days = int(row[0] or 0)
@@ -1416,7 +2257,6 @@ def finalize_checkin_withdrawal(
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             row = _get_or_create_checkin_row(cur, discord_user_id)
 
             balance = Decimal(row[1] or 0)
@@ -1544,7 +2384,6 @@ def edit_checkin_balance(discord_user_id, amount_delta):
 
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             row = _get_or_create_checkin_row(cur, discord_user_id)
 
             streak_days = int(row[0] or 0)
@@ -1599,30 +2438,11 @@ def get_checkin_account_summary(discord_user_id):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             row = _get_or_create_checkin_row(cur, discord_user_id)
-
-            cur.execute(
-                """
-                SELECT COALESCE(SUM(claimed_amount), 0)
-                FROM checkin_random_drop_claims
-                WHERE discord_user_id = %s;
-                """,
-                (str(discord_user_id),),
-            )
-            flash_drop_earnings = float(Decimal(cur.fetchone()[0] or 0))
-
-            cur.execute(
-                """
-                SELECT COALESCE(SUM(net_amount), 0)
-                FROM checkin_coinflip_logs
-                WHERE discord_user_id = %s;
-                """,
-                (str(discord_user_id),),
-            )
-            gamble_earnings = float(Decimal(cur.fetchone()[0] or 0))
-
-            gtb_earnings = get_gtb_earnings(discord_user_id)
+            totals = _get_user_vault_totals(cur, discord_user_id)
+            flash_drop_earnings = float(Decimal(totals["flash_drop_earnings"] or 0))
+            gamble_earnings = float(Decimal(totals["coinflip_net"] or 0))
+            gtb_earnings = float(Decimal(totals["gtb_earnings"] or 0))
 
             conn.commit()
 
@@ -1666,8 +2486,6 @@ def get_checkin_withdrawal_logs(limit=None, statuses=None):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
-
             query = """
                 SELECT roobet_username, amount, status, created_at, error_message
                 FROM checkin_withdrawals
@@ -1712,16 +2530,8 @@ def get_gtb_earnings(discord_user_id):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT COALESCE(SUM(payout_amount), 0)
-                FROM gtb_payout_logs
-                WHERE discord_user_id = %s;
-                """,
-                (str(discord_user_id),),
-            )
-            result = cur.fetchone()
-            return float(Decimal(result[0] or 0))
+            totals = _get_user_vault_totals(cur, discord_user_id)
+            return float(Decimal(totals["gtb_earnings"] or 0))
     except Exception as e:
         logger.error(f"Error getting GTB earnings for {discord_user_id}: {e}")
         return 0.0
@@ -1735,15 +2545,16 @@ def backfill_gtb_payouts(payouts):
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             for user_id, display_name, payout_amount, placement in payouts:
+                payout_dec = Decimal(str(payout_amount)).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
                 cur.execute(
                     """
                     INSERT INTO gtb_payout_logs (discord_user_id, display_name, payout_amount, placement)
                     VALUES (%s, %s, %s, %s);
                     """,
-                    (str(user_id), display_name, Decimal(str(payout_amount)).quantize(Decimal("0.01"), rounding=ROUND_DOWN), int(placement)),
+                    (str(user_id), display_name, payout_dec, int(placement)),
                 )
+                _add_to_user_vault_totals(cur, user_id, gtb_earnings=payout_dec)
             conn.commit()
             logger.info(f"Backfilled {len(payouts)} GTB payouts")
     except Exception as e:
@@ -1755,8 +2566,6 @@ def backfill_gtb_payouts(payouts):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
-
             query = """
                 SELECT roobet_username, amount, status, created_at, error_message
                 FROM checkin_withdrawals
@@ -1801,8 +2610,6 @@ def process_coinflip_bet(discord_user_id, wager_amount, player_choice):
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
-
             choice = str(player_choice or "").strip().lower()
             if choice not in {"heads", "tails"}:
                 conn.commit()
@@ -1869,6 +2676,15 @@ def process_coinflip_bet(discord_user_id, wager_amount, player_choice):
                     balance_after,
                 ),
             )
+            _add_to_user_vault_totals(
+                cur,
+                discord_user_id,
+                coinflip_bets=1,
+                coinflip_wins=1 if net_amount > 0 else 0,
+                coinflip_losses=1 if net_amount < 0 else 0,
+                coinflip_wagered=wager_dec,
+                coinflip_net=net_amount,
+            )
 
             conn.commit()
             return {
@@ -1897,36 +2713,13 @@ def get_coinflip_pnl_summary(discord_user_id):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
-            cur.execute(
-                """
-                SELECT
-                    COUNT(*) AS total_bets,
-                    COALESCE(SUM(net_amount), 0) AS total_net_amount,
-                    COALESCE(SUM(wager_amount), 0) AS total_wagered,
-                    COALESCE(SUM(CASE WHEN net_amount > 0 THEN 1 ELSE 0 END), 0) AS total_wins,
-                    COALESCE(SUM(CASE WHEN net_amount < 0 THEN 1 ELSE 0 END), 0) AS total_losses
-                FROM checkin_coinflip_logs
-                WHERE discord_user_id = %s;
-                """,
-                (str(discord_user_id),),
-            )
-            row = cur.fetchone()
-            if row is None:
-                return {
-                    "total_bets": 0,
-                    "total_net_amount": 0.0,
-                    "total_wagered": 0.0,
-                    "total_wins": 0,
-                    "total_losses": 0,
-                }
-
+            totals = _get_user_vault_totals(cur, discord_user_id)
             return {
-                "total_bets": int(row[0] or 0),
-                "total_net_amount": float(Decimal(row[1] or 0)),
-                "total_wagered": float(Decimal(row[2] or 0)),
-                "total_wins": int(row[3] or 0),
-                "total_losses": int(row[4] or 0),
+                "total_bets": int(totals["coinflip_bets"] or 0),
+                "total_net_amount": float(Decimal(totals["coinflip_net"] or 0)),
+                "total_wagered": float(Decimal(totals["coinflip_wagered"] or 0)),
+                "total_wins": int(totals["coinflip_wins"] or 0),
+                "total_losses": int(totals["coinflip_losses"] or 0),
             }
     except Exception as e:
         logger.error(f"Error loading coinflip pnl summary for {discord_user_id}: {e}")
@@ -1935,89 +2728,85 @@ def get_coinflip_pnl_summary(discord_user_id):
         release_db_connection(conn)
 
 
-def get_top_checkin_balances(limit=10):
+def get_top_checkin_balances(limit=10, offset=0):
+    """
+    Vault balance leaderboard with each user's earnings breakdown (from user_vault_totals), in one query.
+    limit=None returns every user with a balance; offset pages through the ranking.
+    """
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             cur.execute(
                 """
+                WITH ranked AS (
+                    SELECT
+                        discord_user_id,
+                        balance,
+                        streak_days,
+                        total_earned,
+                        total_withdrawn,
+                        last_checkin_date,
+                        ROW_NUMBER() OVER (
+                            ORDER BY
+                                balance DESC,
+                                CASE
+                                    WHEN last_checkin_date IS NOT NULL
+                                         AND last_checkin_date >= ((NOW() AT TIME ZONE 'UTC')::date - 1)
+                                    THEN streak_days
+                                    ELSE 0
+                                END DESC,
+                                updated_at ASC,
+                                discord_user_id ASC
+                        ) AS position
+                    FROM user_checkins
+                    WHERE balance > 0
+                ),
+                page AS (
+                    SELECT * FROM ranked
+                    ORDER BY position
+                    LIMIT %s OFFSET %s
+                )
                 SELECT
-                    discord_user_id,
-                    balance,
-                    streak_days,
-                    total_earned,
-                    total_withdrawn,
-                    last_checkin_date
-                FROM user_checkins
-                WHERE balance > 0
-                ORDER BY
-                    balance DESC,
-                    CASE
-                        WHEN last_checkin_date IS NOT NULL
-                             AND last_checkin_date >= ((NOW() AT TIME ZONE 'UTC')::date - 1)
-                        THEN streak_days
-                        ELSE 0
-                    END DESC,
-                    updated_at ASC
-                LIMIT %s;
+                    page.discord_user_id,
+                    page.balance,
+                    page.streak_days,
+                    page.total_earned,
+                    page.total_withdrawn,
+                    page.last_checkin_date,
+                    page.position,
+                    COALESCE(totals.flash_drop_earnings, 0),
+                    COALESCE(totals.coinflip_net, 0),
+                    COALESCE(totals.gtb_earnings, 0)
+                FROM page
+                LEFT JOIN user_vault_totals totals ON totals.discord_user_id = page.discord_user_id
+                ORDER BY page.position;
                 """,
-                (int(limit),),
+                (int(limit) if limit is not None else None, int(offset)),
             )
             rows = cur.fetchall()
 
             result = []
             for row in rows:
-                discord_user_id = int(row[0])
-                balance = float(Decimal(row[1] or 0))
-                streak_days = _get_effective_checkin_streak(int(row[2] or 0), row[5])
                 checkin_total_earned = float(Decimal(row[3] or 0))
-                total_withdrawn = float(Decimal(row[4] or 0))
-
-                cur.execute(
-                    """
-                    SELECT COALESCE(SUM(claimed_amount), 0)
-                    FROM checkin_random_drop_claims
-                    WHERE discord_user_id = %s;
-                    """,
-                    (str(discord_user_id),),
-                )
-                flash_drop_earnings = float(Decimal(cur.fetchone()[0] or 0))
-
-                cur.execute(
-                    """
-                    SELECT COALESCE(SUM(net_amount), 0)
-                    FROM checkin_coinflip_logs
-                    WHERE discord_user_id = %s;
-                    """,
-                    (str(discord_user_id),),
-                )
-                gamble_earnings = float(Decimal(cur.fetchone()[0] or 0))
-
-                cur.execute(
-                    """
-                    SELECT COALESCE(SUM(payout_amount), 0)
-                    FROM gtb_payout_logs
-                    WHERE discord_user_id = %s;
-                    """,
-                    (str(discord_user_id),),
-                )
-                gtb_earnings = float(Decimal(cur.fetchone()[0] or 0))
+                flash_drop_earnings = float(Decimal(row[7] or 0))
+                gamble_earnings = float(Decimal(row[8] or 0))
+                gtb_earnings = float(Decimal(row[9] or 0))
 
                 checkin_earnings = checkin_total_earned - flash_drop_earnings
                 total_earnings = checkin_earnings + flash_drop_earnings + gamble_earnings + gtb_earnings
 
                 result.append(
                     {
-                        "discord_user_id": discord_user_id,
-                        "balance": balance,
-                        "streak_days": streak_days,
+                        "rank": int(row[6]),
+                        "discord_user_id": int(row[0]),
+                        "balance": float(Decimal(row[1] or 0)),
+                        "streak_days": _get_effective_checkin_streak(int(row[2] or 0), row[5]),
                         "checkin_earnings": round(checkin_earnings, 2),
                         "gamble_earnings": round(gamble_earnings, 2),
                         "flash_drop_earnings": round(flash_drop_earnings, 2),
                         "gtb_earnings": round(gtb_earnings, 2),
                         "total_earnings": round(total_earnings, 2),
-                        "total_withdrawn": total_withdrawn,
+                        "total_withdrawn": float(Decimal(row[4] or 0)),
                         "last_checkin_date": str(row[5]) if row[5] else None,
                     }
                 )
@@ -2032,12 +2821,25 @@ def get_top_checkin_balances(limit=10):
         release_db_connection(conn)
 
 
+def count_checkin_balance_holders():
+    """Number of users on the vault balance leaderboard (balance > 0), for paging."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM user_checkins WHERE balance > 0;")
+            return int(cur.fetchone()[0])
+    except Exception as e:
+        logger.error(f"Error counting check-in balance holders: {e}")
+        return 0
+    finally:
+        release_db_connection(conn)
+
+
 def resolve_checkin_withdrawal_hold(discord_user_id, action, note=None):
     conn = get_db_connection()
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
             row = _get_or_create_checkin_row(cur, discord_user_id)
 
             balance = Decimal(row[1] or 0)
@@ -2167,8 +2969,6 @@ def add_funds_to_vault(discord_user_id, amount, gtb_placement=None, gtb_display_
     try:
         conn.autocommit = False
         with conn.cursor() as cur:
-            _ensure_checkin_tables(cur)
-
             amount_dec = Decimal(str(amount)).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
 
             if gtb_placement is not None:
@@ -2179,6 +2979,7 @@ def add_funds_to_vault(discord_user_id, amount, gtb_placement=None, gtb_display_
                     """,
                     (str(discord_user_id), gtb_display_name, amount_dec, int(gtb_placement)),
                 )
+                _add_to_user_vault_totals(cur, discord_user_id, gtb_earnings=amount_dec)
 
             cur.execute(
                 """
@@ -0,0 +1,44 @@
+import asyncio
+import functools
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Blocking psycopg2 work runs on its own bounded pool of threads, kept below the connection
+# pool size so queued queries wait here instead of inside getconn(), and a burst of slow
+# queries can't starve unrelated to_thread work (or the event loop) of threads.
+DB_EXECUTOR_WORKERS = max(1, db.DB_POOL_MAX_CONNECTIONS // 2)
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+# Connection handles must stay on the thread that uses them, so these are not mirrored
+_NOT_MIRRORED = {"get_db_connection", "release_db_connection"}
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking DB callable on the DB executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(func, *args, **kwargs))
+
+
+def close_db_executor():
+    """Stop accepting new DB work; queries already running are allowed to finish."""
+    _db_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _make_async(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+    return wrapper
+
+
+# Awaitable twin of every public db.py function, same name and signature:
+#   await db_async.load_sent_tips()  instead of  load_sent_tips()
+for _name, _func in inspect.getmembers(db, inspect.isfunction):
+    if _func.__module__ == db.__name__ and not _name.startswith("_") and _name not in _NOT_MIRRORED:
+        globals()[_name] = _make_async(_func)
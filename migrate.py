@@ -0,0 +1,96 @@
+import hashlib
+import logging
+import os
+import re
+
+from db import get_db_connection, release_db_connection
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILENAME = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+
+# Arbitrary constant shared by every process running migrations against this database
+MIGRATION_LOCK_ID = 724_310_001
+
+
+class MigrationError(Exception):
+    """Raised when a migration fails; the failing migration is rolled back."""
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Return [(version, name, sql, checksum)] for migrations/NNNN_name.sql, ordered by version."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILENAME.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+            sql = f.read()
+        migrations.append((int(match.group(1)), match.group(2), sql, hashlib.sha256(sql.encode("utf-8")).hexdigest()))
+
+    versions = [version for version, _, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def apply_migrations(directory=MIGRATIONS_DIR):
+    """
+    Apply every migration not yet recorded in schema_migrations, each in its own transaction.
+    A session advisory lock keeps two bot processes from migrating at the same time.
+    Returns the list of versions applied.
+    """
+    migrations = load_migrations(directory)
+    conn = get_db_connection()
+    applied_now = []
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+            try:
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        checksum TEXT NOT NULL,
+                        applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+                    );
+                    """
+                )
+                cur.execute("SELECT version, checksum FROM schema_migrations;")
+                applied = dict(cur.fetchall())
+
+                conn.autocommit = False
+                for version, name, sql, checksum in migrations:
+                    if version in applied:
+                        if applied[version] != checksum:
+                            logger.warning(f"[Migrations] {version:04d}_{name}.sql changed after it was applied; add a new migration instead")
+                        continue
+                    try:
+                        cur.execute(sql)
+                        cur.execute(
+                            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s);",
+                            (version, name, checksum)
+                        )
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        raise MigrationError(f"Migration {version:04d}_{name} failed: {e}") from e
+                    applied_now.append(version)
+                    logger.info(f"[Migrations] Applied {version:04d}_{name}")
+            finally:
+                conn.autocommit = True
+                cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+    finally:
+        release_db_connection(conn)
+
+    if not applied_now:
+        logger.info(f"[Migrations] Schema up to date ({len(migrations)} migrations)")
+    return applied_now
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    apply_migrations()
@@ -0,0 +1,16 @@
+-- Historical monthly wager totals (was setup_monthly_totals.sql + add_total_wager_column.sql)
+CREATE TABLE IF NOT EXISTS monthly_totals (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    total_wager DECIMAL(15,2) DEFAULT 0.00,
+    total_weighted_wager DECIMAL(15,2) DEFAULT 0.00,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (year, month)
+);
+
+-- Older installs created the table before total_wager existed
+ALTER TABLE monthly_totals ADD COLUMN IF NOT EXISTS total_wager DECIMAL(15,2) DEFAULT 0.00;
+ALTER TABLE monthly_totals ADD COLUMN IF NOT EXISTS created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+CREATE INDEX IF NOT EXISTS idx_monthly_totals_date ON monthly_totals (year, month);
+CREATE INDEX IF NOT EXISTS idx_monthly_totals_created_at ON monthly_totals (created_at);
@@ -0,0 +1,84 @@
+-- Vault check-in, withdrawal, coinflip, random drop and GTB payout tables
+-- (was _ensure_checkin_tables, run inside every check-in/vault transaction)
+CREATE TABLE IF NOT EXISTS user_checkins (
+    discord_user_id BIGINT PRIMARY KEY,
+    streak_days INTEGER NOT NULL DEFAULT 0,
+    balance NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    last_checkin_date DATE,
+    withdrawal_hold_amount NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    withdrawal_hold_created_at TIMESTAMPTZ,
+    total_earned NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    total_withdrawn NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS daily_checkins (
+    id BIGSERIAL PRIMARY KEY,
+    discord_user_id BIGINT NOT NULL,
+    checkin_date DATE NOT NULL,
+    streak_days INTEGER NOT NULL,
+    reward_amount NUMERIC(12, 2) NOT NULL,
+    balance_after NUMERIC(12, 2) NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE(discord_user_id, checkin_date)
+);
+
+CREATE TABLE IF NOT EXISTS checkin_withdrawals (
+    withdrawal_id UUID PRIMARY KEY,
+    discord_user_id BIGINT NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    status TEXT NOT NULL,
+    roobet_uid TEXT,
+    roobet_username TEXT,
+    error_message TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS checkin_coinflip_logs (
+    id BIGSERIAL PRIMARY KEY,
+    discord_user_id BIGINT NOT NULL,
+    wager_amount NUMERIC(12, 2) NOT NULL,
+    player_choice TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    payout_multiplier NUMERIC(6, 3) NOT NULL,
+    payout_amount NUMERIC(12, 2) NOT NULL,
+    net_amount NUMERIC(12, 2) NOT NULL,
+    balance_before NUMERIC(12, 2) NOT NULL,
+    balance_after NUMERIC(12, 2) NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS checkin_random_drops (
+    id BIGSERIAL PRIMARY KEY,
+    drop_date DATE NOT NULL UNIQUE,
+    scheduled_for TIMESTAMPTZ NOT NULL,
+    reward_amount NUMERIC(12, 2) NOT NULL DEFAULT 1.50,
+    max_claims INTEGER NOT NULL DEFAULT 3,
+    status TEXT NOT NULL DEFAULT 'scheduled',
+    message_channel_id BIGINT,
+    message_id BIGINT,
+    posted_at TIMESTAMPTZ,
+    completed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS checkin_random_drop_claims (
+    id BIGSERIAL PRIMARY KEY,
+    drop_id BIGINT NOT NULL REFERENCES checkin_random_drops(id) ON DELETE CASCADE,
+    discord_user_id BIGINT NOT NULL,
+    claimed_amount NUMERIC(12, 2) NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE(drop_id, discord_user_id)
+);
+
+CREATE TABLE IF NOT EXISTS gtb_payout_logs (
+    id BIGSERIAL PRIMARY KEY,
+    discord_user_id BIGINT NOT NULL,
+    display_name TEXT,
+    payout_amount NUMERIC(12, 2) NOT NULL,
+    placement INTEGER NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
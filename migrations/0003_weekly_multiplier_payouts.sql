@@ -0,0 +1,20 @@
+-- Weekly multiplier leaderboard payouts (was created/altered on every weekly payout run)
+CREATE TABLE IF NOT EXISTS weekly_multiplier_payouts (
+    id SERIAL PRIMARY KEY,
+    week_start DATE NOT NULL,
+    rank INTEGER NOT NULL,
+    user_id VARCHAR(255) NOT NULL,
+    username VARCHAR(255) NOT NULL,
+    prize_amount DECIMAL(10,2) NOT NULL,
+    multiplier DECIMAL(10,2) NOT NULL,
+    game_name VARCHAR(255),
+    wagered DECIMAL(10,2) DEFAULT 0,
+    payout DECIMAL(10,2) DEFAULT 0,
+    paid_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(week_start, rank)
+);
+
+-- Early versions stored user_id as BIGINT and had no wagered/payout columns
+ALTER TABLE weekly_multiplier_payouts ALTER COLUMN user_id TYPE VARCHAR(255);
+ALTER TABLE weekly_multiplier_payouts ADD COLUMN IF NOT EXISTS wagered DECIMAL(10,2) DEFAULT 0;
+ALTER TABLE weekly_multiplier_payouts ADD COLUMN IF NOT EXISTS payout DECIMAL(10,2) DEFAULT 0;
@@ -0,0 +1,11 @@
+-- Affiliate API responses for finished months/weeks (was setup_affiliate_period_cache.sql)
+CREATE TABLE IF NOT EXISTS affiliate_period_cache (
+    cache_key TEXT PRIMARY KEY,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    game_identifiers TEXT,
+    categories TEXT,
+    payload JSONB NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    fetched_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
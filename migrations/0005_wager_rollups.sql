@@ -0,0 +1,23 @@
+-- Per-user monthly wager rollups used to build lifetime wager data incrementally
+CREATE TABLE IF NOT EXISTS user_monthly_wagers (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    username TEXT,
+    wagered DECIMAL(18,2),
+    sessions INTEGER,
+    payout DECIMAL(18,2),
+    net DECIMAL(18,2),
+    weighted_wagered DECIMAL(18,2),
+    weighted_sessions INTEGER,
+    highest_multiplier JSONB,
+    PRIMARY KEY (year, month, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS wager_rollup_months (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    user_count INTEGER NOT NULL DEFAULT 0,
+    rolled_up_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (year, month)
+);
@@ -0,0 +1,6 @@
+-- Insertion-ordered ids so tipLogs/challengeHistory exports only read rows added since the last export
+ALTER TABLE manualtips ADD COLUMN IF NOT EXISTS export_id BIGSERIAL;
+CREATE INDEX IF NOT EXISTS idx_manualtips_export_id ON manualtips (export_id);
+
+ALTER TABLE slot_challenge_logs ADD COLUMN IF NOT EXISTS export_id BIGSERIAL;
+CREATE INDEX IF NOT EXISTS idx_slot_challenge_logs_export_id ON slot_challenge_logs (export_id);
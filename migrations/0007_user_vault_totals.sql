@@ -0,0 +1,42 @@
+-- Per-user running totals for the vault economy, maintained in the same transaction as each
+-- ledger write so /balance, /coinflip and the balance leaderboard don't re-scan the log tables
+CREATE TABLE IF NOT EXISTS user_vault_totals (
+    discord_user_id BIGINT PRIMARY KEY,
+    flash_drop_earnings NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    coinflip_bets INTEGER NOT NULL DEFAULT 0,
+    coinflip_wins INTEGER NOT NULL DEFAULT 0,
+    coinflip_losses INTEGER NOT NULL DEFAULT 0,
+    coinflip_wagered NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    coinflip_net NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    gtb_earnings NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Seed from the existing logs
+INSERT INTO user_vault_totals (
+    discord_user_id, flash_drop_earnings, coinflip_bets, coinflip_wins, coinflip_losses,
+    coinflip_wagered, coinflip_net, gtb_earnings
+)
+SELECT
+    discord_user_id,
+    SUM(flash_drop_earnings),
+    SUM(coinflip_bets),
+    SUM(coinflip_wins),
+    SUM(coinflip_losses),
+    SUM(coinflip_wagered),
+    SUM(coinflip_net),
+    SUM(gtb_earnings)
+FROM (
+    SELECT discord_user_id, claimed_amount AS flash_drop_earnings, 0 AS coinflip_bets, 0 AS coinflip_wins,
+           0 AS coinflip_losses, 0 AS coinflip_wagered, 0 AS coinflip_net, 0 AS gtb_earnings
+    FROM checkin_random_drop_claims
+    UNION ALL
+    SELECT discord_user_id, 0, 1, CASE WHEN net_amount > 0 THEN 1 ELSE 0 END, CASE WHEN net_amount < 0 THEN 1 ELSE 0 END,
+           wager_amount, net_amount, 0
+    FROM checkin_coinflip_logs
+    UNION ALL
+    SELECT discord_user_id, 0, 0, 0, 0, 0, 0, payout_amount
+    FROM gtb_payout_logs
+) ledger
+GROUP BY discord_user_id
+ON CONFLICT (discord_user_id) DO NOTHING;
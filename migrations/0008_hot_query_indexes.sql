@@ -0,0 +1,29 @@
+-- Indexes for the per-user lookups behind /mywager, /profile, milestone payouts and the
+-- check-in withdrawal flow; query_plans.py checks that these queries actually use them.
+-- Plain CREATE INDEX (not CONCURRENTLY) because each migration runs in a transaction.
+
+-- /mywager milestone totals (user + type [+ month/year]) and the milestone username lookup,
+-- which also orders by tipped_at
+CREATE INDEX IF NOT EXISTS idx_manualtips_user_type_period
+    ON manualtips (user_id, tip_type, year, month, tipped_at);
+
+-- load_sent_tips(month, year): the milestone cycle's per-month paid-tier lookup
+CREATE INDEX IF NOT EXISTS idx_milestonetips_period ON milestonetips (year, month);
+
+-- get_user_slot_challenge_stats: only completed challenges (multiplier set) are ever counted
+CREATE INDEX IF NOT EXISTS idx_slot_challenge_logs_winner_completed
+    ON slot_challenge_logs (winner_uid, challenge_start)
+    WHERE multiplier IS NOT NULL;
+
+-- Daily withdrawal limit: successful withdrawals for one user within a day
+CREATE INDEX IF NOT EXISTS idx_checkin_withdrawals_user_status_created
+    ON checkin_withdrawals (discord_user_id, status, created_at);
+
+-- Latest unresolved withdrawal per user (hold resolution)
+CREATE INDEX IF NOT EXISTS idx_checkin_withdrawals_open
+    ON checkin_withdrawals (discord_user_id, updated_at)
+    WHERE status IN ('pending', 'unknown');
+
+-- Withdrawal log listing, filtered by status and ordered by created_at
+CREATE INDEX IF NOT EXISTS idx_checkin_withdrawals_status_created
+    ON checkin_withdrawals (status, created_at);
@@ -0,0 +1,52 @@
+-- Tip rollups maintained by save_tip_log in the same transaction as the manualtips insert.
+-- tip_daily_totals backs /tipstats (windows are whole UTC days plus at most one partial day
+-- read from manualtips); user_monthly_tips backs allTimeTips.json.
+CREATE TABLE IF NOT EXISTS tip_daily_totals (
+    day DATE NOT NULL,
+    tip_type TEXT NOT NULL,
+    amount NUMERIC NOT NULL DEFAULT 0,
+    tip_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, tip_type)
+);
+
+CREATE TABLE IF NOT EXISTS user_monthly_tips (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    tip_type TEXT NOT NULL,
+    username TEXT,
+    amount NUMERIC NOT NULL DEFAULT 0,
+    tip_count INTEGER NOT NULL DEFAULT 0,
+    first_tip TIMESTAMP WITH TIME ZONE,
+    latest_tip TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (year, month, user_id, tip_type)
+);
+
+-- Partial-day edges of the /tipstats windows
+CREATE INDEX IF NOT EXISTS idx_manualtips_tipped_at ON manualtips (tipped_at);
+
+-- Seed from the existing tip history
+INSERT INTO tip_daily_totals (day, tip_type, amount, tip_count)
+SELECT (tipped_at AT TIME ZONE 'UTC')::date, COALESCE(tip_type, 'unknown'), COALESCE(SUM(amount), 0), COUNT(*)
+FROM manualtips
+WHERE tipped_at IS NOT NULL
+GROUP BY 1, 2
+ON CONFLICT (day, tip_type) DO NOTHING;
+
+INSERT INTO user_monthly_tips (year, month, user_id, tip_type, username, amount, tip_count, first_tip, latest_tip)
+SELECT
+    COALESCE(year, EXTRACT(YEAR FROM tipped_at AT TIME ZONE 'UTC')::int),
+    COALESCE(month, EXTRACT(MONTH FROM tipped_at AT TIME ZONE 'UTC')::int),
+    user_id::text,
+    COALESCE(tip_type, 'unknown'),
+    (ARRAY_AGG(username ORDER BY tipped_at DESC NULLS LAST))[1],
+    COALESCE(SUM(amount), 0),
+    COUNT(*),
+    MIN(tipped_at),
+    MAX(tipped_at)
+FROM manualtips
+WHERE user_id IS NOT NULL
+  AND COALESCE(year, EXTRACT(YEAR FROM tipped_at AT TIME ZONE 'UTC')::int) IS NOT NULL
+  AND COALESCE(month, EXTRACT(MONTH FROM tipped_at AT TIME ZONE 'UTC')::int) IS NOT NULL
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (year, month, user_id, tip_type) DO NOTHING;
@@ -0,0 +1,12 @@
+-- One milestone tip per user/tier/month so payouts can INSERT ... ON CONFLICT DO NOTHING
+-- instead of checking first. Drop duplicates left by the old check-then-insert race.
+DELETE FROM milestonetips a
+USING milestonetips b
+WHERE a.ctid > b.ctid
+  AND a.user_id = b.user_id
+  AND a.tier = b.tier
+  AND a.month = b.month
+  AND a.year = b.year;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_milestonetips_user_tier_period
+    ON milestonetips (user_id, tier, month, year);
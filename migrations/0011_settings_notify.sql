@@ -0,0 +1,20 @@
+-- Tell every bot process which settings key changed so in-memory settings caches stay
+-- current, including for edits made by hand in psql (see settings_cache.py)
+CREATE OR REPLACE FUNCTION notify_settings_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('settings_changed', OLD.key);
+        RETURN OLD;
+    END IF;
+    IF TG_OP = 'UPDATE' AND OLD.key IS DISTINCT FROM NEW.key THEN
+        PERFORM pg_notify('settings_changed', OLD.key);
+    END IF;
+    PERFORM pg_notify('settings_changed', NEW.key);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS settings_changed ON settings;
+CREATE TRIGGER settings_changed
+    AFTER INSERT OR UPDATE OR DELETE ON settings
+    FOR EACH ROW EXECUTE FUNCTION notify_settings_changed();
@@ -0,0 +1,31 @@
+-- Durable payout queue (payout_queue.py). Workers claim due jobs with FOR UPDATE SKIP LOCKED;
+-- a claim is only good until available_at, after which another worker may pick the job up.
+-- idempotency_key makes enqueueing the same payout twice a no-op while it is open or done.
+CREATE TABLE IF NOT EXISTS payout_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    lane INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    amount NUMERIC NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    claimed_by TEXT,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    CONSTRAINT payout_jobs_status_check CHECK (status IN ('queued', 'claimed', 'done', 'failed', 'cancelled'))
+);
+
+-- Claim scan: open jobs by lane and due time
+CREATE INDEX IF NOT EXISTS idx_payout_jobs_open
+    ON payout_jobs (lane, available_at, id)
+    WHERE status IN ('queued', 'claimed');
+
+-- Targeted cancellation (blocked users) and per-user lookups
+CREATE INDEX IF NOT EXISTS idx_payout_jobs_kind_user
+    ON payout_jobs (kind, user_id)
+    WHERE status IN ('queued', 'claimed');
@@ -0,0 +1,31 @@
+-- One row per logical tip (tipping.py), written before the Tipping API is called. Retries of
+-- the same idempotency_key reuse its nonce, so an attempt whose outcome was never seen (timeout,
+-- 5xx, crash) can be repeated without paying twice. The nonce only changes after the API has
+-- definitively rejected it (status 'failed'). A rejection that follows an unknown outcome may
+-- mean the tip already went through, so that intent is parked as 'review' and never resent.
+CREATE TABLE IF NOT EXISTS tip_intents (
+    id BIGSERIAL PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    nonce TEXT NOT NULL UNIQUE,
+    to_user_id TEXT NOT NULL,
+    to_username TEXT NOT NULL,
+    amount NUMERIC NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_status_code INTEGER,
+    last_error TEXT,
+    response JSONB,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    CONSTRAINT tip_intents_status_check CHECK (status IN ('pending', 'sent', 'failed', 'unknown', 'review'))
+);
+
+-- Startup reconciliation and /status look at unresolved intents only
+CREATE INDEX IF NOT EXISTS idx_tip_intents_unresolved
+    ON tip_intents (status, updated_at)
+    WHERE status IN ('pending', 'unknown', 'review');
+
+-- Payout jobs whose tip ended in 'review' are held there instead of being retried or failed
+ALTER TABLE payout_jobs DROP CONSTRAINT IF EXISTS payout_jobs_status_check;
+ALTER TABLE payout_jobs ADD CONSTRAINT payout_jobs_status_check
+    CHECK (status IN ('queued', 'claimed', 'done', 'failed', 'cancelled', 'review'));
@@ -0,0 +1,74 @@
+import bisect
+import itertools
+
+from milestones_config import MILESTONES
+
+# Precomputed from milestones_config.MILESTONES, which is ordered by threshold
+MILESTONE_THRESHOLDS = [milestone["threshold"] for milestone in MILESTONES]
+CUMULATIVE_TIPS = list(itertools.accumulate(milestone["tip"] for milestone in MILESTONES))
+MILESTONE_INDEX_BY_TIER = {milestone["tier"]: index for index, milestone in enumerate(MILESTONES)}
+
+if any(lower >= upper for lower, upper in zip(MILESTONE_THRESHOLDS, MILESTONE_THRESHOLDS[1:])):
+    raise ValueError("MILESTONES thresholds must be strictly increasing")
+
+
+def milestone_index_for(weighted_wagered):
+    """Index into MILESTONES of the highest rank reached at this wager, or -1 for none."""
+    return bisect.bisect_right(MILESTONE_THRESHOLDS, weighted_wagered) - 1
+
+
+def cumulative_tips_through(index):
+    """Total tips paid for every rank up to and including MILESTONES[index]."""
+    return CUMULATIVE_TIPS[index] if index >= 0 else 0.0
+
+
+class MilestoneProgress:
+    """
+    Which milestone ranks each user has been paid (or has queued) for one month.
+
+    Each user has a watermark, the highest rank index with every rank up to it done, and the
+    wager needed to reach the next undone rank. pending() returns immediately for users still
+    below that wager, so a cycle only does real work for users who crossed a new threshold.
+    """
+
+    def __init__(self, month, year, sent_tips=()):
+        self.period = (month, year)
+        self._done = {}  # user_id -> set of rank indexes recorded or queued
+        self._watermark = {}  # user_id -> highest index with every rank up to it done
+        self._next_threshold = {}  # user_id -> wager at which pending() has to look again
+        for user_id, tier in sent_tips:
+            index = MILESTONE_INDEX_BY_TIER.get(tier)
+            if index is not None:
+                self._done.setdefault(user_id, set()).add(index)
+        for user_id in self._done:
+            self._advance(user_id, -1)
+
+    def _advance(self, user_id, mark):
+        done = self._done.get(user_id, ())
+        while mark + 1 in done:
+            mark += 1
+        self._watermark[user_id] = mark
+        self._next_threshold[user_id] = (
+            MILESTONE_THRESHOLDS[mark + 1] if mark + 1 < len(MILESTONE_THRESHOLDS) else float("inf")
+        )
+
+    def pending(self, user_id, weighted_wagered):
+        """Rank indexes reached at this wager that are neither recorded nor queued, lowest first."""
+        if weighted_wagered < self._next_threshold.get(user_id, MILESTONE_THRESHOLDS[0]):
+            return []
+        reached = milestone_index_for(weighted_wagered)
+        done = self._done.get(user_id, ())
+        return [index for index in range(self._watermark.get(user_id, -1) + 1, reached + 1) if index not in done]
+
+    def claim(self, user_id, index):
+        """Mark a rank as queued/paid so later cycles don't queue it again."""
+        self._done.setdefault(user_id, set()).add(index)
+        self._advance(user_id, self._watermark.get(user_id, -1))
+
+    def release(self, user_id, index):
+        """Undo claim() for a tip that was not sent, so the next cycle queues it again."""
+        done = self._done.get(user_id)
+        if done is None or index not in done:
+            return
+        done.discard(index)
+        self._advance(user_id, -1)
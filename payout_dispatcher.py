@@ -0,0 +1,234 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+import uuid
+
+from tipping import tipping_client
+
+logger = logging.getLogger(__name__)
+
+# Lower lanes are sent first; within a lane, payouts go out in submission order
+LANE_INTERACTIVE = 0  # a member is waiting on the response (/tipuser, check-in withdrawals)
+LANE_PRIZE = 1        # leaderboard prizes
+LANE_CHALLENGE = 2    # slot challenge payouts
+LANE_MILESTONE = 3    # milestone tips
+
+PAYOUT_TIPS_PER_MINUTE = float(os.getenv("PAYOUT_TIPS_PER_MINUTE", "12"))
+PAYOUT_MAX_TIPS_PER_MINUTE = float(os.getenv("PAYOUT_MAX_TIPS_PER_MINUTE", "60"))
+PAYOUT_MIN_TIPS_PER_MINUTE = 1.0
+PAYOUT_BURST = int(os.getenv("PAYOUT_BURST", "3"))
+PAYOUT_WORKERS = int(os.getenv("PAYOUT_WORKERS", "3"))
+
+# Backoff after a 429 without a usable Retry-After header: 5s, 10s, 20s ... capped at 2 minutes
+RATE_LIMIT_BACKOFF_BASE = 5.0
+RATE_LIMIT_BACKOFF_MAX = 120.0
+
+CANCELLED_RESPONSE = {"success": False, "message": "cancelled", "cancelled": True}
+
+
+class TokenBucket:
+    """Allows `rate` sends per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds):
+        """Hand out no tokens for `seconds` and drop any saved-up burst."""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0.0
+        self.paused_until = max(self.paused_until, now + seconds)
+
+    async def wait_unpaused(self):
+        while (remaining := self.paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(remaining)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PayoutRequest:
+    def __init__(self, lane, to_username, to_user_id, amount, show_in_chat=True, balance_type="crypto", source=None,
+                 idempotency_key=None):
+        self.lane = lane
+        self.to_username = to_username
+        self.to_user_id = to_user_id
+        self.amount = amount
+        self.show_in_chat = show_in_chat
+        self.balance_type = balance_type
+        self.source = source  # free-form tag for cancel() predicates, e.g. "milestone"
+        # Fixed per request so a requeue after a 429 resends with the same tip intent and nonce
+        self.idempotency_key = idempotency_key or f"adhoc:{uuid.uuid4().hex}"
+        self.future = None
+
+
+class PayoutDispatcher:
+    """
+    Shared sender for every tip the bot pays out.
+
+    Requests wait in priority lanes and go out through a token bucket on PAYOUT_WORKERS
+    concurrent workers. The rate starts at PAYOUT_TIPS_PER_MINUTE and adapts: every
+    success adds one tip/minute up to PAYOUT_MAX_TIPS_PER_MINUTE, and every 429 halves it,
+    pauses for Retry-After (or an exponential backoff), and requeues the request.
+    """
+
+    def __init__(self, tips_per_minute=PAYOUT_TIPS_PER_MINUTE, max_tips_per_minute=PAYOUT_MAX_TIPS_PER_MINUTE,
+                 burst=PAYOUT_BURST, workers=PAYOUT_WORKERS):
+        self.max_rate = max_tips_per_minute / 60
+        self.min_rate = PAYOUT_MIN_TIPS_PER_MINUTE / 60
+        self.initial_rate = min(tips_per_minute / 60, self.max_rate)
+        self.burst = burst
+        self.worker_count = workers
+        self._bucket = None
+        self._queue = None
+        self._workers = []
+        self._waiting = {}  # seq -> request, for cancel()
+        self._seq = itertools.count()
+        self._consecutive_rate_limits = 0
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+    def start(self):
+        """Start the workers on the running loop; called lazily by submit()."""
+        if self._workers and not all(worker.done() for worker in self._workers):
+            return
+        self._bucket = TokenBucket(self.initial_rate, self.burst)
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"payout-worker-{i}") for i in range(self.worker_count)
+        ]
+        logger.info(
+            f"[Payouts] Dispatcher started: {self.worker_count} workers, "
+            f"{self.initial_rate * 60:.0f}-{self.max_rate * 60:.0f} tips/min, burst {self.burst}"
+        )
+
+    def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+    def submit(self, request):
+        """Queue a payout; returns a future resolving to the send_tip response."""
+        self.start()
+        request.future = asyncio.get_running_loop().create_future()
+        seq = next(self._seq)
+        self._waiting[seq] = request
+        self._queue.put_nowait((request.lane, seq, request))
+        return request.future
+
+    async def send(self, lane, to_username, to_user_id, amount, show_in_chat=True, balance_type="crypto", source=None,
+                   idempotency_key=None):
+        """Queue a payout and wait for its send_tip response."""
+        return await self.submit(
+            PayoutRequest(lane, to_username, to_user_id, amount, show_in_chat, balance_type, source, idempotency_key)
+        )
+
+    def cancel(self, predicate):
+        """Drop queued (not yet sending) requests matching predicate; their futures get CANCELLED_RESPONSE."""
+        cancelled = []
+        for seq, request in list(self._waiting.items()):
+            if predicate(request):
+                del self._waiting[seq]
+                if not request.future.done():
+                    request.future.set_result(dict(CANCELLED_RESPONSE))
+                cancelled.append(request)
+        return cancelled
+
+    def pending_count(self):
+        return len(self._waiting)
+
+    def stats(self):
+        return {
+            "tips_per_minute": round(self._bucket.rate * 60, 1) if self._bucket else round(self.initial_rate * 60, 1),
+            "pending": self.pending_count(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+        }
+
+    def _on_rate_limited(self, retry_after):
+        self.rate_limited += 1
+        self._consecutive_rate_limits += 1
+        self._bucket.rate = max(self.min_rate, self._bucket.rate / 2)
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = min(RATE_LIMIT_BACKOFF_MAX, RATE_LIMIT_BACKOFF_BASE * 2 ** (self._consecutive_rate_limits - 1))
+        self._bucket.pause(delay)
+        logger.warning(
+            f"[Payouts] Tipping API rate limited; pausing {delay:.1f}s, rate now {self._bucket.rate * 60:.1f} tips/min"
+        )
+
+    def _on_sent(self):
+        self._consecutive_rate_limits = 0
+        self._bucket.rate = min(self.max_rate, self._bucket.rate + 1 / 60)
+
+    async def _next_request(self):
+        """Highest-priority request still waiting, skipping cancelled ones."""
+        while True:
+            lane, seq, request = await self._queue.get()
+            self._queue.task_done()
+            if self._waiting.pop(seq, None) is not None and not request.future.done():
+                return lane, seq, request
+
+    async def _worker(self):
+        while True:
+            # Take the token first so the request is picked only once it can be sent;
+            # a prize queued while we waited still goes ahead of older milestone tips
+            await self._bucket.acquire()
+            lane, seq, request = await self._next_request()
+            try:
+                # Another worker may have hit a 429 after this token was handed out
+                await self._bucket.wait_unpaused()
+                response = await tipping_client.send(
+                    request.to_username, request.to_user_id, request.amount,
+                    show_in_chat=request.show_in_chat, balance_type=request.balance_type,
+                    idempotency_key=request.idempotency_key,
+                )
+                if response.get("status") == 429:
+                    # Not sent; keep its place at the front of its lane
+                    self._on_rate_limited(response.get("retry_after"))
+                    self._waiting[seq] = request
+                    self._queue.put_nowait((lane, seq, request))
+                    continue
+
+                if response.get("success"):
+                    self.sent += 1
+                    self._on_sent()
+                else:
+                    self.failed += 1
+                if not request.future.done():
+                    request.future.set_result(response)
+            except asyncio.CancelledError:
+                if not request.future.done():
+                    request.future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"[Payouts] Error sending tip to {request.to_username}: {e}")
+                if not request.future.done():
+                    request.future.set_result({"success": False, "message": str(e)})
+
+
+payout_dispatcher = PayoutDispatcher()
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+import db_async
+
+logger = logging.getLogger(__name__)
+
+PAYOUT_QUEUE_POLL_SECONDS = float(os.getenv("PAYOUT_QUEUE_POLL_SECONDS", "5"))
+# A claim lapses this long after the last heartbeat, so jobs of a dead process are picked up again
+PAYOUT_JOB_VISIBILITY_SECONDS = int(os.getenv("PAYOUT_JOB_VISIBILITY_SECONDS", "300"))
+PAYOUT_QUEUE_MAX_IN_FLIGHT = int(os.getenv("PAYOUT_QUEUE_MAX_IN_FLIGHT", "10"))
+PAYOUT_JOB_MAX_ATTEMPTS = 3
+PAYOUT_JOB_RETRY_SECONDS = 60  # doubled per attempt
+
+
+class PayoutQueue:
+    """
+    Runs jobs from the payout_jobs table (migrations/0012) so queued payouts survive restarts.
+
+    Cogs register a handler per job kind. The handler sends the tip (through the payout
+    dispatcher) and records it with record_tip_payout(payout_job_id=job["id"]), which marks the
+    job done in the same transaction. It returns the send_tip response; the queue then closes
+    the job: cancelled responses cancel it, tips with an unknown outcome hold it as 'review'
+    (not retried, and the payout stays claimed), other failures retry with backoff up to
+    PAYOUT_JOB_MAX_ATTEMPTS and then fail it. on_closed(job, status) runs for jobs that end
+    failed or cancelled, including ones cancelled by cancel() before they were claimed.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers = {}  # kind -> (handler, on_closed)
+        self._in_flight = {}  # job id -> task
+        self._wake = None
+        self._runner = None
+
+    def register(self, kind, handler, on_closed=None):
+        self._handlers[kind] = (handler, on_closed)
+        self.start()
+        self._wake.set()
+
+    def unregister(self, kind):
+        self._handlers.pop(kind, None)
+
+    def start(self):
+        """Start polling on the running loop; called by register()."""
+        if self._runner is not None and not self._runner.done():
+            return
+        self._wake = asyncio.Event()
+        self._runner = asyncio.create_task(self._run(), name="payout-queue")
+        logger.info(f"[PayoutQueue] Worker {self.worker_id} started")
+
+    def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+
+    async def enqueue(self, idempotency_key, kind, lane, user_id, username, amount, payload=None):
+        """
+        Durably queue a payout. Returns True if queued, False if the key is already queued,
+        claimed or done, None on error.
+        """
+        queued = await db_async.enqueue_payout_job(idempotency_key, kind, lane, user_id, username, amount, payload)
+        if queued and self._wake is not None:
+            self._wake.set()
+        return queued
+
+    async def cancel(self, kind, user_id=None, username=None):
+        """Cancel a user's queued jobs of kind; returns how many were cancelled."""
+        jobs = await db_async.cancel_payout_jobs(kind, user_id=user_id, username=username)
+        for job in jobs:
+            await self._closed(job, "cancelled")
+        return len(jobs)
+
+    async def _closed(self, job, status):
+        _, on_closed = self._handlers.get(job["kind"], (None, None))
+        if on_closed is None:
+            return
+        try:
+            await on_closed(job, status)
+        except Exception as e:
+            logger.error(f"[PayoutQueue] on_closed failed for job {job['id']}: {e}")
+
+    async def _run_job(self, job):
+        handler, _ = self._handlers[job["kind"]]
+        try:
+            response = await handler(job)
+        except asyncio.CancelledError:
+            raise  # claim lapses and the job is retried after the visibility timeout
+        except Exception as e:
+            logger.error(f"[PayoutQueue] Job {job['id']} ({job['idempotency_key']}) raised: {e}")
+            response = {"success": False, "message": str(e)}
+
+        if response.get("success"):
+            # Normally already done via record_tip_payout; this covers a failed record
+            await db_async.finish_payout_job(job["id"], self.worker_id, "done")
+        elif response.get("cancelled"):
+            await db_async.finish_payout_job(job["id"], self.worker_id, "cancelled", error="cancelled")
+            await self._closed(job, "cancelled")
+        elif response.get("unknown"):
+            # The tip may have gone through; retrying or releasing the payout could pay it twice
+            logger.error(
+                f"[PayoutQueue] Job {job['id']} ({job['idempotency_key']}) has an unknown outcome, "
+                f"holding it for review: {response.get('message')}"
+            )
+            await db_async.finish_payout_job(job["id"], self.worker_id, "review", error=response.get("message"))
+        elif job["attempts"] < PAYOUT_JOB_MAX_ATTEMPTS:
+            retry_in = PAYOUT_JOB_RETRY_SECONDS * 2 ** (job["attempts"] - 1)
+            logger.warning(
+                f"[PayoutQueue] Job {job['id']} ({job['idempotency_key']}) failed attempt {job['attempts']}, "
+                f"retrying in {retry_in}s: {response.get('message')}"
+            )
+            await db_async.finish_payout_job(job["id"], self.worker_id, None, error=response.get("message"), retry_in=retry_in)
+        else:
+            logger.error(f"[PayoutQueue] Job {job['id']} ({job['idempotency_key']}) failed for good: {response.get('message')}")
+            await db_async.finish_payout_job(job["id"], self.worker_id, "failed", error=response.get("message"))
+            await self._closed(job, "failed")
+
+    def _job_done(self, job_id, task):
+        self._in_flight.pop(job_id, None)
+        self._wake.set()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"[PayoutQueue] Job {job_id} task error: {task.exception()}")
+
+    async def _run(self):
+        while True:
+            try:
+                self._wake.clear()
+                await db_async.extend_payout_job_claims(self.worker_id, list(self._in_flight), PAYOUT_JOB_VISIBILITY_SECONDS)
+                jobs = await db_async.claim_payout_jobs(
+                    self.worker_id, list(self._handlers),
+                    PAYOUT_QUEUE_MAX_IN_FLIGHT - len(self._in_flight), PAYOUT_JOB_VISIBILITY_SECONDS,
+                )
+                for job in jobs:
+                    if job["kind"] not in self._handlers:
+                        # Unregistered between claim and now; let the claim lapse
+                        continue
+                    if job["attempts"] > 1:
+                        logger.info(f"[PayoutQueue] Running job {job['id']} ({job['idempotency_key']}) again, attempt {job['attempts']}")
+                    task = asyncio.create_task(self._run_job(job))
+                    self._in_flight[job["id"]] = task
+                    task.add_done_callback(lambda t, job_id=job["id"]: self._job_done(job_id, t))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[PayoutQueue] Poll error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), PAYOUT_QUEUE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+payout_queue = PayoutQueue()
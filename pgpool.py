@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(pool.PoolError):
+    """Raised when no connection became available within the checkout timeout."""
+
+
+class PooledConnection(extensions.connection):
+    """psycopg2 connection that remembers which server-side prepared statements its session holds."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Session state: a replacement connection starts empty, so nothing needs invalidating
+        self.prepared_statements = set()
+
+
+class ManagedConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    - getconn() blocks up to checkout_timeout for a free connection instead of failing when exhausted
+    - connections idle longer than ping_after_idle are pinged before being handed out, so a
+      Postgres restart costs a reconnect instead of an error in whatever query ran next
+    - connections older than max_lifetime are closed and replaced on checkout/return
+    - stats() reports in-use/idle counts, waiters and checkout wait times
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=20, checkout_timeout=10.0, max_lifetime=1800.0, ping_after_idle=10.0):
+        self.dsn = dsn
+        self.maxconn = maxconn
+        self.checkout_timeout = checkout_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after_idle = ping_after_idle
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, returned_at), most recently returned on the right
+        self._in_use = {}  # id(conn) -> created_at
+        self._open = 0  # idle + in use + connections being opened
+        self._waiters = 0
+        self._closed = False
+        self._counters = {
+            "checkouts": 0,
+            "waited_checkouts": 0,
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "connections_opened": 0,
+            "recycled": 0,
+            "failed_pings": 0,
+        }
+
+        for _ in range(minconn):
+            self._open += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                self._open -= 1
+                raise
+            self._idle.append((conn, time.monotonic(), time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, connection_factory=PooledConnection)
+        self._count("connections_opened")
+        return conn
+
+    def _count(self, name):
+        with self._cond:
+            self._counters[name] += 1
+
+    def _expired(self, created_at, now):
+        return self.max_lifetime is not None and now - created_at >= self.max_lifetime
+
+    def _ping(self, conn):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            if not conn.autocommit:
+                conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _discard(self, conn):
+        """Close a connection and give its slot back to the pool."""
+        self._close_quietly(conn)
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def getconn(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise pool.PoolError("connection pool is closed")
+                if self._idle:
+                    conn, created_at, returned_at = self._idle.pop()
+                    break
+                if self._open < self.maxconn:
+                    self._open += 1
+                    conn = None
+                    break
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(f"no connection available after {timeout:.1f}s ({self.maxconn} in use)")
+                waited = True
+                self._waiters += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiters -= 1
+
+        # Validation and connecting happen outside the lock so other threads aren't held up;
+        # the slot taken above stays reserved for this caller either way
+        now = time.monotonic()
+        if conn is not None:
+            if conn.closed or self._expired(created_at, now):
+                self._count("recycled")
+                self._close_quietly(conn)
+                conn = None
+            elif now - returned_at >= self.ping_after_idle and not self._ping(conn):
+                self._count("failed_pings")
+                logger.warning("[DBPool] Dropping dead pooled connection and reconnecting")
+                self._close_quietly(conn)
+                conn = None
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            created_at = time.monotonic()
+
+        waited_for = time.monotonic() - started
+        with self._cond:
+            self._in_use[id(conn)] = created_at
+            self._counters["checkouts"] += 1
+            if waited:
+                self._counters["waited_checkouts"] += 1
+            self._counters["wait_seconds_total"] += waited_for
+            self._counters["wait_seconds_max"] = max(self._counters["wait_seconds_max"], waited_for)
+        return conn
+
+    def putconn(self, conn, close=False):
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+        if created_at is None:
+            raise pool.PoolError("trying to put unkeyed connection")
+
+        if not close and not conn.closed:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                # Connection returned mid-transaction (usually after an error): reset it
+                try:
+                    conn.rollback()
+                except Exception:
+                    close = True
+
+        if close or conn.closed or self._closed or self._expired(created_at, time.monotonic()):
+            if not close and not conn.closed and not self._closed:
+                self._count("recycled")
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            counters = dict(self._counters)
+            in_use = len(self._in_use)
+            idle = len(self._idle)
+            waiters = self._waiters
+        checkouts = counters["checkouts"]
+        return {
+            "max_connections": self.maxconn,
+            "in_use": in_use,
+            "idle": idle,
+            "waiters": waiters,
+            **counters,
+            "wait_seconds_avg": counters["wait_seconds_total"] / checkouts if checkouts else 0.0,
+        }
@@ -0,0 +1,269 @@
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from utils import get_http_session
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = "https://api.github.com"
+WAGERDATA_REPO_OWNER = "FTSStreams"
+WAGERDATA_REPO_NAME = "wagerData"
+WAGERDATA_BRANCH = "main"
+
+# Output format knobs: pretty-printing is off by default, precompressed companions
+# (comma-separated "gzip", "br") and columnar variants are opt-in per deployment
+JSON_PRETTY = os.getenv("WAGERDATA_JSON_PRETTY", "").lower() in ("1", "true", "yes")
+PRECOMPRESS_FORMATS = {
+    fmt.strip() for fmt in os.getenv("WAGERDATA_PRECOMPRESS", "").lower().split(",") if fmt.strip()
+}
+COLUMNAR_FILES = {
+    name.strip() for name in os.getenv("WAGERDATA_COLUMNAR_FILES", "allWagerData.json").split(",") if name.strip()
+}
+
+
+class PublishError(Exception):
+    """Raised when a batch publish cannot be completed."""
+
+
+def dumps_json(data, pretty=None):
+    """Serialize to JSON text: minified by default, orjson when it is installed."""
+    pretty = JSON_PRETTY if pretty is None else pretty
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, option=option, default=str).decode("utf-8")
+    if pretty:
+        return json.dumps(data, indent=2, default=str)
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def to_columnar(value):
+    """
+    Rewrite lists of same-keyed dicts as {"columns": [...], "rows": [[...], ...]} so repeated
+    field names are written once per list instead of once per entry.
+    """
+    if isinstance(value, dict):
+        return {key: to_columnar(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            columns = list(value[0].keys())
+            if all(list(item.keys()) == columns for item in value):
+                return {
+                    "columns": columns,
+                    "rows": [[to_columnar(item[column]) for column in columns] for item in value],
+                }
+        return [to_columnar(item) for item in value]
+    return value
+
+
+def _columnar_path(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}.columnar{ext}"
+
+
+def variant_paths(path):
+    """Paths published alongside path under the current format settings."""
+    paths = [path]
+    if path in COLUMNAR_FILES:
+        paths.append(_columnar_path(path))
+    suffixes = []
+    if "gzip" in PRECOMPRESS_FORMATS:
+        suffixes.append(".gz")
+    if "br" in PRECOMPRESS_FORMATS and brotli is not None:
+        suffixes.append(".br")
+    return sorted([f"{p}{suffix}" for p in paths for suffix in suffixes] + paths[1:])
+
+
+def encode_json_files(path, data):
+    """
+    Build every published form of one JSON document: {path: text or bytes}.
+    Includes the columnar variant for COLUMNAR_FILES and .gz/.br companions for PRECOMPRESS_FORMATS.
+    """
+    files = {path: dumps_json(data)}
+    if path in COLUMNAR_FILES:
+        files[_columnar_path(path)] = dumps_json(to_columnar(data))
+
+    for variant_path, text in list(files.items()):
+        raw = text.encode("utf-8")
+        if "gzip" in PRECOMPRESS_FORMATS:
+            # mtime=0 keeps the output byte-identical for identical input
+            files[f"{variant_path}.gz"] = gzip.compress(raw, compresslevel=9, mtime=0)
+        if "br" in PRECOMPRESS_FORMATS and brotli is not None:
+            files[f"{variant_path}.br"] = brotli.compress(raw)
+    return files
+
+
+class GitHubBatchPublisher:
+    """
+    Publish several files to a GitHub repo as a single commit using the Git Data API:
+    one tree (built on top of the current head tree), one commit, one ref update.
+    """
+
+    def __init__(self, owner, repo, branch="main", token=None, max_attempts=3):
+        self.owner = owner
+        self.repo = repo
+        self.branch = branch
+        self.token = token
+        self.max_attempts = max_attempts
+        # Head commit/tree we last saw or wrote; reset when the ref moves under us
+        self._head_sha = None
+        self._tree_sha = None
+
+    def _headers(self):
+        return {
+            "Authorization": f"Bearer {self.token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+
+    async def _request(self, method, path, payload=None):
+        session = await get_http_session()
+        url = f"{GITHUB_API_URL}/repos/{self.owner}/{self.repo}{path}"
+        async with session.request(method, url, headers=self._headers(), json=payload) as resp:
+            try:
+                body = await resp.json(content_type=None)
+            except ValueError:
+                body = None
+            return resp.status, body
+
+    async def _load_head(self):
+        status, ref = await self._request("GET", f"/git/ref/heads/{self.branch}")
+        if status != 200:
+            raise PublishError(f"Could not read ref heads/{self.branch}: {status} {ref}")
+        head_sha = ref["object"]["sha"]
+
+        status, commit = await self._request("GET", f"/git/commits/{head_sha}")
+        if status != 200:
+            raise PublishError(f"Could not read head commit {head_sha}: {status} {commit}")
+        self._head_sha = head_sha
+        self._tree_sha = commit["tree"]["sha"]
+
+    async def _create_blob(self, content):
+        status, blob = await self._request("POST", "/git/blobs", {
+            "content": base64.b64encode(content).decode("ascii"),
+            "encoding": "base64",
+        })
+        if status != 201:
+            raise PublishError(f"Blob creation failed: {status} {blob}")
+        return blob["sha"]
+
+    async def publish(self, files, message):
+        """
+        Commit files ({path: text or bytes content}) in one commit.
+        Returns the new commit SHA, or None if the tree did not change.
+        """
+        if not files:
+            return None
+
+        tree_entries = []
+        for path, content in files.items():
+            entry = {"path": path, "mode": "100644", "type": "blob"}
+            if isinstance(content, bytes):
+                # Binary content can't be inlined in a tree; upload it as a blob first
+                entry["sha"] = await self._create_blob(content)
+            else:
+                entry["content"] = content
+            tree_entries.append(entry)
+
+        for attempt in range(1, self.max_attempts + 1):
+            if self._head_sha is None:
+                await self._load_head()
+
+            status, tree = await self._request("POST", "/git/trees", {
+                "base_tree": self._tree_sha,
+                "tree": tree_entries,
+            })
+            if status != 201:
+                raise PublishError(f"Tree creation failed: {status} {tree}")
+            if tree["sha"] == self._tree_sha:
+                return None
+
+            status, commit = await self._request("POST", "/git/commits", {
+                "message": message,
+                "tree": tree["sha"],
+                "parents": [self._head_sha],
+            })
+            if status != 201:
+                raise PublishError(f"Commit creation failed: {status} {commit}")
+
+            status, ref = await self._request("PATCH", f"/git/refs/heads/{self.branch}", {
+                "sha": commit["sha"],
+                "force": False,
+            })
+            if status == 200:
+                self._head_sha = commit["sha"]
+                self._tree_sha = tree["sha"]
+                return commit["sha"]
+
+            # 422 "not a fast forward" / 409: someone else moved the branch, rebuild on the new head
+            if status in (409, 422) and attempt < self.max_attempts:
+                logger.warning(f"[Publisher] {self.branch} moved during publish (HTTP {status}), retrying")
+                self._head_sha = None
+                self._tree_sha = None
+                await asyncio.sleep(attempt)
+                continue
+            raise PublishError(f"Ref update failed: {status} {ref}")
+
+        raise PublishError(f"Gave up publishing after {self.max_attempts} attempts")
+
+
+class LocalDirectoryPublisher:
+    """
+    Stand-in for GitHubBatchPublisher that writes files into a local directory.
+    Used for tests and dry runs (set WAGERDATA_LOCAL_DIR); every publish is recorded in self.commits.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.commits = []
+
+    def _write_changed(self, files):
+        changed = []
+        for path, content in files.items():
+            full_path = os.path.join(self.root, path)
+            data = content if isinstance(content, bytes) else content.encode("utf-8")
+            try:
+                with open(full_path, "rb") as f:
+                    if f.read() == data:
+                        continue
+            except FileNotFoundError:
+                pass
+            os.makedirs(os.path.dirname(full_path) or self.root, exist_ok=True)
+            with open(full_path, "wb") as f:
+                f.write(data)
+            changed.append(path)
+        return changed
+
+    async def publish(self, files, message):
+        changed = await asyncio.to_thread(self._write_changed, files)
+        if not changed:
+            return None
+        commit_id = f"local-{len(self.commits) + 1}"
+        self.commits.append({"id": commit_id, "message": message, "files": sorted(changed)})
+        return commit_id
+
+
+def create_wagerdata_publisher():
+    """Publisher for the public wagerData repo, or a local directory when WAGERDATA_LOCAL_DIR is set."""
+    local_dir = os.getenv("WAGERDATA_LOCAL_DIR")
+    if local_dir:
+        logger.info(f"[Publisher] Publishing wager data to local directory {local_dir}")
+        return LocalDirectoryPublisher(local_dir)
+    return GitHubBatchPublisher(
+        WAGERDATA_REPO_OWNER,
+        WAGERDATA_REPO_NAME,
+        branch=WAGERDATA_BRANCH,
+        token=os.getenv("GITHUB_TOKEN"),
+    )
@@ -0,0 +1,195 @@
+import argparse
+import logging
+import sys
+
+from db import get_db_connection, release_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Roughly our production row counts; the check seeds scale x these on top of what is there
+BASE_ROW_COUNTS = {
+    "manualtips": 20_000,
+    "milestonetips": 5_000,
+    "slot_challenge_logs": 2_000,
+    "checkin_withdrawals": 5_000,
+}
+SEED_USERS = 2_000
+
+_SEED_SQL = {
+    "manualtips": """
+        INSERT INTO manualtips (user_id, username, amount, tip_type, month, year, tipped_at)
+        SELECT
+            900000000 + (n %% %(users)s),
+            'seed',
+            (n %% 50) + 1,
+            (ARRAY['milestone', 'wager_lb', 'multi_lb', 'slot_challenge', 'manual'])[1 + n %% 5],
+            EXTRACT(MONTH FROM ts)::int,
+            EXTRACT(YEAR FROM ts)::int,
+            ts
+        FROM (
+            SELECT n, NOW() - (n %% 730) * INTERVAL '1 day' AS ts
+            FROM generate_series(1, %(rows)s) AS n
+        ) seed;
+    """,
+    "milestonetips": """
+        INSERT INTO milestonetips (user_id, tier, month, year, tipped_at)
+        SELECT
+            900000000 + (n %% %(users)s),
+            'Tier ' || (1 + (k / 24) %% 20),
+            EXTRACT(MONTH FROM ts)::int,
+            EXTRACT(YEAR FROM ts)::int,
+            ts
+        FROM (
+            -- k numbers each seed user's rows; every k maps to its own (month, tier) so the
+            -- (user_id, tier, month, year) unique index holds up to 480 rows per user
+            SELECT n, k, date_trunc('month', NOW()) - (k %% 24) * INTERVAL '1 month' + (n %% 28) * INTERVAL '1 day' AS ts
+            FROM (SELECT n, n / %(users)s AS k FROM generate_series(1, %(rows)s) AS n) numbered
+        ) seed
+        ON CONFLICT (user_id, tier, month, year) DO NOTHING;
+    """,
+    "slot_challenge_logs": """
+        INSERT INTO slot_challenge_logs (
+            challenge_id, game, game_identifier, winner_uid, winner_username, multiplier, bet, payout,
+            required_multiplier, prize, min_bet, challenge_start
+        )
+        SELECT
+            -n, 'Seed Slot', 'seed:slot', 900000000 + (n %% %(users)s), 'seed',
+            CASE WHEN n %% 4 = 0 THEN NULL ELSE 100 + n %% 900 END,
+            1, 100, 100, 25, 0.2,
+            NOW() - (n %% 730) * INTERVAL '1 day'
+        FROM generate_series(1, %(rows)s) AS n;
+    """,
+    "checkin_withdrawals": """
+        INSERT INTO checkin_withdrawals (withdrawal_id, discord_user_id, amount, status, created_at, updated_at)
+        SELECT
+            md5('seed-withdrawal-' || n)::uuid,
+            900000000 + (n %% %(users)s),
+            5,
+            CASE WHEN n %% 50 = 0 THEN 'pending' WHEN n %% 10 = 0 THEN 'failed' ELSE 'success' END,
+            NOW() - (n %% 730) * INTERVAL '1 day',
+            NOW() - (n %% 730) * INTERVAL '1 day'
+        FROM generate_series(1, %(rows)s) AS n;
+    """,
+}
+
+# (name, table, sql, params): the same statements db.py and the cogs run on hot paths
+HOT_QUERIES = [
+    (
+        "mywager milestone total",
+        "manualtips",
+        "SELECT COALESCE(SUM(amount), 0) FROM manualtips WHERE user_id = %s AND tip_type = 'milestone';",
+        ("900000042",),
+    ),
+    (
+        "mywager milestone month",
+        "manualtips",
+        "SELECT COALESCE(SUM(amount), 0) FROM manualtips "
+        "WHERE user_id = %s AND tip_type = 'milestone' AND month = %s AND year = %s;",
+        ("900000042", 6, 2026),
+    ),
+    (
+        "milestone payout username",
+        "manualtips",
+        "SELECT username FROM manualtips WHERE user_id = %s AND tip_type = 'milestone' "
+        "AND month = %s AND year = %s AND amount = %s ORDER BY tipped_at DESC LIMIT 1;",
+        ("900000042", 6, 2026, 10),
+    ),
+    (
+        "load_sent_tips",
+        "milestonetips",
+        "SELECT user_id, tier FROM milestonetips WHERE month = %s AND year = %s;",
+        (6, 2026),
+    ),
+    (
+        "slot challenge stats all-time",
+        "slot_challenge_logs",
+        "SELECT COUNT(*), COALESCE(SUM(prize), 0) FROM slot_challenge_logs "
+        "WHERE winner_uid = %s AND multiplier IS NOT NULL;",
+        ("900000042",),
+    ),
+    (
+        "slot challenge stats month",
+        "slot_challenge_logs",
+        "SELECT COUNT(*), COALESCE(SUM(prize), 0) FROM slot_challenge_logs "
+        "WHERE winner_uid = %s AND multiplier IS NOT NULL AND challenge_start >= %s AND challenge_start < %s;",
+        ("900000042", "2026-06-01T00:00:00+00:00", "2026-07-01T00:00:00+00:00"),
+    ),
+    (
+        "withdrawal daily limit",
+        "checkin_withdrawals",
+        "SELECT COALESCE(SUM(amount), 0) FROM checkin_withdrawals "
+        "WHERE discord_user_id = %s AND status = 'success' AND created_at >= %s AND created_at < %s;",
+        ("900000042", "2026-06-01T00:00:00+00:00", "2026-06-02T00:00:00+00:00"),
+    ),
+    (
+        "withdrawal open hold",
+        "checkin_withdrawals",
+        "SELECT withdrawal_id FROM checkin_withdrawals WHERE discord_user_id = %s "
+        "AND status IN ('pending', 'unknown') ORDER BY updated_at DESC LIMIT 1;",
+        ("900000042",),
+    ),
+    (
+        "withdrawal log page",
+        "checkin_withdrawals",
+        "SELECT roobet_username, amount, status, created_at, error_message FROM checkin_withdrawals "
+        "WHERE status IN (%s) ORDER BY created_at ASC LIMIT %s;",
+        ("success", 25),
+    ),
+]
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _seq_scanned_tables(plan):
+    return {node.get("Relation Name") for node in _plan_nodes(plan) if node.get("Node Type") == "Seq Scan"}
+
+
+def check_query_plans(scale=10):
+    """
+    Seed scale x BASE_ROW_COUNTS synthetic rows, ANALYZE, and EXPLAIN every HOT_QUERIES entry.
+    Everything runs in one transaction that is rolled back, so point it at a scratch database.
+    Returns [(name, problem)] for queries that sequentially scan their table (empty list = pass).
+    """
+    conn = get_db_connection()
+    failures = []
+    try:
+        conn.autocommit = False
+        with conn.cursor() as cur:
+            for table, sql in _SEED_SQL.items():
+                rows = BASE_ROW_COUNTS[table] * scale
+                cur.execute(sql, {"rows": rows, "users": SEED_USERS})
+                cur.execute(f"ANALYZE {table};")
+                logger.info(f"[QueryPlans] Seeded {rows:,} rows into {table}")
+
+            for name, table, sql, params in HOT_QUERIES:
+                cur.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cur.fetchone()[0][0]["Plan"]
+                if table in _seq_scanned_tables(plan):
+                    failures.append((name, f"sequential scan on {table}"))
+                    logger.warning(f"[QueryPlans] {name}: sequential scan on {table} (cost {plan['Total Cost']})")
+                else:
+                    logger.info(f"[QueryPlans] {name}: ok (cost {plan['Total Cost']})")
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        release_db_connection(conn)
+    return failures
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Check that hot queries use index scans at scaled-up row counts")
+    parser.add_argument("--scale", type=int, nargs="+", default=[10, 100], help="multiples of BASE_ROW_COUNTS to seed")
+    args = parser.parse_args()
+
+    failed = False
+    for scale in args.scale:
+        logger.info(f"[QueryPlans] Checking at {scale}x row counts")
+        for name, problem in check_query_plans(scale):
+            logger.error(f"[QueryPlans] {scale}x {name}: {problem}")
+            failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,139 @@
+import logging
+import select
+import threading
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+# Channel the settings trigger (migrations/0011) notifies with the changed key
+SETTINGS_CHANNEL = "settings_changed"
+
+
+class SettingsCache:
+    """
+    In-memory copy of the settings table.
+
+    Until replace_all() has run, loaded is False and callers read through to the database.
+    get_parsed() memoizes parser(raw) per key until the raw value changes, so JSON-valued
+    settings are parsed once per change rather than once per read.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._parsed = {}  # key -> (raw, parser, parsed)
+        self.loaded = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._values)
+
+    def replace_all(self, values):
+        with self._lock:
+            self._values = dict(values)
+            self._parsed = {}
+            self.loaded = True
+
+    def invalidate(self):
+        """Forget everything; reads go to the database until the next replace_all()."""
+        with self._lock:
+            self._values = {}
+            self._parsed = {}
+            self.loaded = False
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = value
+            self._parsed.pop(key, None)
+
+    def discard(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+            self._parsed.pop(key, None)
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._values.get(key)
+        return default if value is None else value
+
+    def get_parsed(self, key, parser, default=None):
+        with self._lock:
+            raw = self._values.get(key)
+            memo = self._parsed.get(key)
+        if raw is None:
+            return default
+        if memo is not None and memo[0] == raw and memo[1] == parser:
+            return memo[2]
+        parsed = parser(raw)
+        with self._lock:
+            if self._values.get(key) == raw:
+                self._parsed[key] = (raw, parser, parsed)
+        return parsed
+
+
+class SettingsListener(threading.Thread):
+    """
+    LISTENs for settings changes made by any process (including manual SQL) on a dedicated
+    connection and applies them to a SettingsCache. After (re)connecting it reloads every
+    key, since notifications sent while disconnected are lost.
+    """
+
+    def __init__(self, dsn, cache, reconnect_delay=5.0):
+        super().__init__(name="settings-listener", daemon=True)
+        self.dsn = dsn
+        self.cache = cache
+        self.reconnect_delay = reconnect_delay
+        self._stopped = threading.Event()
+        self._conn = None
+
+    def stop(self):
+        self._stopped.set()
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {SETTINGS_CHANNEL};")
+            cur.execute("SELECT key, value FROM settings;")
+            self.cache.replace_all(cur.fetchall())
+        return conn
+
+    def _reload_key(self, cur, key):
+        cur.execute("SELECT value FROM settings WHERE key = %s;", (key,))
+        row = cur.fetchone()
+        if row is None:
+            self.cache.discard(key)
+        else:
+            self.cache.put(key, row[0])
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                if self._conn is None:
+                    self._conn = self._connect()
+                    logger.info(f"[Settings] Listening for setting changes ({len(self.cache)} keys cached)")
+
+                if select.select([self._conn], [], [], 1.0) == ([], [], []):
+                    continue
+                self._conn.poll()
+                changed = {notify.payload for notify in self._conn.notifies}
+                self._conn.notifies.clear()
+                with self._conn.cursor() as cur:
+                    for key in changed:
+                        self._reload_key(cur, key)
+            except Exception as e:
+                logger.error(f"[Settings] Listener connection lost, reading settings from the database until it is back: {e}")
+                self.cache.invalidate()
+                if self._conn is not None:
+                    try:
+                        self._conn.close()
+                    except Exception:
+                        pass
+                    self._conn = None
+                self._stopped.wait(self.reconnect_delay)
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from datetime import datetime
+import datetime as dt
+
+logger = logging.getLogger(__name__)
+
+# DataManager refreshes every 10 minutes; subscribers fall back to cached data after this long
+SNAPSHOT_WAIT_SECONDS = 15 * 60
+
+
+def user_wager_fingerprints(total_wager_data, weighted_wager_data):
+    """uid -> (weightedWagered, wagered); a user whose fingerprint changed is in the next diff."""
+    fingerprints = {}
+    for entry in weighted_wager_data:
+        uid = entry.get("uid")
+        if uid is not None:
+            fingerprints[uid] = (entry.get("weightedWagered", 0), 0)
+    for entry in total_wager_data:
+        uid = entry.get("uid")
+        if uid is not None:
+            fingerprints[uid] = (fingerprints.get(uid, (0, 0))[0], entry.get("wagered", 0))
+    return fingerprints
+
+
+class Snapshot:
+    """
+    One DataManager refresh. changed_uids holds the users whose wager changed since the
+    previous snapshot (including new users); full is True when every user should be treated
+    as changed, i.e. on the first snapshot and when the month rolls over.
+    """
+
+    def __init__(self, version, data, changed_uids, full):
+        self.version = version
+        self.data = data
+        self.changed_uids = changed_uids
+        self.full = full
+        self.published_at = datetime.now(dt.UTC)
+
+    @property
+    def has_changes(self):
+        return self.full or bool(self.changed_uids)
+
+    def merged_after(self, older):
+        """This snapshot as seen by a subscriber that never consumed `older`."""
+        if older is None:
+            return self
+        return Snapshot(self.version, self.data, older.changed_uids | self.changed_uids, older.full or self.full)
+
+
+class SnapshotSubscription:
+    """A subscriber's view of the bus: wait() returns the newest unconsumed snapshot."""
+
+    def __init__(self, name):
+        self.name = name
+        self._pending = None
+        self._ready = asyncio.Event()
+
+    def _deliver(self, snapshot):
+        if self._pending is not None:
+            logger.info(f"[Snapshots] {self.name} skipped v{self._pending.version}, merging its diff into v{snapshot.version}")
+        self._pending = snapshot.merged_after(self._pending)
+        self._ready.set()
+
+    async def wait(self, timeout=None):
+        """Wait for the next snapshot; returns None if none arrives within timeout seconds."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        snapshot, self._pending = self._pending, None
+        self._ready.clear()
+        return snapshot
+
+
+class SnapshotBus:
+    """
+    DataManager publishes every refresh here; Milestones, Leaderboard, MultiLeaderboard and
+    SlotChallenge subscribe instead of sleeping for a fixed offset after the fetch.
+    Slow subscribers never queue up stale snapshots: they get the latest one with the
+    diffs of anything they missed merged in.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.latest = None
+        self._fingerprints = {}
+        self._period = None
+        self._subscriptions = {}
+
+    def subscribe(self, name):
+        """Return the subscription for name, creating it on first use (safe across cog reloads)."""
+        if name not in self._subscriptions:
+            self._subscriptions[name] = SnapshotSubscription(name)
+        return self._subscriptions[name]
+
+    def publish(self, data):
+        fingerprints = user_wager_fingerprints(data.get("total_wager", []), data.get("weighted_wager", []))
+        period = data.get("period", {}).get("start_date")
+        full = self.latest is None or period != self._period
+        changed = set(fingerprints) if full else {
+            uid for uid, fingerprint in fingerprints.items() if self._fingerprints.get(uid) != fingerprint
+        }
+        self.version += 1
+        self.latest = Snapshot(self.version, data, changed, full)
+        self._fingerprints = fingerprints
+        self._period = period
+
+        for subscription in self._subscriptions.values():
+            subscription._deliver(self.latest)
+        logger.info(
+            f"[Snapshots] Published v{self.version}: {'full' if full else f'{len(changed)} changed users'}, "
+            f"{len(self._subscriptions)} subscribers"
+        )
+        return self.latest
+
+
+snapshot_bus = SnapshotBus()
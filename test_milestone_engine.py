@@ -0,0 +1,63 @@
+from milestone_engine import (
+    CUMULATIVE_TIPS,
+    MILESTONE_THRESHOLDS,
+    MilestoneProgress,
+    cumulative_tips_through,
+    milestone_index_for,
+)
+from milestones_config import MILESTONES
+
+
+def test_milestone_index_for_matches_linear_scan():
+    def linear(wager):
+        index = -1
+        for i, milestone in enumerate(MILESTONES):
+            if wager >= milestone["threshold"]:
+                index = i
+        return index
+
+    probes = [0, -5, float("inf")]
+    for threshold in MILESTONE_THRESHOLDS:
+        probes += [threshold - 0.01, threshold, threshold + 0.01]
+    for wager in probes:
+        assert milestone_index_for(wager) == linear(wager), wager
+
+
+def test_cumulative_tips_through():
+    assert cumulative_tips_through(-1) == 0.0
+    assert cumulative_tips_through(0) == MILESTONES[0]["tip"]
+    last = len(MILESTONES) - 1
+    assert cumulative_tips_through(last) == sum(milestone["tip"] for milestone in MILESTONES)
+    assert len(CUMULATIVE_TIPS) == len(MILESTONES)
+
+
+def test_pending_lists_reached_ranks_that_are_not_done():
+    progress = MilestoneProgress(6, 2026, sent_tips={("u1", MILESTONES[0]["tier"]), ("u1", MILESTONES[2]["tier"])})
+    wager = MILESTONE_THRESHOLDS[3]
+
+    assert progress.pending("u1", wager) == [1, 3]
+    assert progress.pending("u2", wager) == [0, 1, 2, 3]
+    assert progress.pending("u2", MILESTONE_THRESHOLDS[0] - 1) == []
+    assert progress.period == (6, 2026)
+
+
+def test_claim_advances_watermark_and_release_undoes_it():
+    progress = MilestoneProgress(6, 2026)
+    wager = MILESTONE_THRESHOLDS[2]
+    for index in progress.pending("u1", wager):
+        progress.claim("u1", index)
+
+    assert progress.pending("u1", wager) == []
+    assert progress.pending("u1", MILESTONE_THRESHOLDS[3]) == [3]
+
+    progress.release("u1", 1)
+    assert progress.pending("u1", wager) == [1]
+    progress.release("u1", 1)  # releasing twice is a no-op
+    progress.release("u2", 0)  # so is releasing for an unknown user
+    assert progress.pending("u1", wager) == [1]
+
+
+def test_unknown_tiers_in_sent_tips_are_ignored():
+    progress = MilestoneProgress(6, 2026, sent_tips={("u1", "Retired Tier")})
+
+    assert progress.pending("u1", MILESTONE_THRESHOLDS[0]) == [0]
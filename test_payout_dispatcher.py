@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import pytest
+
+try:
+    import payout_dispatcher
+    from payout_dispatcher import (
+        CANCELLED_RESPONSE,
+        LANE_CHALLENGE,
+        LANE_INTERACTIVE,
+        LANE_MILESTONE,
+        LANE_PRIZE,
+        PayoutDispatcher,
+        PayoutRequest,
+        TokenBucket,
+    )
+except Exception:  # payout_dispatcher -> tipping -> db, which opens the pool on import
+    payout_dispatcher = None
+
+pytestmark = pytest.mark.skipif(payout_dispatcher is None, reason="payout_dispatcher needs a reachable DATABASE_URL")
+
+
+class FakeTippingClient:
+    """Records sends; responses are popped per username, defaulting to success."""
+
+    def __init__(self, responses=None):
+        self.sent = []
+        self.responses = responses or {}
+
+    async def send(self, to_username, to_user_id, amount, show_in_chat=True, balance_type="crypto", idempotency_key=None):
+        self.sent.append((to_username, idempotency_key))
+        queued = self.responses.get(to_username)
+        if queued:
+            return queued.pop(0)
+        return {"success": True}
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = FakeTippingClient()
+    monkeypatch.setattr(payout_dispatcher, "tipping_client", client)
+    return client
+
+
+def _fast_dispatcher(**kwargs):
+    options = {"tips_per_minute": 6000, "max_tips_per_minute": 6000, "burst": 10, "workers": 1}
+    options.update(kwargs)
+    return PayoutDispatcher(**options)
+
+
+def test_token_bucket_allows_burst_then_paces():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        burst = time.monotonic() - start
+        await bucket.acquire()
+        return burst, time.monotonic() - start
+
+    burst, total = asyncio.run(run())
+    assert burst < 0.02
+    assert total >= 0.04  # third token refills at 20/s
+
+
+def test_token_bucket_pause_blocks_and_drops_burst():
+    async def run():
+        bucket = TokenBucket(rate=1000, capacity=5)
+        bucket.pause(0.05)
+        start = time.monotonic()
+        await bucket.acquire()
+        return bucket.tokens, time.monotonic() - start
+
+    tokens, waited = asyncio.run(run())
+    assert waited >= 0.05
+    assert tokens < 5
+
+
+def test_lower_lanes_are_sent_first(fake_client):
+    async def run():
+        dispatcher = _fast_dispatcher()
+        futures = [
+            dispatcher.submit(PayoutRequest(LANE_MILESTONE, "milestone", "1", 1)),
+            dispatcher.submit(PayoutRequest(LANE_CHALLENGE, "challenge", "2", 1)),
+            dispatcher.submit(PayoutRequest(LANE_PRIZE, "prize", "3", 1)),
+            dispatcher.submit(PayoutRequest(LANE_INTERACTIVE, "interactive", "4", 1)),
+        ]
+        await asyncio.gather(*futures)
+        dispatcher.stop()
+        return dispatcher.stats()
+
+    stats = asyncio.run(run())
+    assert [username for username, _ in fake_client.sent] == ["interactive", "prize", "challenge", "milestone"]
+    assert stats["sent"] == 4 and stats["pending"] == 0
+
+
+def test_rate_limited_request_is_requeued_with_the_same_key(fake_client):
+    fake_client.responses["bob"] = [{"success": False, "status": 429, "retry_after": "0.01"}]
+
+    async def run():
+        dispatcher = _fast_dispatcher(tips_per_minute=600)
+        response = await dispatcher.send(LANE_PRIZE, "bob", "1", 5, idempotency_key="weekly:1")
+        dispatcher.stop()
+        return response, dispatcher
+
+    response, dispatcher = asyncio.run(run())
+    assert response == {"success": True}
+    assert fake_client.sent == [("bob", "weekly:1"), ("bob", "weekly:1")]
+    assert dispatcher.rate_limited == 1
+    # halved on the 429, then +1/min for the success
+    assert dispatcher.stats()["tips_per_minute"] == pytest.approx(301, abs=0.1)
+
+
+def test_cancel_resolves_waiting_requests(fake_client):
+    async def run():
+        dispatcher = _fast_dispatcher()
+        keep = dispatcher.submit(PayoutRequest(LANE_MILESTONE, "keep", "1", 1, source="milestone"))
+        drop = dispatcher.submit(PayoutRequest(LANE_MILESTONE, "drop", "2", 1, source="milestone"))
+        cancelled = dispatcher.cancel(lambda request: request.to_username == "drop")
+        results = await asyncio.gather(keep, drop)
+        dispatcher.stop()
+        return cancelled, results
+
+    cancelled, (kept, dropped) = asyncio.run(run())
+    assert [request.to_username for request in cancelled] == ["drop"]
+    assert kept == {"success": True}
+    assert dropped == CANCELLED_RESPONSE
+    assert [username for username, _ in fake_client.sent] == ["keep"]
@@ -0,0 +1,116 @@
+import asyncio
+import gzip
+import json
+import os
+
+import pytest
+
+import publisher
+from publisher import LocalDirectoryPublisher, encode_json_files, to_columnar
+
+try:
+    import db_async
+    from cogs.datamanager import DataManager, MANIFEST_FILENAME
+except Exception:  # db.py opens the connection pool on import, so this needs DATABASE_URL
+    DataManager = None
+
+needs_db = pytest.mark.skipif(DataManager is None, reason="cogs.datamanager needs a reachable DATABASE_URL")
+
+
+def _read(root, path):
+    with open(os.path.join(root, path), "rb") as f:
+        return f.read()
+
+
+def test_publish_writes_all_files_in_one_commit(tmp_path):
+    publisher = LocalDirectoryPublisher(str(tmp_path))
+    commit = asyncio.run(publisher.publish(
+        {"a.json": '{"a":1}', "nested/b.json": '{"b":2}', "c.json": "[]"},
+        "Update 3 data files",
+    ))
+
+    assert commit == "local-1"
+    assert publisher.commits == [
+        {"id": "local-1", "message": "Update 3 data files", "files": ["a.json", "c.json", "nested/b.json"]}
+    ]
+    assert _read(tmp_path, "nested/b.json") == b'{"b":2}'
+
+
+def test_republishing_unchanged_content_returns_none(tmp_path):
+    publisher = LocalDirectoryPublisher(str(tmp_path))
+    files = {"a.json": '{"a":1}', "b.json": '{"b":2}'}
+    asyncio.run(publisher.publish(files, "first"))
+
+    assert asyncio.run(publisher.publish(files, "second")) is None
+    assert asyncio.run(publisher.publish({**files, "b.json": '{"b":3}'}, "third")) == "local-2"
+    assert publisher.commits[-1]["files"] == ["b.json"]
+
+
+def test_bytes_content_is_written_exactly(tmp_path):
+    publisher = LocalDirectoryPublisher(str(tmp_path))
+    compressed = gzip.compress(b'{"a":1}', mtime=0)
+    asyncio.run(publisher.publish({"a.json.gz": compressed}, "gz"))
+
+    assert _read(tmp_path, "a.json.gz") == compressed
+    assert gzip.decompress(_read(tmp_path, "a.json.gz")) == b'{"a":1}'
+
+
+@needs_db
+def test_publish_json_files_skips_unchanged_payloads(tmp_path, monkeypatch):
+    saved = {}
+
+    async def save_setting_value(key, value):
+        saved[key] = value
+
+    monkeypatch.setattr(db_async, "save_setting_value", save_setting_value)
+    manager = DataManager.__new__(DataManager)  # skip __init__, which starts the fetch loop
+    manager.publisher = LocalDirectoryPublisher(str(tmp_path))
+    manager.manifest_files = {}
+
+    first = [
+        ("one.json", {"value": 1, "last_updated": "2026-01-01T00:00:00"}),
+        ("two.json", {"value": 2, "last_updated": "2026-01-01T00:00:00"}),
+    ]
+    assert asyncio.run(manager.publish_json_files(first))
+    assert manager.manifest_files["one.json"]["digest"]
+    assert json.loads(saved["wagerdata_manifest"]) == manager.manifest_files
+
+    # Only the volatile timestamp moved on one.json; two.json really changed
+    second = [
+        ("one.json", {"value": 1, "last_updated": "2026-01-01T00:10:00"}),
+        ("two.json", {"value": 3, "last_updated": "2026-01-01T00:10:00"}),
+    ]
+    assert asyncio.run(manager.publish_json_files(second))
+    assert manager.publisher.commits[-1]["files"] == [MANIFEST_FILENAME, "two.json"]
+    assert json.loads(_read(tmp_path, "one.json")) == first[0][1]
+
+
+def test_to_columnar_rewrites_uniform_record_lists():
+    data = {
+        "entries": [{"uid": "a", "wagered": 1.5}, {"uid": "b", "wagered": 2}],
+        "mixed": [{"uid": "a"}, {"name": "b"}],
+        "nested": {"rows": [{"x": [{"y": 1}, {"y": 2}]}]},
+    }
+
+    assert to_columnar(data) == {
+        "entries": {"columns": ["uid", "wagered"], "rows": [["a", 1.5], ["b", 2]]},
+        "mixed": [{"uid": "a"}, {"name": "b"}],
+        "nested": {"rows": {"columns": ["x"], "rows": [[{"columns": ["y"], "rows": [[1], [2]]}]]}},
+    }
+
+
+def test_encode_json_files_is_deterministic(monkeypatch):
+    monkeypatch.setattr(publisher, "PRECOMPRESS_FORMATS", {"gzip"})
+    monkeypatch.setattr(publisher, "COLUMNAR_FILES", {"allWagerData.json"})
+    data = {"data_type": "all_wager", "entries": [{"uid": "a", "wagered": 1}, {"uid": "b", "wagered": 2}]}
+
+    first = encode_json_files("allWagerData.json", data)
+    second = encode_json_files("allWagerData.json", json.loads(json.dumps(data)))
+
+    assert sorted(first) == [
+        "allWagerData.columnar.json", "allWagerData.columnar.json.gz", "allWagerData.json", "allWagerData.json.gz",
+    ]
+    assert first == second
+    assert json.loads(first["allWagerData.json"]) == data
+    assert gzip.decompress(first["allWagerData.json.gz"]) == first["allWagerData.json"].encode("utf-8")
+    assert json.loads(first["allWagerData.columnar.json"])["entries"]["columns"] == ["uid", "wagered"]
@@ -0,0 +1,103 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+import uuid
+
+import db_async
+from utils import send_tip
+
+logger = logging.getLogger(__name__)
+
+# Attempts per send() call for 5xx and lost responses, all with the same nonce
+TIP_SEND_ATTEMPTS = 3
+TIP_RETRY_BASE_SECONDS = 1.0  # 1s, 2s between attempts
+
+_nonce_sequence = itertools.count()
+
+
+def _new_nonce():
+    """Millisecond timestamp like the old nonce, with a per-process suffix so concurrent tips differ."""
+    return f"{int(time.time() * 1000)}{next(_nonce_sequence) % 1000:03d}"
+
+
+def _is_ambiguous(response):
+    """True if the tip may have been applied even though we didn't get a success back."""
+    return bool(response.get("unknown")) or (response.get("status") or 0) >= 500
+
+
+class TippingClient:
+    """
+    Idempotent tip sending on top of utils.send_tip.
+
+    Every tip has an idempotency key (payout job key, withdrawal id, or a random one for ad-hoc
+    tips). Before the first request a tip_intents row stores the key and its nonce. Every retry
+    of that key, here, after a 429 in the dispatcher, or after a restart, reuses the nonce, so the
+    Tipping API sees a duplicate rather than a second tip. A key that was already sent is
+    answered from the intent without calling the API.
+
+    Outcomes that can't be known (timeouts, 5xx) leave the intent 'unknown' and are retried with
+    the same nonce. If the API then rejects the request, it can't be told apart from "already
+    applied", so the intent moves to 'review' and is not sent again until someone resolves it
+    (setting it to 'failed' allows a fresh attempt, 'sent' closes it).
+    """
+
+    async def send(self, to_username, to_user_id, amount, show_in_chat=True, balance_type="crypto", idempotency_key=None):
+        key = idempotency_key or f"adhoc:{uuid.uuid4().hex}"
+        nonce = _new_nonce()
+        intent = await db_async.begin_tip_intent(key, nonce, to_user_id, to_username, amount)
+        if intent is None:
+            # Without a stored nonce a retry could pay twice, so don't send at all
+            return {"success": False, "message": "could not record tip intent"}
+        if intent["status"] == "sent":
+            logger.info(f"[Tipping] {key} was already sent to {to_username}; not sending again")
+            return {**(intent["response"] or {}), "success": True, "replayed": True}
+
+        if intent["status"] == "review":
+            logger.warning(f"[Tipping] {key} for {to_username} is held for review; not sending")
+            return {"success": False, "unknown": True, "message": "tip outcome is under review"}
+
+        # An earlier attempt with this nonce may have gone through. A rate limited ('pending')
+        # intent doesn't count: a 429 means nothing was applied
+        reconciling = intent["status"] == "unknown"
+        if reconciling:
+            logger.warning(f"[Tipping] Reconciling {key} for {to_username} with its original nonce")
+
+        bot_user_id = os.getenv("ROOBET_USER_ID")
+        response = {"success": False, "message": "not sent"}
+        for attempt in range(1, TIP_SEND_ATTEMPTS + 1):
+            response = await send_tip(
+                bot_user_id, to_username, to_user_id, amount,
+                show_in_chat=show_in_chat, balance_type=balance_type, nonce=intent["nonce"],
+            )
+            status_code = response.get("status")
+            if response.get("success"):
+                await db_async.finish_tip_intent(key, "sent", 200, response)
+                return response
+            if status_code == 429:
+                # Not applied; the dispatcher backs off and calls again with the same key and nonce
+                await db_async.finish_tip_intent(key, "unknown" if reconciling else "pending", 429, error=response.get("message"))
+                return response
+            if _is_ambiguous(response):
+                reconciling = True
+                await db_async.finish_tip_intent(key, "unknown", status_code, error=response.get("message"))
+                if attempt < TIP_SEND_ATTEMPTS:
+                    await asyncio.sleep(TIP_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+                continue
+            if reconciling:
+                logger.error(
+                    f"[Tipping] {key} for {to_username} was rejected after an unknown outcome "
+                    f"(HTTP {status_code}); holding it for review"
+                )
+                await db_async.finish_tip_intent(key, "review", status_code, error=response.get("message"))
+                return {**response, "unknown": True}
+            # Definitive rejection (e.g. insufficient balance): a later retry gets a fresh nonce
+            await db_async.finish_tip_intent(key, "failed", status_code, error=response.get("message"))
+            return response
+
+        logger.error(f"[Tipping] Outcome of {key} for {to_username} still unknown after {TIP_SEND_ATTEMPTS} attempts")
+        return {**response, "success": False, "unknown": True}
+
+
+tipping_client = TippingClient()
@@ -5,7 +5,9 @@ import datetime as dt
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 import os
 import time
+import asyncio
 import aiohttp
+from collections import OrderedDict
 
 ROOBET_API_TOKEN = os.getenv("ROOBET_API_TOKEN")
 TIPPING_API_TOKEN = os.getenv("TIPPING_API_TOKEN")
@@ -15,25 +17,383 @@ TIPPING_API_URL = "https://roobet.com/_api/tipping/send"
 
 logger = logging.getLogger(__name__)
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def fetch_total_wager(start_date, end_date):
-    headers = {"Authorization": f"Bearer {ROOBET_API_TOKEN}"}
+# Shared HTTP session for the affiliate API (created lazily on the running event loop)
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=20, connect=5, sock_read=15)
+HTTP_CONNECTION_LIMIT = 20
+_http_session = None
+
+# In-flight affiliate requests keyed by query window, so identical concurrent calls share one HTTP round trip
+_inflight_requests = {}
+
+# Windowed response cache: open windows are fresh for AFFILIATE_CACHE_FRESH_SECONDS, then served stale
+# (while refreshing in the background) for AFFILIATE_CACHE_STALE_SECONDS more; closed windows live longer
+AFFILIATE_CACHE_FRESH_SECONDS = 60
+AFFILIATE_CACHE_STALE_SECONDS = 540
+AFFILIATE_CACHE_CLOSED_TTL_SECONDS = 6 * 60 * 60
+AFFILIATE_CACHE_MAX_ENTRIES = 128
+# Upstream stats can trail slightly, so a window only counts as closed once it ended this long ago
+AFFILIATE_CLOSED_WINDOW_GRACE = dt.timedelta(hours=1)
+_background_refreshes = {}
+
+
+class AffiliateAPIError(Exception):
+    """Non-2xx response from the affiliate stats API."""
+
+    def __init__(self, status, message=""):
+        super().__init__(f"HTTP {status}: {message}" if message else f"HTTP {status}")
+        self.status = status
+
+
+def _is_retryable_affiliate_error(e):
+    if isinstance(e, AffiliateAPIError):
+        return e.status == 429 or e.status >= 500
+    return isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+def _total_wager_params(start_date, end_date):
+    return {
+        "userId": ROOBET_USER_ID,
+        "startDate": start_date,
+        "endDate": end_date,
+        "timestamp": datetime.now(dt.UTC).isoformat(),
+    }
+
+
+def _weighted_wager_params(start_date, end_date, game_identifier=None):
     params = {
         "userId": ROOBET_USER_ID,
         "startDate": start_date,
         "endDate": end_date,
         "timestamp": datetime.now(dt.UTC).isoformat(),
+        "categories": "slots,provably fair",
+        "gameIdentifiers": "-housegames:dice"
+    }
+    if game_identifier:
+        params["gameIdentifiers"] = game_identifier
+    return params
+
+
+def _user_game_stats_params(user_id, game_identifier, start_date, end_date=None):
+    params = {
+        "userId": user_id,
+        "startDate": start_date,
     }
+    if end_date:
+        params["endDate"] = end_date
+    if game_identifier:
+        params["gameIdentifiers"] = game_identifier
+    return params
+
+
+def _extract_stats_rows(data, label):
+    data = data.get("data", []) if isinstance(data, dict) else data
+    if not isinstance(data, list):
+        logger.warning(f"Unexpected {label} response format: {data}")
+        return []
+    logger.debug(f"{label.title()} API Response: {len(data)} entries")
+    # Responses can be shared between coalesced callers, and some callers sort in place
+    return list(data)
+
+
+async def get_http_session():
+    """Return the shared keep-alive aiohttp session, creating it on first use."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_CONNECTION_LIMIT,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        _http_session = aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT)
+    return _http_session
+
+
+async def close_http_session():
+    """Close the shared aiohttp session (call once on shutdown)."""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    retry=retry_if_exception(_is_retryable_affiliate_error),
+    reraise=True
+)
+async def _affiliate_get(params, allow_bad_request=False):
+    """GET the affiliate stats endpoint; retries on timeouts, connection errors, 429 and 5xx."""
+    headers = {"Authorization": f"Bearer {ROOBET_API_TOKEN}"}
+    # aiohttp only accepts str/int/float query values; requests dropped None and str()'d the rest
+    query = {
+        key: value if isinstance(value, (str, int, float)) else str(value)
+        for key, value in params.items()
+        if value is not None
+    }
+    session = await get_http_session()
+    async with session.get(AFFILIATE_API_URL, headers=headers, params=query) as response:
+        if response.status == 400 and allow_bad_request:
+            return None
+        if response.status >= 400:
+            body = await response.text()
+            raise AffiliateAPIError(response.status, body[:200])
+        return await response.json(content_type=None)
+
+
+def _parse_window_bound(value):
+    """Parse a startDate/endDate value (ISO string or datetime) into an aware UTC datetime, or None."""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, datetime):
+            parsed = value
+        else:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt.UTC)
+    return parsed.astimezone(dt.UTC)
+
+
+def _normalize_window_bound(value):
+    # Truncate to the minute so "now"-relative windows requested seconds apart share a key
+    parsed = _parse_window_bound(value)
+    if parsed is None:
+        return str(value)
+    return parsed.replace(second=0, microsecond=0).isoformat()
+
+
+def _coalesce_key(params, allow_bad_request=False):
+    # The per-call "timestamp" param is deliberately left out so identical windows collapse
+    return (
+        AFFILIATE_API_URL,
+        params.get("userId"),
+        _normalize_window_bound(params.get("startDate")),
+        _normalize_window_bound(params.get("endDate")),
+        params.get("gameIdentifiers"),
+        params.get("categories"),
+        allow_bad_request,
+    )
+
+
+def _discard_inflight(key, task):
+    if _inflight_requests.get(key) is task:
+        del _inflight_requests[key]
+    # Mark the exception as retrieved even if every waiter was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+async def _affiliate_get_shared(params, allow_bad_request=False):
+    """Single-flight wrapper around _affiliate_get: concurrent identical queries await one request."""
+    key = _coalesce_key(params, allow_bad_request)
+    task = _inflight_requests.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_affiliate_get(params, allow_bad_request))
+        _inflight_requests[key] = task
+        task.add_done_callback(lambda t, k=key: _discard_inflight(k, t))
+    else:
+        logger.debug(f"Coalescing affiliate request for {key[2]} -> {key[3]} ({key[4]})")
+    # Shield so one cancelled caller does not cancel the request for everyone else
+    return await asyncio.shield(task)
+
+
+class AffiliateStatsCache:
+    """Size-bounded LRU of affiliate API responses keyed by normalized query window."""
+
+    def __init__(self, max_entries=AFFILIATE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, data, fresh_seconds, stale_seconds):
+        self._entries[key] = (data, time.monotonic(), fresh_seconds, stale_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+
+affiliate_cache = AffiliateStatsCache()
+
+
+def is_window_closed(end_date):
+    """True once a window ended long enough ago that upstream stats for it are final."""
+    end = _parse_window_bound(end_date)
+    return end is not None and end + AFFILIATE_CLOSED_WINDOW_GRACE < datetime.now(dt.UTC)
+
+
+def _is_closed_window(params):
+    return is_window_closed(params.get("endDate"))
+
+
+def _window_ttls(params):
+    """Return (fresh_seconds, stale_seconds) for a query window."""
+    if _is_closed_window(params):
+        return AFFILIATE_CACHE_CLOSED_TTL_SECONDS, 0
+    return AFFILIATE_CACHE_FRESH_SECONDS, AFFILIATE_CACHE_STALE_SECONDS
+
+
+def _closed_period_key(key):
+    # key is a _coalesce_key tuple; the endpoint URL is constant so it is left out of the stored key
+    _, user_id, start, end, game_identifiers, categories, _ = key
+    return f"{user_id}|{start}|{end}|{game_identifiers or ''}|{categories or ''}"
+
+
+async def _load_closed_period(key):
+    import db_async
+    try:
+        return await db_async.get_closed_period_response(_closed_period_key(key))
+    except Exception as e:
+        logger.warning(f"Closed period store lookup failed for {key[2]} -> {key[3]}: {e}")
+        return None
+
+
+async def _store_closed_period(key, data):
+    import db_async
+    try:
+        stored = await db_async.save_closed_period_response(
+            _closed_period_key(key),
+            key[2],
+            key[3],
+            key[4],
+            key[5],
+            data,
+        )
+        if stored:
+            logger.info(f"Stored closed affiliate period {key[2]} -> {key[3]} ({key[4] or 'all games'})")
+    except Exception as e:
+        logger.warning(f"Closed period store write failed for {key[2]} -> {key[3]}: {e}")
+
+
+async def _refresh_cached(key, params, allow_bad_request=False):
+    data = await _affiliate_get_shared(params, allow_bad_request)
+    fresh_seconds, stale_seconds = _window_ttls(params)
+    affiliate_cache.put(key, data, fresh_seconds, stale_seconds)
+    return data
+
+
+def _finish_background_refresh(key, task):
+    if _background_refreshes.get(key) is task:
+        del _background_refreshes[key]
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background affiliate cache refresh failed for {key[2]} -> {key[3]}: {task.exception()}")
+
+
+def _schedule_background_refresh(key, params, allow_bad_request=False):
+    if key in _background_refreshes:
+        return
+    task = asyncio.ensure_future(_refresh_cached(key, params, allow_bad_request))
+    _background_refreshes[key] = task
+    task.add_done_callback(lambda t, k=key: _finish_background_refresh(k, t))
+
+
+async def _affiliate_get_cached(params, allow_bad_request=False, force_refresh=False):
+    """
+    Serve an affiliate query from the windowed cache when possible.
+    Stale entries are returned immediately and refreshed in the background,
+    closed windows fall back to the persistent affiliate_period_cache table,
+    and force_refresh always goes upstream and repopulates both.
+    """
+    key = _coalesce_key(params, allow_bad_request)
+    if not force_refresh:
+        entry = affiliate_cache.get(key)
+        if entry is not None:
+            data, fetched_at, fresh_seconds, stale_seconds = entry
+            age = time.monotonic() - fetched_at
+            if age < fresh_seconds:
+                affiliate_cache.hits += 1
+                return data
+            if age < fresh_seconds + stale_seconds:
+                affiliate_cache.stale_hits += 1
+                _schedule_background_refresh(key, params, allow_bad_request)
+                return data
+    # Finished months/weeks never change upstream, so they are read from Postgres after the first fetch
+    closed = _is_closed_window(params)
+    if closed and not force_refresh:
+        stored = await _load_closed_period(key)
+        if stored is not None:
+            affiliate_cache.put(key, stored, AFFILIATE_CACHE_CLOSED_TTL_SECONDS, 0)
+            return stored
+    affiliate_cache.misses += 1
+    data = await _refresh_cached(key, params, allow_bad_request)
+    if closed and data is not None:
+        await _store_closed_period(key, data)
+    return data
+
+
+async def fetch_total_wager_async(start_date, end_date, force_refresh=False):
+    try:
+        data = await _affiliate_get_cached(_total_wager_params(start_date, end_date), force_refresh=force_refresh)
+    except (aiohttp.ClientError, asyncio.TimeoutError, AffiliateAPIError) as e:
+        logger.error(f"Total Wager API Request Failed: {e}")
+        raise
+    except ValueError as e:
+        logger.error(f"Error parsing Total Wager JSON response: {e}")
+        raise
+    return _extract_stats_rows(data, "total wager")
+
+
+async def fetch_weighted_wager_async(start_date, end_date, game_identifier=None, force_refresh=False):
+    try:
+        data = await _affiliate_get_cached(
+            _weighted_wager_params(start_date, end_date, game_identifier),
+            force_refresh=force_refresh
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError, AffiliateAPIError) as e:
+        logger.error(f"Weighted Wager API Request Failed: {e}")
+        raise
+    except ValueError as e:
+        logger.error(f"Error parsing Weighted Wager JSON response: {e}")
+        raise
+    return _extract_stats_rows(data, "weighted wager")
+
+
+async def fetch_user_game_stats_async(user_id, game_identifier, start_date, end_date=None):
+    """Async version of fetch_user_game_stats; returns None when there is no data."""
+    try:
+        data = await _affiliate_get_cached(
+            _user_game_stats_params(user_id, game_identifier, start_date, end_date),
+            allow_bad_request=True
+        )
+    except Exception as e:
+        logger.error(f"User/game stats API error: {e}")
+        return None
+    if isinstance(data, dict):
+        data = data.get("data", [])
+    if not isinstance(data, list) or not data:
+        return None
+    return data[0]
+
+# Blocking variants, kept for standalone scripts (test_backfill.py) that run outside the bot loop
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+def fetch_total_wager(start_date, end_date):
+    headers = {"Authorization": f"Bearer {ROOBET_API_TOKEN}"}
+    params = _total_wager_params(start_date, end_date)
     try:
         response = requests.get(AFFILIATE_API_URL, headers=headers, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
-        data = data.get("data", []) if isinstance(data, dict) else data
-        if not isinstance(data, list):
-            logger.warning(f"Unexpected total wager response format: {data}")
-            return []
-        logger.debug(f"Total Wager API Response: {len(data)} entries")
-        return data
+        return _extract_stats_rows(response.json(), "total wager")
     except requests.RequestException as e:
         logger.error(f"Total Wager API Request Failed: {e}")
         raise
@@ -44,26 +404,11 @@ def fetch_total_wager(start_date, end_date):
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
 def fetch_weighted_wager(start_date, end_date, game_identifier=None):
     headers = {"Authorization": f"Bearer {ROOBET_API_TOKEN}"}
-    params = {
-        "userId": ROOBET_USER_ID,
-        "startDate": start_date,
-        "endDate": end_date,
-        "timestamp": datetime.now(dt.UTC).isoformat(),
-        "categories": "slots,provably fair",
-        "gameIdentifiers": "-housegames:dice"
-    }
-    if game_identifier:
-        params["gameIdentifiers"] = game_identifier
+    params = _weighted_wager_params(start_date, end_date, game_identifier)
     try:
         response = requests.get(AFFILIATE_API_URL, headers=headers, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
-        data = data.get("data", []) if isinstance(data, dict) else data
-        if not isinstance(data, list):
-            logger.warning(f"Unexpected weighted wager response format: {data}")
-            return []
-        logger.debug(f"Weighted Wager API Response: {len(data)} entries")
-        return data
+        return _extract_stats_rows(response.json(), "weighted wager")
     except requests.RequestException as e:
         logger.error(f"Weighted Wager API Request Failed: {e}")
         raise
@@ -71,14 +416,18 @@ def fetch_weighted_wager(start_date, end_date, game_identifier=None):
         logger.error(f"Error parsing Weighted Wager JSON response: {e}")
         raise
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception(lambda e: isinstance(e, requests.HTTPError) and e.response.status_code == 429)
-)
-async def send_tip(user_id, to_username, to_user_id, amount, show_in_chat=True, balance_type="crypto"):
+# Per-attempt limit for a tip POST; on the shared session, so the connection is kept alive
+TIP_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=5)
+
+async def send_tip(user_id, to_username, to_user_id, amount, show_in_chat=True, balance_type="crypto", nonce=None):
+    """
+    One POST to the Tipping API. Use tipping.tipping_client (via the payout dispatcher) in the bot:
+    it persists the nonce first and retries with it. Failures carry "status" (and "retry_after")
+    when the API answered, or "unknown": True when the tip may have gone through (e.g. a timeout).
+    """
     headers = {"Authorization": f"Bearer {TIPPING_API_TOKEN}"}
-    nonce = str(int(time.time() * 1000))  # Use current timestamp in ms as a simple nonce
+    if nonce is None:
+        nonce = str(int(time.time() * 1000))
     payload = {
         "userId": user_id,
         "toUserName": to_username,
@@ -89,24 +438,31 @@ async def send_tip(user_id, to_username, to_user_id, amount, show_in_chat=True,
         "nonce": nonce
     }
     logger.debug(f"Sending tip request for {to_username}: Payload={payload}")
-    logger.debug(f"[DEBUG] Tip payload for {to_username}: {payload}")
-    logger.debug(f"[DEBUG] Tip headers: {headers}")
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(TIPPING_API_URL, json=payload, headers=headers, timeout=10) as response:
-                if response.status == 200:
-                    logger.info(f"Tip sent to {to_username}: ${amount}")
-                    return await response.json()
-                else:
-                    try:
-                        error_response = await response.json()
-                        logger.error(f"Tipping API Request Failed for {to_username}: {response.status}, Response: {error_response}")
-                    except Exception:
-                        logger.error(f"Tipping API Request Failed for {to_username}: {response.status}")
-                    return {"success": False, "message": f"HTTP {response.status}"}
-        except Exception as e:
-            logger.error(f"Exception in send_tip for {to_username}: {e}")
-            return {"success": False, "message": str(e)}
+    session = await get_http_session()
+    try:
+        async with session.post(TIPPING_API_URL, json=payload, headers=headers, timeout=TIP_REQUEST_TIMEOUT) as response:
+            if response.status == 200:
+                logger.info(f"Tip sent to {to_username}: ${amount}")
+                return await response.json(content_type=None)
+            try:
+                error_response = await response.json(content_type=None)
+                logger.error(f"Tipping API Request Failed for {to_username}: {response.status}, Response: {error_response}")
+            except Exception:
+                logger.error(f"Tipping API Request Failed for {to_username}: {response.status}")
+            # status/retry_after let the payout dispatcher back off on rate limits
+            return {
+                "success": False,
+                "message": f"HTTP {response.status}",
+                "status": response.status,
+                "retry_after": response.headers.get("Retry-After"),
+            }
+    except aiohttp.ClientConnectorError as e:
+        # Never reached the API, so nothing was sent
+        logger.error(f"Could not connect to the Tipping API for {to_username}: {e}")
+        return {"success": False, "message": str(e)}
+    except Exception as e:
+        logger.error(f"Exception in send_tip for {to_username}: {e}")
+        return {"success": False, "message": str(e) or type(e).__name__, "unknown": True}
 
 def get_current_month_range():
     now = datetime.now(dt.UTC)
@@ -167,14 +523,7 @@ def fetch_user_game_stats(user_id, game_identifier, start_date, end_date=None):
     Gracefully handles 400 errors (no data for user/game/time window).
     """
     headers = {"Authorization": f"Bearer {ROOBET_API_TOKEN}"}
-    params = {
-        "userId": user_id,
-        "startDate": start_date,
-    }
-    if end_date:
-        params["endDate"] = end_date
-    if game_identifier:
-        params["gameIdentifiers"] = game_identifier
+    params = _user_game_stats_params(user_id, game_identifier, start_date, end_date)
     try:
         response = requests.get(AFFILIATE_API_URL, headers=headers, params=params, timeout=10)
         if response.status_code == 400: